@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import datetime
+import json
+import os
+from typing import IO, Any, Iterator
+
+import click
+
+from ckanext.transmute.logic.action import transmute_record
+from ckanext.transmute.parallel import transmute_parallel
+from ckanext.transmute.schema import SchemaParser, get_parser
+
+
+def get_commands():
+    return [transmute]
+
+
+@click.group(short_help="ckanext-transmute CLI commands")
+def transmute():
+    pass
+
+
+@transmute.command()
+@click.argument("source", type=click.File("r"), default="-")
+@click.option(
+    "-s",
+    "--schema",
+    required=True,
+    help="Name of the named schema or path to the JSON file with schema",
+)
+@click.option("-r", "--root", help="Root type. Defaults to the root of the schema")
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Destination of transmuted records",
+)
+@click.option(
+    "-w",
+    "--workers",
+    type=click.IntRange(1),
+    default=1,
+    help="Number of worker processes",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(1),
+    default=100,
+    help="Number of records sent to a worker process at once",
+)
+@click.option(
+    "--ordered/--unordered",
+    default=True,
+    help="Keep the order of records when using multiple workers",
+)
+@click.option(
+    "--collect-errors",
+    is_flag=True,
+    help="Report all invalid fields of the record instead of the first one",
+)
+def run(
+    source: IO[str],
+    schema: str,
+    root: str | None,
+    output: IO[str],
+    workers: int,
+    chunk_size: int,
+    ordered: bool,
+    collect_errors: bool,
+):
+    """Transmute newline-delimited JSON records from SOURCE.
+
+    Records are read, transmuted and written one by one, so memory
+    consumption does not depend on the number of records. Records that
+    cannot be transmuted are reported to stderr and do not stop processing
+    of the remaining records.
+    """
+    parser = _load_schema(schema)
+    definition = parser.compile()
+    root = root or parser.root_type
+    stats = {"invalid": 0, "failed": 0}
+
+    records = _read_records(source, stats)
+    if workers > 1:
+        results = transmute_parallel(
+            records, definition, root, workers, chunk_size, ordered, collect_errors
+        )
+    else:
+        results = (
+            (line, transmute_record(record, definition, root, collect_errors))
+            for line, record in records
+        )
+
+    for line, result in results:
+        if result["success"]:
+            try:
+                content = json.dumps(result["result"], default=_serialize)
+            except (TypeError, ValueError) as e:
+                result = {
+                    "success": False,
+                    "result": None,
+                    "errors": {"message": [f"Record cannot be serialized: {e}"]},
+                }
+            else:
+                output.write(content)
+                output.write("\n")
+                continue
+
+        stats["failed"] += 1
+        _report(line, result["errors"])
+
+    if stats["failed"] or stats["invalid"]:
+        raise click.exceptions.Exit(1)
+
+
+def _load_schema(schema: str) -> SchemaParser:
+    if os.path.isfile(schema):
+        with open(schema) as src:
+            return get_parser(json.load(src))
+
+    return get_parser(schema)
+
+
+def _read_records(
+    source: IO[str], stats: dict[str, int]
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    for lineno, line in enumerate(source, 1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = None
+            error = str(e)
+        else:
+            error = "Record must be a JSON object"
+
+        if not isinstance(record, dict):
+            stats["invalid"] += 1
+            _report(lineno, {"message": [error]})
+            continue
+
+        yield lineno, record
+
+
+def _report(line: int, errors: dict[str, Any]):
+    click.echo(json.dumps({"line": line, "errors": errors}, default=str), err=True)
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+
+    return str(value)
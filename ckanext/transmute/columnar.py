@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.transmute.schema import CompiledField, CompiledType
+from ckanext.transmute.utils import SENTINEL
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:
+    pa = None
+    pc = None
+
+CONFIG_MIN_RECORDS = "ckanext.transmute.columnar.min_records"
+
+# values of the column and the mask of records that contain the key
+Column = Tuple[Any, Any]
+Columns = Dict[str, Column]
+
+
+class ColumnarError(Exception):
+    """Records cannot be transmuted by the columnar engine."""
+
+
+def is_available() -> bool:
+    """Columnar engine can be used, i.e. `pyarrow` is installed."""
+    return pa is not None
+
+
+def min_records() -> int:
+    """Min number of records that are transmuted by the columnar engine."""
+    return tk.asint(tk.config.get(CONFIG_MIN_RECORDS, 1000))
+
+
+def transmute(records: list[dict[str, Any]], schema: CompiledType) -> Columns:
+    """Transmute flat records converted into Arrow arrays.
+
+    Every field of the type is processed for all records at once, using
+    vectorized implementations of transmutators. Records are not modified.
+
+    Args:
+        records: records to transmute
+        schema: type of the records
+
+    Raises:
+        ColumnarError: type or values of the records are not supported
+
+    Returns:
+        columns of the keys that were changed by transmutation
+    """
+    if pa is None:
+        raise ColumnarError("pyarrow is not installed")
+
+    if not schema.vectorized:
+        raise ColumnarError("Type cannot be vectorized")
+
+    table = _Table(records)
+    for field in schema.pre_fields:
+        table.process(field)
+
+    for field in schema.fields:
+        table.process(field, True)
+
+    for field in schema.post_fields:
+        table.process(field)
+
+    if schema.drop_unknown_fields:
+        table.drop_unknown()
+
+    return table.changed()
+
+
+def to_records(records: list[dict[str, Any]], columns: Columns):
+    """Write columns back into the records.
+
+    Keys that are missing from the column are removed from the record.
+    """
+    for name, (values, present) in columns.items():
+        for item, value, flag in zip(records, values.to_pylist(), present.to_pylist()):
+            if flag:
+                item[name] = value
+            else:
+                item.pop(name, None)
+
+
+def to_table(records: list[dict[str, Any]], columns: Columns) -> Any:
+    """Build Arrow table from the transmuted columns and unchanged keys.
+
+    Keys that are missing from the record become nulls. Keys that are
+    missing from every record are not included into the table.
+    """
+    names: dict[str, None] = {}
+    for item in records:
+        names.update(dict.fromkeys(item))
+    names.update(dict.fromkeys(columns))
+
+    arrays: dict[str, Any] = {}
+    for name in names:
+        if name in columns:
+            values, present = columns[name]
+            if not pc.any(present).as_py():
+                continue
+            arrays[name] = pc.if_else(present, values, pa.nulls(len(values)))
+        else:
+            arrays[name] = pa.array([item.get(name) for item in records])
+
+    return pa.table(arrays)
+
+
+class _Table:
+    """Columns of the records that are loaded on demand."""
+
+    def __init__(self, records: list[dict[str, Any]]):
+        self.records = records
+        self.size = len(records)
+        self.columns: Columns = {}
+        self.dirty: set[str] = set()
+        self.known: dict[str, Any] = {}
+
+    def column(self, name: str) -> Column:
+        if name not in self.columns:
+            values = [item.get(name) for item in self.records]
+            present = pa.array([name in item for item in self.records], pa.bool_())
+            self.columns[name] = (_load(values), present)
+
+        return self.columns[name]
+
+    def set(self, name: str, values: Any, present: Any):
+        self.columns[name] = (values, present)
+        self.dirty.add(name)
+
+    def process(self, field: CompiledField, known: bool = False):
+        size = self.size
+        if field.remove:
+            self.set(field.name, pa.nulls(size), _mask(False, size))
+            return
+
+        if field.value is not SENTINEL:
+            values = _load([field.value] * size)
+            present = selected = _mask(True, size)
+            self.dirty.add(field.name)
+        else:
+            values, present = self.column(field.name)
+            selected = _mask(True, size) if field.validate_missing else present
+
+        if field.vector_validators and selected.true_count:
+            subset = values.filter(selected)
+            expected = len(subset)
+            for vector, args in field.vector_validators:
+                subset = vector(subset, *args)
+                if len(subset) != expected:
+                    raise ColumnarError("Transmutator changed number of values")
+
+            # records that are not selected do not contain the key
+            values = pc.replace_with_mask(pa.nulls(size, subset.type), selected, subset)
+            self.dirty.add(field.name)
+
+        if field.validate_missing:
+            self.dirty.add(field.name)
+
+        present = pc.or_(present, selected)
+        if field.map and field.map != field.name:
+            target, target_present = self.column(field.map)
+            values, target = _unify(values, target)
+            self.set(
+                field.map,
+                pc.if_else(selected, values, target),
+                pc.or_(selected, target_present),
+            )
+            self.set(field.name, pa.nulls(size), _mask(False, size))
+        else:
+            self.columns[field.name] = (values, present)
+
+        if known:
+            previous = self.known.get(field.output)
+            self.known[field.output] = (
+                selected if previous is None else pc.or_(previous, selected)
+            )
+
+    def drop_unknown(self):
+        names: set[str] = set()
+        for item in self.records:
+            names.update(item)
+        names.update(self.columns)
+
+        for name in names:
+            known = self.known.get(name)
+            if known is None:
+                self.set(name, pa.nulls(self.size), _mask(False, self.size))
+            else:
+                values, present = self.column(name)
+                self.set(name, values, pc.and_(present, known))
+
+    def changed(self) -> Columns:
+        return {name: self.columns[name] for name in self.columns if name in self.dirty}
+
+
+def _mask(flag: bool, size: int) -> Any:
+    return pa.array([flag] * size, pa.bool_())
+
+
+def _unify(left: Any, right: Any) -> tuple[Any, Any]:
+    """Cast arrays of nulls to the type of the other array."""
+    if left.type == right.type:
+        return left, right
+    if pa.types.is_null(left.type):
+        return left.cast(right.type), right
+    if pa.types.is_null(right.type):
+        return left, right.cast(left.type)
+
+    raise ColumnarError(f"Values of types {left.type} and {right.type} are mixed")
+
+
+def _load(values: list[Any]) -> Any:
+    """Convert values into Arrow array that can be converted back unchanged."""
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError) as e:
+        raise ColumnarError(str(e))
+
+    kind = array.type
+    if pa.types.is_floating(kind):
+        if any(isinstance(value, int) for value in values):
+            raise ColumnarError("Integer values are mixed with floats")
+    elif pa.types.is_timestamp(kind):
+        if kind.tz is not None:
+            raise ColumnarError("Timezones are not supported")
+    elif not (
+        pa.types.is_string(kind)
+        or pa.types.is_integer(kind)
+        or pa.types.is_boolean(kind)
+        or pa.types.is_null(kind)
+    ):
+        raise ColumnarError(f"Values of type {kind} are not supported")
+
+    return array
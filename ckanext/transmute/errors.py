@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+from typing import Any, Iterator
+
+import ckan.plugins.toolkit as tk
+from ckan.logic import ValidationError
+
+CONFIG_MAX_ERRORS = "ckanext.transmute.max_errors"
+
+errors_ctx: contextvars.ContextVar[ErrorCollector | None] = contextvars.ContextVar(
+    "errors", default=None
+)
+
+
+class ErrorLimitReached(Exception):
+    """Number of collected errors reached the limit."""
+
+
+class ErrorCollector:
+    """Accumulates validation errors under the path of the invalid field.
+
+    Path starts with the root type and contains the names of fields and
+    indexes of items of `multiple` fields, e.g. `Dataset.resources[3].format`.
+
+    Args:
+        root: root type of the schema
+        max_errors: max number of collected errors
+    """
+
+    def __init__(self, root: str, max_errors: int):
+        self.path = [root]
+        self.max_errors = max_errors
+        self.errors: dict[str, list[str]] = {}
+        self.count = 0
+
+    @contextlib.contextmanager
+    def nested(self, segment: str) -> Iterator[None]:
+        """Append segment to the path inside the block."""
+        self.path.append(segment)
+        try:
+            yield
+        finally:
+            self.path.pop()
+
+    def add(self, field: str, error_dict: dict[str, Any]):
+        """Record errors of the field.
+
+        Raises:
+            ErrorLimitReached: collector is full
+        """
+        key = ".".join(self.path) + "." + field
+        messages = self.errors.setdefault(key, [])
+        for value in error_dict.values():
+            messages.extend(value if isinstance(value, list) else [value])
+
+        self.count += 1
+        if self.count >= self.max_errors:
+            raise ErrorLimitReached
+
+
+@contextlib.contextmanager
+def collecting_errors(root: str) -> Iterator[ErrorCollector]:
+    """Collect validation errors raised inside the block.
+
+    When block is finished and there are collected errors, all of them are
+    raised as a single ValidationError. Collection stops when number of
+    errors reaches `ckanext.transmute.max_errors`.
+    """
+    max_errors = max(tk.asint(tk.config.get(CONFIG_MAX_ERRORS, 100)), 1)
+    collector = ErrorCollector(root, max_errors)
+    token = errors_ctx.set(collector)
+    try:
+        yield collector
+    except ErrorLimitReached:
+        collector.errors["message"] = [
+            f"Validation stopped after {collector.count} errors"
+        ]
+    finally:
+        errors_ctx.reset(token)
+
+    if collector.errors:
+        raise ValidationError(collector.errors)
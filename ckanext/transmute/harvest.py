@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Iterable
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.transmute.exception import (
+    SchemaFieldError,
+    SchemaParsingError,
+    TransmutatorError,
+    UnknownTransmutator,
+)
+from ckanext.transmute.logic.action import transmute_many
+from ckanext.transmute.schema import CompiledSchema, get_parser
+from ckanext.transmute.types import TransmuteResult
+from ckanext.transmute.utils import get_schema
+
+log = logging.getLogger(__name__)
+
+# options of the harvest source config
+CONFIG_SCHEMA = "tsm_schema"
+CONFIG_ROOT = "tsm_root"
+
+
+class TransmuteHarvesterMixin:
+    """Transmute content of harvest objects using the named schema.
+
+    Mixin is added to the harvester from ckanext-harvest, before its base
+    class. Name of the schema is taken from `tsm_schema` option of the
+    harvest source config, or from `transmute_schema` attribute of the
+    harvester. Root type is taken from `tsm_root` option or `transmute_root`
+    attribute and defaults to the root type of the schema.
+
+    Content of objects is transmuted without API calls. Objects are grouped
+    by harvest source and every group is transmuted as a single batch using
+    one execution plan. Named schemas are parsed and compiled only once and
+    reused by subsequent batches.
+
+    ckanext-harvest calls `import_stage` for every object separately, so it
+    transmutes a batch of a single object. Harvesters that import all objects
+    of a job at once should call `import_objects` instead.
+
+    Example:
+        ```python
+        class DcatHarvester(TransmuteHarvesterMixin, HarvesterBase):
+            transmute_schema = "dcat"
+        ```
+    """
+
+    transmute_schema: str | None = None
+    transmute_root: str | None = None
+    transmute_collect_errors: bool = False
+
+    def import_stage(self, harvest_object: Any) -> bool | str:
+        """Transmute the object and import the result.
+
+        Errors of transmutation are saved as import errors of the object.
+
+        Returns:
+            result of `import_transmuted`, `import_deleted` or False if
+            object is invalid
+        """
+        return self.import_objects([harvest_object])[0]
+
+    def import_objects(self, harvest_objects: Iterable[Any]) -> list[bool | str]:
+        """Transmute multiple objects as a batch and import the results.
+
+        Errors of transmutation are saved as import errors of the objects.
+        Objects that report deletion of the package are not transmuted and
+        passed to `import_deleted`.
+
+        Args:
+            harvest_objects: objects with harvested content, e.g. all objects
+                of the harvest job
+
+        Returns:
+            result of `import_transmuted`, `import_deleted` or False for every
+            object, in the same order
+        """
+        objects = list(harvest_objects)
+        imported: list[bool | str] = [False for _obj in objects]
+        harvested: list[tuple[int, Any]] = []
+        for idx, obj in enumerate(objects):
+            if is_deleted(obj):
+                imported[idx] = self.import_deleted(obj)
+            else:
+                harvested.append((idx, obj))
+
+        results = self.transmute_objects(obj for _idx, obj in harvested)
+        for (idx, obj), result in zip(harvested, results):
+            if result["success"]:
+                imported[idx] = self.import_transmuted(obj, result["result"])
+            else:
+                self.save_transmute_errors(obj, result["errors"])
+
+        return imported
+
+    def import_transmuted(
+        self, harvest_object: Any, data: dict[str, Any]
+    ) -> bool | str:
+        """Import transmuted content of the harvest object.
+
+        By default, the package is created or updated by
+        `_create_or_update_package` of the `HarvesterBase` from
+        ckanext-harvest, with `data` in the form of `package_show` output.
+        Override this method if the harvester does not extend `HarvesterBase`
+        or imports content differently.
+
+        Args:
+            harvest_object: processed harvest object
+            data: transmuted content of the object
+
+        Raises:
+            NotImplementedError: harvester does not extend `HarvesterBase`
+
+        Returns:
+            result of the import stage
+        """
+        create_or_update = getattr(self, "_create_or_update_package", None)
+        if create_or_update is None:
+            raise NotImplementedError(
+                "import_transmuted must be implemented by harvesters"
+                " that do not extend HarvesterBase"
+            )
+
+        return create_or_update(data, harvest_object, "package_show")
+
+    def import_deleted(self, harvest_object: Any) -> bool | str:
+        """Delete the package of the harvest object that reports deletion.
+
+        By default, the package is deleted via `package_delete` on behalf of
+        the harvest user of `HarvesterBase`. Override this method if the
+        harvester does not extend `HarvesterBase` or handles deletions
+        differently.
+
+        Args:
+            harvest_object: object without content or with `deleted` status
+
+        Returns:
+            result of the import stage
+        """
+        if not harvest_object.package_id:
+            return True
+
+        context = {"user": self._get_user_name()}  # type: ignore
+        tk.get_action("package_delete")(context, {"id": harvest_object.package_id})
+        log.info(
+            "Deleted package %s of harvest object %s",
+            harvest_object.package_id,
+            harvest_object.id,
+        )
+        return True
+
+    def transmute_objects(
+        self, harvest_objects: Iterable[Any]
+    ) -> list[TransmuteResult]:
+        """Transmute content of multiple harvest objects.
+
+        Objects of the same harvest source are transmuted together. When
+        schema is not configured for the source, content of its objects is
+        returned unchanged.
+
+        Args:
+            harvest_objects: objects with harvested content
+
+        Returns:
+            result of transmutation for every object, in the same order
+        """
+        objects = list(harvest_objects)
+        results: list[TransmuteResult] = [
+            {"success": True, "result": None, "errors": {}} for _obj in objects
+        ]
+        groups: dict[str, list[tuple[int, dict[str, Any]]]] = {}
+
+        for idx, obj in enumerate(objects):
+            try:
+                data = self.load_transmute_data(obj)
+            except ValueError as e:
+                results[idx] = _failure(f"Content cannot be loaded: {e}")
+                continue
+
+            groups.setdefault(obj.harvest_source_id, []).append((idx, data))
+
+        for items in groups.values():
+            try:
+                plan = self.get_transmute_plan(objects[items[0][0]])
+            except (
+                SchemaFieldError,
+                SchemaParsingError,
+                TransmutatorError,
+                UnknownTransmutator,
+            ) as e:
+                for idx, _data in items:
+                    results[idx] = _failure(e.error)
+                continue
+
+            if plan is None:
+                for idx, data in items:
+                    results[idx]["result"] = data
+                continue
+
+            definition, root = plan
+            records = [data for _idx, data in items]
+            batch = transmute_many(
+                records, definition, root, self.transmute_collect_errors
+            )
+            for (idx, _data), result in zip(items, batch):
+                results[idx] = result
+
+        return results
+
+    def load_transmute_data(self, harvest_object: Any) -> dict[str, Any]:
+        """Return data of the harvest object that is transmuted.
+
+        By default, content of the object is parsed as JSON object.
+
+        Raises:
+            ValueError: content cannot be loaded
+        """
+        data = json.loads(harvest_object.content or "")
+        if not isinstance(data, dict):
+            raise ValueError("content is not a JSON object")
+
+        return data
+
+    def get_transmute_plan(
+        self, harvest_object: Any
+    ) -> tuple[CompiledSchema, str] | None:
+        """Return execution plan and root type for the harvest source.
+
+        Args:
+            harvest_object: any object of the harvest source
+
+        Raises:
+            TransmutatorError: schema does not exist
+            SchemaParsingError: schema is not valid
+
+        Returns:
+            plan and root type or None if schema is not configured
+        """
+        config = _source_config(harvest_object)
+        name = config.get(CONFIG_SCHEMA) or self.transmute_schema
+        if not name:
+            return None
+
+        if not isinstance(name, str) or get_schema(name) is None:
+            raise TransmutatorError(f"Transmutation schema {name} does not exist")
+
+        definition = get_parser(name).compile()
+        root = config.get(CONFIG_ROOT) or self.transmute_root or definition.root_type
+        return definition, root
+
+    def save_transmute_errors(self, harvest_object: Any, errors: dict[str, Any]):
+        """Save errors of transmutation as import errors of the object.
+
+        Errors are saved by `_save_object_error` of the `HarvesterBase`.
+        """
+        for key, messages in errors.items():
+            if isinstance(messages, list):
+                messages = "; ".join(map(str, messages))
+
+            self._save_object_error(  # type: ignore
+                f"{key}: {messages}", harvest_object, "Import"
+            )
+
+
+def is_deleted(harvest_object: Any) -> bool:
+    """Check whether the harvest object reports deletion of the package."""
+    return (
+        getattr(harvest_object, "report_status", None) == "deleted"
+        or harvest_object.content is None
+    )
+
+
+def _failure(message: str) -> TransmuteResult:
+    return {"success": False, "result": None, "errors": {"message": [message]}}
+
+
+def _source_config(harvest_object: Any) -> dict[str, Any]:
+    """Parse config of the harvest source that produced the object."""
+    source = getattr(harvest_object, "source", None) or harvest_object.job.source
+    try:
+        config = json.loads(source.config or "{}")
+    except ValueError:
+        return {}
+
+    return config if isinstance(config, dict) else {}
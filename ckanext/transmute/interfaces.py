@@ -20,6 +20,11 @@ class ITransmute(Interface):
                 }
             ```
 
+            Transmutators can be decorated with
+            `ckanext.transmute.utils.transmutator` to provide additional
+            metadata, like purity of the function. Transmutators that wait
+            for I/O can be defined as `async def`.
+
         Returns:
             Mapping with transmutaion functions.
         """
@@ -54,3 +59,94 @@ class ITransmute(Interface):
             Mapping with definitions of named schemas.
         """
         return {}
+
+
+class ITransmuteObserver(Interface):
+    """Receive notifications about the progress of transmutation.
+
+    Observers are called synchronously, from the thread that performs
+    transmutation, so they must be fast and thread-safe. When there are no
+    observers, transmutation is not instrumented at all.
+
+    Example:
+        ```python
+        class MetricsPlugin(p.SingletonPlugin):
+            p.implements(ITransmuteObserver, inherit=True)
+
+            def validation_failed(self, type, field, validator, error):
+                failures.labels(validator).inc()
+        ```
+    """
+
+    def transmutation_started(self, root: str, data: dict[str, Any]) -> None:
+        """Transmutation of the record started.
+
+        Args:
+            root: root type of the schema
+            data: record before transmutation
+        """
+
+    def transmutation_finished(
+        self,
+        root: str,
+        data: dict[str, Any],
+        duration: float,
+        errors: dict[str, Any] | None,
+    ) -> None:
+        """Transmutation of the record finished.
+
+        Args:
+            root: root type of the schema
+            data: record after transmutation
+            duration: wall time of transmutation in seconds
+            errors: details of failure or `None` if record was transmuted
+        """
+
+    def field_processed(
+        self, type: str, field: str, duration: float, hit: bool
+    ) -> None:
+        """Field of the schema was processed.
+
+        Args:
+            type: name of the schema type
+            field: name of the field
+            duration: wall time spent on the field in seconds, including
+                nested types
+            hit: field was present in the record
+        """
+
+    def validator_invoked(
+        self, type: str, field: str, validator: str, duration: float
+    ) -> None:
+        """Transmutator was applied to the field.
+
+        When the result of the pure chain is taken from memo, every
+        transmutator of the chain is reported with zero duration.
+
+        Args:
+            type: name of the schema type
+            field: name of the field
+            validator: name of the transmutator function
+            duration: wall time of the call in seconds
+        """
+
+    def validation_failed(
+        self, type: str, field: str, validator: str, error: str
+    ) -> None:
+        """Transmutator rejected the value of the field.
+
+        Args:
+            type: name of the schema type
+            field: name of the field
+            validator: name of the transmutator function
+            error: error message
+        """
+
+    def stopped_on_error(self, type: str, field: str, validator: str) -> None:
+        """Transmutator stopped the chain of the field.
+
+        Args:
+            type: name of the schema type
+            field: name of the field
+            validator: name of the transmutator function
+        """
@@ -1,26 +1,67 @@
 from __future__ import annotations
 
+import asyncio
+import concurrent.futures
+import contextlib
 import contextvars
+import copy
+import functools
+import inspect
 import logging
-from typing import Any
+import time
+from typing import Any, Callable, Iterable, Iterator
 
 import ckan.lib.navl.dictization_functions as df
 import ckan.plugins.toolkit as tk
 from ckan import types
 from ckan.logic import ValidationError, validate
 
+from ckanext.transmute import columnar, stats
+from ckanext.transmute.errors import ErrorCollector, collecting_errors, errors_ctx
 from ckanext.transmute.exception import TransmutatorError
-from ckanext.transmute.schema import SchemaField, SchemaParser, transmute_schema
-from ckanext.transmute.types import MODE_COMBINE, Field
-from ckanext.transmute.utils import SENTINEL, get_schema, get_transmutator
+from ckanext.transmute.profile import profile_ctx, profiling
+from ckanext.transmute.schema import (
+    SECTIONS,
+    BoundValidator,
+    CompiledField,
+    CompiledSchema,
+    SchemaParser,
+    get_parser,
+    transmute_incremental_schema,
+    transmute_many_schema,
+    transmute_schema,
+    type_refs,
+    validate_schema,
+)
+from ckanext.transmute.types import (
+    MODE_COMBINE,
+    Field,
+    TransmuteResult,
+    ValidationResult,
+)
+from ckanext.transmute.utils import SENTINEL, cache_ctx, get_observers, memo_cache
 
 log = logging.getLogger(__name__)
 data_ctx = contextvars.ContextVar("data")
+# limits number of async transmutators awaited at the same time
+limit_ctx: contextvars.ContextVar[asyncio.Semaphore | None] = contextvars.ContextVar(
+    "limit", default=None
+)
+
+CONFIG_CONCURRENCY = "ckanext.transmute.async.concurrency"
+
+# max number of released Field objects kept for reuse
+FIELD_POOL_SIZE = 64
+_field_pool: list[Field] = []
 
 
 def get_actions():
     return {
         "tsm_transmute": tsm_transmute,
+        "tsm_transmute_many": tsm_transmute_many,
+        "tsm_transmute_incremental": tsm_transmute_incremental,
+        "tsm_validate": tsm_validate,
+        "tsm_stats": tsm_stats,
     }
 
 
@@ -32,10 +73,17 @@ def tsm_transmute(context: types.Context, data_dict: dict[str, Any]) -> dict[str
     The function creates a deep copy of the data and performs all modifications
     on the copy.
 
+    When `tsm_profile` flag is set in the context, time spent on every
+    type, field and transmutator is stored in the context under
+    `tsm_profile_report` key.
+
     Args:
         data (dict[str, Any]): A data dict to transmute
         schema (dict[str, Any]): schema to transmute data
         root (str): a root schema type
+        collect_errors (bool): report all invalid fields instead of the first
+            one. Errors are keyed by the path of the field, e.g.
+            `Dataset.resources[3].format`
 
     Returns:
         Transmuted data
@@ -46,22 +94,676 @@ def tsm_transmute(context: types.Context, data_dict: dict[str, Any]) -> dict[str
     data = data_dict["data"]
     data_ctx.set(data)
 
-    schema: dict[str, Any] | str = data_dict["schema"]
-    if isinstance(schema, str):
-        schema = get_schema(schema) or {}
-
-    definition = SchemaParser(schema)
-    _transmute_data(data, definition, data_dict["root"])
+    definition = get_parser(data_dict["schema"]).compile()
+    root = data_dict["root"]
+    with profiling(context), transmutation_scope([data], definition, root):  # type: ignore
+        _observe_transmutation(data, definition, root, data_dict["collect_errors"])
 
     return data
 
 
+@tk.side_effect_free
+def tsm_transmute_many(
+    context: types.Context, data_dict: dict[str, Any]
+) -> list[TransmuteResult]:
+    """Transmute a batch of data dicts using the same schema.
+
+    Schema is parsed once for the whole batch. Failure of the individual item
+    does not affect other items: its errors are reported in the corresponding
+    element of the result.
+
+    When every transmutator of the root type has a batch implementation,
+    items are transmuted column by column. Large batches of flat records are
+    transmuted by the columnar engine, if `pyarrow` is installed and every
+    transmutator has a vectorized implementation.
+
+    Args:
+        data (list[dict[str, Any]]): data dicts to transmute
+        schema (dict[str, Any]): schema to transmute data
+        root (str): a root schema type
+        collect_errors (bool): report all invalid fields of the item instead
+            of the first one
+
+    Returns:
+        List of results in the same order as items in `data`. Every result
+        contains `success` flag and either transmuted data under `result`
+        key or details of failure under `errors` key.
+
+    """
+    tk.check_access("tsm_transmute_many", context, data_dict)
+
+    records = data_dict.get("data")
+    if not isinstance(records, list) or not all(
+        isinstance(record, dict)
+        for record in records  # type: ignore
+    ):
+        raise ValidationError({"data": [tk._("Must be a list of dictionaries")]})
+
+    params, errors = tk.navl_validate(
+        {k: v for k, v in data_dict.items() if k != "data"},
+        transmute_many_schema(),
+        context,
+    )
+    if errors:
+        raise ValidationError(errors)
+
+    definition = get_parser(params["schema"]).compile()
+    with profiling(context):  # type: ignore
+        return transmute_many(
+            records, definition, params["root"], params["collect_errors"]
+        )
+
+
+@tk.side_effect_free
+@validate(transmute_incremental_schema)
+def tsm_transmute_incremental(
+    context: types.Context, data_dict: dict[str, Any]
+) -> dict[str, Any]:
+    """Transmute modified data, reusing the result of the previous version.
+
+    Only fields that depend on the changed keys of the data, directly or via
+    other fields, are processed. Dependencies are defined by the field name,
+    `default_from`, `replace_from` and fields referenced by arguments of
+    transmutators, e.g. `$title` in `tsm_concat`. Values of other fields are
+    taken from the previous result without copying.
+
+    Args:
+        data (dict[str, Any]): new version of the data
+        previous (dict[str, Any]): result of transmutation of the previous
+            version of the data, produced by the same schema
+        changed (list[str]): top-level keys of the data that were modified
+        previous_data (dict[str, Any]): previous version of the data. It's
+            used to detect modified keys when `changed` is not provided
+        schema (dict[str, Any]): schema to transmute data
+        root (str): a root schema type
+
+    Returns:
+        Transmuted data
+
+    """
+    tk.check_access("tsm_transmute_incremental", context, data_dict)
+
+    if "changed" in data_dict:
+        changed = set(data_dict["changed"])
+    elif "previous_data" in data_dict:
+        changed = changed_keys(data_dict["previous_data"], data_dict["data"])
+    else:
+        raise ValidationError(
+            {"changed": [tk._("Either changed or previous_data must be provided")]}
+        )
+
+    definition = get_parser(data_dict["schema"]).compile()
+    with profiling(context):  # type: ignore
+        return transmute_incremental(
+            data_dict["data"],
+            data_dict["previous"],
+            changed,
+            definition,
+            data_dict["root"],
+        )
+
+
+@tk.side_effect_free
+@validate(validate_schema)
+def tsm_validate(context: types.Context, data_dict: dict[str, Any]) -> ValidationResult:
+    """Check whether data passes the schema without transmuting it.
+
+    Transmutators are applied to a deep copy of the data, so the data is not
+    modified even by transmutators that change values in place. Static
+    values, removals and renames are applied to the copy in the same way as
+    during transmutation, so validators see the same values, but the
+    transmuted record is not returned.
+
+    Args:
+        data (dict[str, Any]): A data dict to validate
+        schema (dict[str, Any]): schema to validate data
+        root (str): a root schema type
+        collect_errors (bool): report all invalid fields instead of the first
+            one
+
+    Returns:
+        `success` flag and details of failure under `errors` key
+
+    """
+    tk.check_access("tsm_validate", context, data_dict)
+
+    definition = get_parser(data_dict["schema"]).compile()
+    with profiling(context):  # type: ignore
+        return validate_record(
+            data_dict["data"],
+            definition,
+            data_dict["root"],
+            data_dict["collect_errors"],
+        )
+
+
+@tk.side_effect_free
+def tsm_stats(context: types.Context, data_dict: dict[str, Any]) -> dict[str, Any]:
+    """Metrics of transmutations performed by the current process.
+
+    Metrics are collected only when `ckanext.transmute.stats` config option
+    is enabled.
+
+    Returns:
+        Number of transmutations, their throughput, error rate and latency,
+        hit rate and processing time of every field, latency and number of
+        errors of every transmutator.
+
+    """
+    tk.check_access("tsm_stats", context, data_dict)
+
+    if stats.collector not in get_observers():
+        raise tk.ObjectNotFound("Statistics of transmutations are not collected")
+
+    return stats.collector.snapshot()
+
+
+def iter_transmute(
+    records: Iterable[dict[str, Any]],
+    definition: CompiledSchema,
+    root: str,
+    collect_errors: bool = False,
+) -> Iterator[TransmuteResult]:
+    """Lazily transmute every record using the same execution plan.
+
+    Records are modified in place. Errors are captured per record and do
+    not stop processing of the remaining records.
+
+    Args:
+        records: data dicts to transmute
+        definition: execution plan of the schema
+        root: a root schema type
+        collect_errors: report all invalid fields of the record
+
+    Yields:
+        result of transmutation for every record
+    """
+    for data in records:
+        yield transmute_record(data, definition, root, collect_errors)
+
+
+def transmute_many(
+    records: list[dict[str, Any]],
+    definition: CompiledSchema,
+    root: str,
+    collect_errors: bool = False,
+) -> list[TransmuteResult]:
+    """Transmute a batch of records in place using the same execution plan.
+
+    Records are transmuted by the columnar engine or column by column when
+    schema allows it, and one by one otherwise. Values of all records are
+    prefetched at once.
+
+    Args:
+        records: data dicts to transmute
+        definition: execution plan of the schema
+        root: a root schema type
+        collect_errors: report all invalid fields of the record
+
+    Returns:
+        result of transmutation for every record
+    """
+    with transmutation_scope(records, definition, root):
+        if not collect_errors and (
+            _transmute_vectors(records, definition, root)
+            or _transmute_columns(records, definition, root)
+        ):
+            return [{"success": True, "result": data, "errors": {}} for data in records]
+
+        return list(iter_transmute(records, definition, root, collect_errors))
+
+
+def transmute_record(
+    data: dict[str, Any],
+    definition: CompiledSchema,
+    root: str,
+    collect_errors: bool = False,
+) -> TransmuteResult:
+    """Transmute a single record in place, capturing transmutation errors.
+
+    Unexpected exceptions raised by transmutators are logged and reported as
+    errors of the record, so that one broken record does not stop the batch.
+
+    Args:
+        data: a data dict to transmute
+        definition: execution plan of the schema
+        root: a root schema type
+        collect_errors: report all invalid fields instead of the first one
+
+    Returns:
+        result of transmutation
+    """
+    data_ctx.set(data)
+    try:
+        with transmutation_scope([data], definition, root):
+            _observe_transmutation(data, definition, root, collect_errors)
+    except ValidationError as e:
+        return {"success": False, "result": None, "errors": e.error_dict}
+    except TransmutatorError as e:
+        return {"success": False, "result": None, "errors": {"message": [e.error]}}
+    except Exception as e:
+        log.exception("Record cannot be transmuted")
+        message = f"{type(e).__name__}: {e}"
+        return {"success": False, "result": None, "errors": {"message": [message]}}
+
+    return {"success": True, "result": data, "errors": {}}
+
+
+def transmute_table(
+    records: list[dict[str, Any]], definition: CompiledSchema, root: str
+) -> Any:
+    """Transmute flat records into Arrow table.
+
+    Records are transmuted by the columnar engine when schema and values
+    allow it. Otherwise, copies of the records are transmuted one by one.
+
+    Args:
+        records: data dicts to transmute
+        definition: execution plan of the schema
+        root: a root schema type
+
+    Raises:
+        TransmutatorError: pyarrow is not installed
+        ValidationError: some of records are invalid. Errors are keyed by
+            the index of the record
+
+    Returns:
+        pyarrow.Table with transmuted records
+    """
+    if not columnar.is_available():
+        raise TransmutatorError("Arrow tables require pyarrow")
+
+    schema = definition.types[root]
+    if not _is_instrumented():
+        try:
+            columns = columnar.transmute(records, schema)
+        except Exception:
+            log.debug("Records of %s are transmuted one by one", root)
+        else:
+            return columnar.to_table(records, columns)
+
+    records = copy.deepcopy(records)
+    with transmutation_scope(records, definition, root):
+        errors = {
+            str(idx): result["errors"]
+            for idx, result in enumerate(iter_transmute(records, definition, root))
+            if not result["success"]
+        }
+    if errors:
+        raise ValidationError(errors)
+
+    return columnar.to_table(records, {})
+
+
+def validate_record(
+    data: dict[str, Any],
+    definition: CompiledSchema,
+    root: str,
+    collect_errors: bool = False,
+) -> ValidationResult:
+    """Apply transmutators to the deep copy of the record.
+
+    Args:
+        data: a data dict to validate
+        definition: execution plan of the schema
+        root: a root schema type
+        collect_errors: report all invalid fields instead of the first one
+
+    Returns:
+        result of validation
+    """
+    # transmutators may modify values in place, e.g. append items to lists
+    view = copy.deepcopy(data)
+    data_ctx.set(view)
+    try:
+        with transmutation_scope([view], definition, root):
+            if collect_errors:
+                with collecting_errors(root):
+                    _check_fields(view, definition, root)
+            else:
+                _check_fields(view, definition, root)
+
+    except ValidationError as e:
+        return {"success": False, "errors": e.error_dict}
+    except TransmutatorError as e:
+        return {"success": False, "errors": {"message": [e.error]}}
+
+    return {"success": True, "errors": {}}
+
+
+def _check_fields(data: dict[str, Any], definition: CompiledSchema, root: str):
+    process = _check_field
+    collector = errors_ctx.get()
+    if collector is not None:
+        process = functools.partial(_collect_field, collector, process)
+
+    schema = definition.types[root]
+    for field in (*schema.pre_fields, *schema.fields, *schema.post_fields):
+        process(field, data, definition)
+
+
+def _check_field(
+    field: CompiledField, data: dict[str, Any], definition: CompiledSchema
+) -> None:
+    """Validate the field, writing results only into the copy of the data.
+
+    Static values, removals and renames are applied to the copy in the same
+    way as during transmutation, so following fields see the same data.
+    """
+    if field.remove:
+        data.pop(field.name, None)
+        return
+
+    value = _prepare_value(field, data)
+
+    if field.multiple:
+        items = value or []
+        if not _transmute_columns(items, definition, field.type):
+            collector = errors_ctx.get()
+            for idx, item in enumerate(items):
+                if collector is None:
+                    _check_fields(item, definition, field.type)
+                    continue
+
+                with collector.nested(f"{field.name}[{idx}]"):
+                    _check_fields(item, definition, field.type)
+
+    else:
+        if field.name not in data and not field.validate_missing:
+            return
+
+        data[field.name] = _validate_field(field, value, data)
+
+    if field.map:
+        data[field.map] = data.pop(field.name, None)
+
+
+def changed_keys(previous: dict[str, Any], data: dict[str, Any]) -> set[str]:
+    """Top-level keys that were added, removed or modified in the data."""
+    return {
+        key
+        for key in previous.keys() | data.keys()
+        if key not in previous or key not in data or previous[key] != data[key]
+    }
+
+
+def transmute_incremental(
+    data: dict[str, Any],
+    previous: dict[str, Any],
+    changed: Iterable[str],
+    definition: CompiledSchema,
+    root: str,
+) -> dict[str, Any]:
+    """Transmute modified data, processing only fields affected by changes.
+
+    Data is not modified: the result is a new dict that shares unchanged
+    values with the data and with the previous result.
+
+    Args:
+        data: new version of the data
+        previous: result of transmutation of the previous version
+        changed: top-level keys of the data that were modified
+        definition: execution plan of the schema
+        root: a root schema type
+
+    Returns:
+        transmuted data
+    """
+    schema = definition.types[root]
+    result = dict(data)
+    data_ctx.set(result)
+
+    instrumented = profile_ctx.get() is not None or bool(get_observers())
+    process = _observe_field if instrumented else _process_field
+    known_fields: set[str] = set()
+
+    # only affected fields are processed, so values are not prefetched
+    with transmutation_scope((), definition, root):
+        for section, field, dirty in _incremental_plan(definition, root, set(changed)):
+            if not dirty:
+                name = _replay_field(field, result, previous)
+            else:
+                # processed values are modified in place
+                if isinstance(result.get(field.name), (dict, list)):
+                    result[field.name] = copy.deepcopy(result[field.name])
+                name = process(field, result, definition)
+
+            if section == "fields" and name:
+                known_fields.add(name)
+
+    if schema.drop_unknown_fields:
+        for name in list(result):
+            if name not in known_fields:
+                del result[name]
+
+    return result
+
+
+def _incremental_plan(
+    definition: CompiledSchema, root: str, changed: set[str]
+) -> list[tuple[str, CompiledField, bool]]:
+    """Steps of the root type with a flag that shows if step must be executed.
+
+    Field is processed again when it reads any key modified by the data or
+    by the fields processed before it. The previous result contains only
+    the final value of every key, so the field whose key is overwritten by
+    the following fields is processed also when its value is used by any
+    processed field before that.
+    """
+    schema = definition.types[root]
+    steps = [
+        (section, field)
+        for section, fields in zip(
+            SECTIONS, (schema.pre_fields, schema.fields, schema.post_fields)
+        )
+        for field in fields
+    ]
+
+    cache: dict[str, set[str]] = {}
+    inputs: list[set[str]] = []
+    for _section, field in steps:
+        keys = {field.name, field.output, *field.reads, *field.refs}
+        if field.multiple:
+            keys.update(_type_refs(definition, field.type, cache))
+        inputs.append(keys)
+
+    modified = set(changed)
+    dirty: list[bool] = []
+    for (_section, field), keys in zip(steps, inputs):
+        # removal does not depend on the value and can always be replayed
+        flag = not field.remove and not modified.isdisjoint(keys)
+        if flag:
+            modified.add(field.output)
+        dirty.append(flag)
+
+    for idx in reversed(range(len(steps))):
+        if not dirty[idx] and not steps[idx][1].remove:
+            dirty[idx] = _is_used_before_overwritten(steps, inputs, dirty, idx)
+
+    return [(section, field, flag) for (section, field), flag in zip(steps, dirty)]
+
+
+def _is_used_before_overwritten(
+    steps: list[tuple[str, CompiledField]],
+    inputs: list[set[str]],
+    dirty: list[bool],
+    idx: int,
+) -> bool:
+    key = steps[idx][1].output
+    used = False
+    for pos in range(idx + 1, len(steps)):
+        field = steps[pos][1]
+        if dirty[pos] and key in inputs[pos]:
+            used = True
+
+        if field.name == key or field.map == key:
+            return used
+
+    return False
+
+
+def _type_refs(
+    definition: CompiledSchema, type: str, cache: dict[str, set[str]]
+) -> set[str]:
+    """Fields of the root record referenced by the type and its nested types."""
+
+    def fields_of(name: str) -> tuple[CompiledField, ...]:
+        schema = definition.types[name]
+        return (*schema.pre_fields, *schema.fields, *schema.post_fields)
+
+    return type_refs(type, fields_of, cache)
+
+
+def _replay_field(
+    field: CompiledField, data: dict[str, Any], previous: dict[str, Any]
+) -> str | None:
+    """Apply the result of the field from the previous transmutation."""
+    if field.remove:
+        data.pop(field.name, None)
+        return
+
+    if field.map:
+        data.pop(field.name, None)
+
+    if field.output not in previous:
+        data.pop(field.output, None)
+        return
+
+    data[field.output] = previous[field.output]
+    return field.output
+
+
+@contextlib.contextmanager
+def transmutation_scope(
+    records: Iterable[dict[str, Any]], definition: CompiledSchema, root: str
+) -> Iterator[None]:
+    """Share the storage of transmutators between records inside the block.
+
+    Values of the records are passed to prefetch implementations of
+    transmutators when the block starts, so that data required by all records
+    can be loaded at once. Storage is discarded when the block is finished.
+    Nested blocks reuse the storage and do not prefetch values.
+
+    Args:
+        records: data dicts that are transmuted inside the block
+        definition: execution plan of the schema
+        root: a root schema type
+    """
+    if cache_ctx.get() is not None:
+        yield
+        return
+
+    token = cache_ctx.set({})
+    try:
+        if root in definition.prefetch_types:
+            _prefetch(records, definition, root)
+        yield
+    finally:
+        cache_ctx.reset(token)
+
+
+def _prefetch(records: Iterable[dict[str, Any]], definition: CompiledSchema, root: str):
+    """Pass values of the fields from all records to prefetch functions.
+
+    Values of all fields that use the same prefetch function with the same
+    arguments are passed in a single call.
+    """
+    found: dict[object, tuple[CompiledField, list[Any]]] = {}
+    _collect_prefetched(list(records), definition, root, found)
+
+    calls: dict[Any, tuple[BoundValidator, list[Any]]] = {}
+    for field, values in found.values():
+        for prefetch, args in field.prefetch_validators:
+            key = (prefetch, args) if _is_hashable(args) else (prefetch, id(args))
+            calls.setdefault(key, ((prefetch, args), []))[1].extend(values)
+
+    for (prefetch, args), values in calls.values():
+        try:
+            prefetch(values, *args)
+        except Exception:
+            log.debug("Prefetch by %s failed", prefetch.__name__, exc_info=True)
+
+
+def _collect_prefetched(
+    records: list[dict[str, Any]],
+    definition: CompiledSchema,
+    root: str,
+    found: dict[object, tuple[CompiledField, list[Any]]],
+):
+    if root not in definition.prefetch_types:
+        return
+
+    schema = definition.types[root]
+    for field in (*schema.pre_fields, *schema.fields, *schema.post_fields):
+        if field.multiple:
+            items = [
+                item
+                for record in records
+                if isinstance(record.get(field.name), list)
+                for item in record[field.name]
+                if isinstance(item, dict)
+            ]
+            if items:
+                _collect_prefetched(items, definition, field.type, found)
+
+        elif field.prefetch_validators:
+            values = found.setdefault(field.token, (field, []))[1]
+            values.extend(
+                record[field.name] for record in records if field.name in record
+            )
+
+
+def _observe_transmutation(
+    data: dict[str, Any],
+    definition: CompiledSchema,
+    root: str,
+    collect_errors: bool = False,
+):
+    """Transmute the record, notifying observers about start and end."""
+    observers = get_observers()
+    if not observers:
+        _run_transmutation(data, definition, root, collect_errors)
+        return
+
+    for observer in observers:
+        observer.transmutation_started(root, data)
+
+    errors: dict[str, Any] | None = None
+    start = time.perf_counter()
+    try:
+        _run_transmutation(data, definition, root, collect_errors)
+    except ValidationError as e:
+        errors = e.error_dict
+        raise
+    except TransmutatorError as e:
+        errors = {"message": [e.error]}
+        raise
+    except Exception as e:
+        errors = {"message": [f"{type(e).__name__}: {e}"]}
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        for observer in observers:
+            observer.transmutation_finished(root, data, duration, errors)
+
+
+def _run_transmutation(
+    data: dict[str, Any], definition: CompiledSchema, root: str, collect_errors: bool
+):
+    if not collect_errors:
+        _transmute_data(data, definition, root)
+        return
+
+    with collecting_errors(root):
+        _transmute_data(data, definition, root)
+
+
 def _transmute_data(data, definition, root):
     """Mutates an actual data in `data` dict.
 
     Args:
         data (dict: [str, Any]): a data to mutate
-        definition (SchemaParser): SchemaParser object
+        definition (CompiledSchema): CompiledSchema object
         root (str): a root schema type
     """
     schema = definition.types[root]
@@ -72,59 +774,143 @@ def _transmute_data(data, definition, root):
     mutate_fields(data, definition, root)
 
 
-def _weighten_fields(field: SchemaField):
-    return field.weight
-
-
-def mutate_fields(data: dict[str, Any], definition: SchemaParser, root: str):
+def mutate_fields(
+    data: dict[str, Any],
+    definition: SchemaParser | CompiledSchema,
+    root: str,
+):
     """Checks all of the schema fields and mutate/create them according to the
     provided schema.
 
     Args:
         data (dict: [str, Any]): a data to mutate
-        definition (SchemaParser): SchemaParser object
+        definition (SchemaParser | CompiledSchema): parsed schema or its
+            execution plan
         root (str): a root schema type
 
     """
+    if isinstance(definition, SchemaParser):
+        definition = definition.compile()
+
+    if root in definition.async_types and not _is_instrumented():
+        _run_sync(amutate_fields(data, definition, root))
+        return
+
+    profiler = profile_ctx.get()
+    if profiler is None:
+        process = _observe_field if get_observers() else _process_field
+        _mutate_fields(data, definition, root, process)
+        return
+
+    start = time.perf_counter()
+    try:
+        _mutate_fields(data, definition, root, _observe_field)
+    finally:
+        profiler.record("types", root, time.perf_counter() - start)
+
+
+def _mutate_fields(
+    data: dict[str, Any],
+    definition: CompiledSchema,
+    root: str,
+    process: Callable[[CompiledField, dict[str, Any], CompiledSchema], str | None],
+):
     schema = definition.types[root]
 
+    collector = errors_ctx.get()
+    if collector is not None:
+        process = functools.partial(_collect_field, collector, process)
+
     known_fields: set[str] = set()
 
-    for field in sorted(schema["pre-fields"].values(), key=_weighten_fields):
-        _process_field(field, data, definition)
+    for field in schema.pre_fields:
+        process(field, data, definition)
 
-    for field in sorted(schema["fields"].values(), key=_weighten_fields):
-        name = _process_field(field, data, definition)
+    for field in schema.fields:
+        name = process(field, data, definition)
         if name:
             known_fields.add(name)
 
-    for field in sorted(schema["post-fields"].values(), key=_weighten_fields):
-        _process_field(field, data, definition)
+    for field in schema.post_fields:
+        process(field, data, definition)
 
-    if schema.get("drop_unknown_fields"):
+    if schema.drop_unknown_fields:
         for name in list(data):
             if name not in known_fields:
                 del data[name]
 
 
+def _collect_field(
+    collector: ErrorCollector,
+    process: Callable[[CompiledField, dict[str, Any], CompiledSchema], str | None],
+    field: CompiledField,
+    data: dict[str, Any],
+    definition: CompiledSchema,
+) -> str | None:
+    """Process the field, recording validation errors instead of raising."""
+    try:
+        return process(field, data, definition)
+    except ValidationError as e:
+        collector.add(field.name, e.error_dict)
+
+
+def _observe_field(
+    field: CompiledField, data: dict[str, Any], definition: CompiledSchema
+) -> str | None:
+    """Process the field, reporting it to the profiler and observers."""
+    hit = field.name in data
+    start = time.perf_counter()
+    try:
+        return _process_field(field, data, definition)
+    finally:
+        duration = time.perf_counter() - start
+        profiler = profile_ctx.get()
+        if profiler is not None:
+            profiler.record("fields", f"{field.type}:{field.name}", duration)
+
+        for observer in get_observers():
+            observer.field_processed(field.type, field.name, duration, hit)
+
+
 def _process_field(
-    field: SchemaField, data: dict[str, Any], definition: SchemaParser
+    field: CompiledField, data: dict[str, Any], definition: CompiledSchema
 ) -> str | None:
     if field.remove:
         data.pop(field.name, None)
         return
 
+    value = _prepare_value(field, data)
+
+    if field.multiple:
+        if not _transmute_columns(value, definition, field.type):
+            _transmute_items(value, definition, field)
+
+    else:
+        if field.name not in data and not field.validate_missing:
+            return
+
+        data[field.name] = _validate_field(field, value, data)
+
+    if field.map:
+        data[field.map] = data.pop(field.name, None)
+        return field.map
+
+    return field.name
+
+
+def _prepare_value(field: CompiledField, data: dict[str, Any]) -> Any:
+    """Apply defaults and static value of the field before validation."""
     value: Any = data.get(field.name)
 
     if field.default_from and not value:
-        data[field.name] = value = _default_from(data, field)
+        data[field.name] = value = _get_external_fields(data, field.default_from, field)
 
     if field.replace_from:
-        data[field.name] = value = _replace_from(data, field)
+        data[field.name] = value = _get_external_fields(data, field.replace_from, field)
 
     # set static default **after** attempt to get default from the other field
     if field.default is not SENTINEL and not value:
-        data[field.name] = value = field.default
+        data[field.name] = value = copy.deepcopy(field.default)
 
     if field.value is not SENTINEL:
         if field.update:
@@ -134,48 +920,168 @@ def _process_field(
                 )
 
             if isinstance(data[field.name], dict):
-                data[field.name].update(field.value)
+                data[field.name].update(copy.deepcopy(field.value))
             elif isinstance(data[field.name], list):
-                data[field.name].extend(field.value)
+                data[field.name].extend(copy.deepcopy(field.value))
             else:
                 raise ValidationError({field.name: ["Field value is not mutable"]})
         else:
-            data[field.name] = value = field.value
+            data[field.name] = value = copy.deepcopy(field.value)
+
+    return value
 
 
-    if field.is_multiple():
-        for nested_field in value or []:  # type: ignore
+def _transmute_items(items: Any, definition: CompiledSchema, field: CompiledField):
+    """Transmute items of the `multiple` field one by one."""
+    collector = errors_ctx.get()
+    for idx, nested_field in enumerate(items or []):  # type: ignore
+        if collector is None:
             _transmute_data(nested_field, definition, field.type)
+            continue
 
-    else:
-        if field.name not in data and not field.validate_missing:
-            return
+        with collector.nested(f"{field.name}[{idx}]"):
+            _transmute_data(nested_field, definition, field.type)
 
-        data[field.name] = _apply_validators(
-            Field(field.name, value, field.type, data_ctx.get()), field.validators
-        )
 
-    if field.map:
-        data[field.map] = data.pop(field.name, None)
-        return field.map
+def _transmute_columns(items: Any, definition: CompiledSchema, root: str) -> bool:
+    """Transmute multiple records of the same type column by column.
 
-    return field.name
+    Every field is processed for all records at once, using batch
+    implementations of transmutators. The records are transmuted only if all
+    of them are valid. Otherwise, records are restored and must be
+    processed one by one, which reports errors exactly as usual.
 
+    Instrumented transmutations and transmutations that collect all errors
+    are never processed column by column.
 
-def _default_from(data: dict[str, Any], field: SchemaField):
-    default_from: list[str] | str = field.get_default_from()
-    return _get_external_fields(data, default_from, field)
+    Args:
+        items: records to transmute
+        definition: execution plan of the schema
+        root: type of the records
 
+    Returns:
+        True if records were transmuted
+    """
+    schema = definition.types[root]
+    if (
+        not isinstance(items, list)
+        or len(items) < 2
+        or not schema.columnar
+        or not all(isinstance(item, dict) for item in items)
+        or _is_instrumented()
+    ):
+        return False
+
+    # batch transmutators return new values instead of modifying existing
+    # ones, so shallow copies are enough to restore records
+    backup = [dict(item) for item in items]
+    try:
+        known: list[set[str]] = [set() for _ in items]
+        for field in schema.pre_fields:
+            _process_column(field, items, None)
+
+        for field in schema.fields:
+            _process_column(field, items, known)
+
+        for field in schema.post_fields:
+            _process_column(field, items, None)
+
+    except Exception:
+        for item, original in zip(items, backup):
+            item.clear()
+            item.update(original)
+        return False
+
+    if schema.drop_unknown_fields:
+        for item, names in zip(items, known):
+            for name in list(item):
+                if name not in names:
+                    del item[name]
+
+    return True
+
+
+def _transmute_vectors(
+    records: list[dict[str, Any]], definition: CompiledSchema, root: str
+) -> bool:
+    """Transmute flat records using the columnar engine.
+
+    Records are modified only if all of them are valid and their values can
+    be converted into Arrow arrays without losses.
+
+    Returns:
+        True if records were transmuted
+    """
+    schema = definition.types[root]
+    if (
+        not columnar.is_available()
+        or len(records) < max(columnar.min_records(), 2)
+        or not schema.vectorized
+        or _is_instrumented()
+    ):
+        return False
+
+    try:
+        columns = columnar.transmute(records, schema)
+    except Exception:
+        return False
+
+    columnar.to_records(records, columns)
+    return True
+
+
+def _is_instrumented() -> bool:
+    """Transmutation is profiled, observed or collects errors."""
+    return (
+        profile_ctx.get() is not None
+        or errors_ctx.get() is not None
+        or bool(get_observers())
+    )
+
+
+def _process_column(
+    field: CompiledField,
+    items: list[dict[str, Any]],
+    known: list[set[str]] | None,
+):
+    if field.remove:
+        for item in items:
+            item.pop(field.name, None)
+        return
 
-def _replace_from(data: dict[str, Any], field: SchemaField):
-    replace_from: list[str] | str = field.get_replace_from()
-    return _get_external_fields(data, replace_from, field)
+    selected: list[int] = []
+    values: list[Any] = []
+    for idx, item in enumerate(items):
+        value = item.get(field.name)
+        if field.default is not SENTINEL and not value:
+            item[field.name] = value = copy.deepcopy(field.default)
+
+        if field.value is not SENTINEL:
+            item[field.name] = value = copy.deepcopy(field.value)
+
+        if field.name in item or field.validate_missing:
+            selected.append(idx)
+            values.append(value)
+
+    for batch, args in field.batch_validators or ():
+        values = batch(values, *args)
+        if len(values) != len(selected):
+            raise TransmutatorError("Batch transmutator changed number of values")
+
+    for idx, value in zip(selected, values):
+        item = items[idx]
+        item[field.name] = value
+        if field.map:
+            item[field.map] = item.pop(field.name, None)
+
+        if known is not None:
+            known[idx].add(field.output)
 
 
 def _get_external_fields(
-    data: dict[str, Any], external_fields: Any, field: SchemaField
+    data: dict[str, Any], external_fields: tuple[str, ...] | str, field: CompiledField
 ):
-    if isinstance(external_fields, list):
+    if isinstance(external_fields, tuple):
         if field.inherit_mode == MODE_COMBINE:
             return _combine_from_fields(data, external_fields)
         else:
@@ -183,7 +1089,7 @@ def _get_external_fields(
     return data[external_fields]
 
 
-def _combine_from_fields(data: dict[str, Any], external_fields: list[str]):
+def _combine_from_fields(data: dict[str, Any], external_fields: tuple[str, ...]):
     value: list[Any] = []
 
     for field_name in external_fields:
@@ -198,7 +1104,7 @@ def _combine_from_fields(data: dict[str, Any], external_fields: list[str]):
     return value
 
 
-def _get_first_filled(data: dict[str, Any], external_fields: list[str]):
+def _get_first_filled(data: dict[str, Any], external_fields: tuple[str, ...]):
     """Return first not-empty field value."""
     for field_name in external_fields:
         field_value = data[field_name]
@@ -207,14 +1113,91 @@ def _get_first_filled(data: dict[str, Any], external_fields: list[str]):
             return field_value
 
 
-def _apply_validators(field: Field, validators: list[str | list[str]]):
+def _validate_field(field: CompiledField, value: Any, data: dict[str, Any]) -> Any:
+    """Apply validators of the field, reusing memoized results when possible."""
+    key, result = _memo_lookup(field, value)
+    if result is SENTINEL:
+        result = _memo_store(key, _run_validators(field, value, data))
+
+    return result
+
+
+def _memo_lookup(field: CompiledField, value: Any) -> tuple[Any, Any]:
+    """Return memo key of the value and the memoized result of the chain.
+
+    Key is `None` when the result cannot be memoized. Result is `SENTINEL`
+    when it's not memoized yet.
+    """
+    if not field.pure or not memo_cache.maxsize:
+        return None, SENTINEL
+
+    key = (field.token, type(value), value)
+    try:
+        result = memo_cache.get(key, SENTINEL)
+    except TypeError:
+        # unhashable values cannot be memoized
+        return None, SENTINEL
+
+    if result is not SENTINEL:
+        _observe_memo_hit(field)
+
+    return key, result
+
+
+def _memo_store(key: Any, result: Any) -> Any:
+    """Memoize the result of the chain if possible and return it."""
+    if key is not None and _is_hashable(result):
+        memo_cache.set(key, result)
+
+    return result
+
+
+def _observe_memo_hit(field: CompiledField):
+    """Report validators of the chain served from memo with zero duration."""
+    for observer in get_observers():
+        for validator, _args in field.validators:
+            observer.validator_invoked(field.type, field.name, validator.__name__, 0.0)
+
+
+def _run_validators(field: CompiledField, value: Any, data: dict[str, Any]) -> Any:
+    """Apply validators to the value, using Field object from the pool."""
+    try:
+        holder = _field_pool.pop()
+    except IndexError:
+        holder = Field(field.name, value, field.type, data_ctx.get(data))
+    else:
+        holder.field_name = field.name
+        holder.value = value
+        holder.type = field.type
+        holder.data = data_ctx.get(data)
+
+    try:
+        if field.is_async:
+            return _run_sync(_aapply_validators(holder, field.validators))
+        return _apply_validators(holder, field.validators)
+    finally:
+        # do not keep processed data alive while the object is in the pool
+        holder.value = holder.data = None  # type: ignore
+        if len(_field_pool) < FIELD_POOL_SIZE:
+            _field_pool.append(holder)
+
+
+def _is_hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _apply_validators(field: Field, validators: tuple[BoundValidator, ...]):
     """Applies validators sequentially to the field value.
 
     Args:
         field (Field): Field object
-        validators (list[Callable[[Field], Any]]): a list of
-            validators functions. Validator could just validate data
-            or mutate it.
+        validators (tuple[BoundValidator, ...]): a sequence of
+            transmutation functions with their arguments. Validator could
+            just validate data or mutate it.
 
     Raises:
         ValidationError: raises a validation error
@@ -223,18 +1206,284 @@ def _apply_validators(field: Field, validators: list[str | list[str]]):
         Field.value: the value that passed through
             the validators sequence. Could be changed.
     """
+    profiler = profile_ctx.get()
+    observers = get_observers()
+    observed = profiler is not None or bool(observers)
+    validator: Any = None
+
     try:
-        for validator in validators:
-            if isinstance(validator, list):
-                if len(validator) <= 1:
-                    raise TransmutatorError("Arguments for validator weren't provided")
-                field = get_transmutator(validator[0])(field, *validator[1:])
+        for validator, args in validators:
+            if not observed:
+                field = validator(field, *args)
+                continue
+
+            start = time.perf_counter()
+            try:
+                field = validator(field, *args)
+            finally:
+                duration = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.record("transmutators", validator.__name__, duration)
+                for observer in observers:
+                    observer.validator_invoked(
+                        field.type, field.field_name, validator.__name__, duration
+                    )
+
+    except df.StopOnError:
+        return _stopped(field, validator)
+    except df.Invalid as e:
+        raise _invalid(field, validator, e)
+    except TypeError as e:
+        raise TransmutatorError(str(e))
+
+    return field.value
+
+
+def _stopped(field: Field, validator: Callable[..., Any]) -> Any:
+    """Report the chain stopped by the validator and return the value."""
+    for observer in get_observers():
+        observer.stopped_on_error(field.type, field.field_name, validator.__name__)
+
+    return field.value
+
+
+def _invalid(
+    field: Field, validator: Callable[..., Any], error: df.Invalid
+) -> ValidationError:
+    """Report the value rejected by the validator and build the error."""
+    for observer in get_observers():
+        observer.validation_failed(
+            field.type, field.field_name, validator.__name__, error.error
+        )
+
+    return ValidationError({f"{field.type}:{field.field_name}": [error.error]})
+
+
+async def amutate_fields(
+    data: dict[str, Any],
+    definition: SchemaParser | CompiledSchema,
+    root: str,
+):
+    """Async variant of `mutate_fields`.
+
+    Async transmutators of independent fields and of the items of `multiple`
+    fields are awaited concurrently. Field waits for the pending fields that
+    write keys it uses or use keys it writes. Number of transmutators awaited
+    at the same time is limited by `ckanext.transmute.async.concurrency`.
+
+    Errors are raised in the same order as by `mutate_fields`, but fields that
+    follow the invalid field may be already processed when error is raised.
+
+    Args:
+        data (dict: [str, Any]): a data to mutate
+        definition (SchemaParser | CompiledSchema): parsed schema or its
+            execution plan
+        root (str): a root schema type
+
+    """
+    if isinstance(definition, SchemaParser):
+        definition = definition.compile()
+
+    if limit_ctx.get() is not None:
+        await _amutate_fields(data, definition, root)
+        return
+
+    limit = max(tk.asint(tk.config.get(CONFIG_CONCURRENCY, 10)), 1)
+    token = limit_ctx.set(asyncio.Semaphore(limit))
+    try:
+        await _amutate_fields(data, definition, root)
+    finally:
+        limit_ctx.reset(token)
+
+
+def _run_sync(coro: Any) -> Any:
+    """Run coroutine from the sync code and return its result."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # event loop of the current thread is busy, so the coroutine is executed
+    # by the new loop in a separate thread
+    ctx = contextvars.copy_context()
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        return executor.submit(ctx.run, asyncio.run, coro).result()
+
+
+async def _amutate_fields(data: dict[str, Any], definition: CompiledSchema, root: str):
+    schema = definition.types[root]
+    if not schema:
+        return
+
+    known_fields: set[str] = set()
+    refs: dict[str, set[str]] = {}
+
+    await _aprocess_fields(schema.pre_fields, data, definition, refs)
+
+    for name in await _aprocess_fields(schema.fields, data, definition, refs):
+        if name:
+            known_fields.add(name)
+
+    await _aprocess_fields(schema.post_fields, data, definition, refs)
+
+    if schema.drop_unknown_fields:
+        for name in list(data):
+            if name not in known_fields:
+                del data[name]
+
+
+async def _aprocess_fields(
+    fields: tuple[CompiledField, ...],
+    data: dict[str, Any],
+    definition: CompiledSchema,
+    refs: dict[str, set[str]],
+) -> list[str | None]:
+    """Process fields, awaiting independent async fields concurrently.
+
+    Returns:
+        names of the keys produced by every field
+    """
+    names: list[str | None] = []
+    pending: list[tuple[int, asyncio.Future[str | None]]] = []
+    writes: set[str] = set()
+    reads: set[str] = set()
+
+    try:
+        for field in fields:
+            outputs = {field.name, field.output}
+            inputs = {*outputs, *field.reads, *field.refs}
+            if field.multiple:
+                inputs.update(_type_refs(definition, field.type, refs))
+
+            if pending and (
+                not writes.isdisjoint(inputs) or not reads.isdisjoint(outputs)
+            ):
+                await _gather_fields(pending, names)
+                writes.clear()
+                reads.clear()
+
+            names.append(None)
+            if not _is_async_field(field, definition):
+                try:
+                    names[-1] = _process_field(field, data, definition)
+                except Exception:
+                    # errors of the previous fields are raised first
+                    await _gather_fields(pending, names)
+                    raise
+                continue
+
+            task = asyncio.ensure_future(_aprocess_field(field, data, definition))
+            pending.append((len(names) - 1, task))
+            writes.update(outputs)
+            reads.update(inputs)
+
+        await _gather_fields(pending, names)
+
+    finally:
+        for _idx, task in pending:
+            task.cancel()
+
+    return names
+
+
+async def _gather_fields(
+    pending: list[tuple[int, asyncio.Future[str | None]]], names: list[str | None]
+):
+    """Wait for pending fields and raise the error of the first invalid field."""
+    results = await asyncio.gather(
+        *(task for _idx, task in pending), return_exceptions=True
+    )
+    try:
+        for (idx, _task), result in zip(pending, results):
+            if isinstance(result, BaseException):
+                raise result
+            names[idx] = result
+    finally:
+        pending.clear()
+
+
+def _is_async_field(field: CompiledField, definition: CompiledSchema) -> bool:
+    if field.multiple:
+        return field.type in definition.async_types
+    return field.is_async
+
+
+async def _aprocess_field(
+    field: CompiledField, data: dict[str, Any], definition: CompiledSchema
+) -> str | None:
+    value = _prepare_value(field, data)
+
+    if field.multiple:
+        await _atransmute_items(value, definition, field.type)
+
+    else:
+        if field.name not in data and not field.validate_missing:
+            return
+
+        data[field.name] = await _avalidate_field(field, value, data)
+
+    if field.map:
+        data[field.map] = data.pop(field.name, None)
+        return field.map
+
+    return field.name
+
+
+async def _atransmute_items(items: Any, definition: CompiledSchema, root: str):
+    """Transmute items of the `multiple` field concurrently."""
+    results = await asyncio.gather(
+        *(_amutate_fields(item, definition, root) for item in items or []),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def _avalidate_field(
+    field: CompiledField, value: Any, data: dict[str, Any]
+) -> Any:
+    """Async variant of `_validate_field`."""
+    key, result = _memo_lookup(field, value)
+    if result is SENTINEL:
+        result = _memo_store(key, await _arun_validators(field, value, data))
+
+    return result
+
+
+async def _arun_validators(
+    field: CompiledField, value: Any, data: dict[str, Any]
+) -> Any:
+    # pooled objects are shared by concurrent fields only between awaits, so
+    # every chain gets its own object
+    holder = Field(field.name, value, field.type, data_ctx.get(data))
+    return await _aapply_validators(holder, field.validators)
+
+
+async def _aapply_validators(field: Field, validators: tuple[BoundValidator, ...]):
+    """Apply validators sequentially, awaiting the results of async ones.
+
+    Durations of transmutators are not reported to the profiler and
+    observers, because concurrent chains overlap in time.
+    """
+    limit = limit_ctx.get()
+    validator: Any = None
+
+    try:
+        for validator, args in validators:
+            result = validator(field, *args)
+            if not inspect.isawaitable(result):
+                field = result
+            elif limit is None:
+                field = await result
             else:
-                field = get_transmutator(validator)(field)
+                async with limit:
+                    field = await result
+
     except df.StopOnError:
-        return field.value
+        return _stopped(field, validator)
     except df.Invalid as e:
-        raise ValidationError({f"{field.type}:{field.field_name}": [e.error]})
+        raise _invalid(field, validator, e)
     except TypeError as e:
         raise TransmutatorError(str(e))
 
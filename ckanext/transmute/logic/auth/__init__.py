@@ -4,4 +4,8 @@ from . import get
 def get_auth_functions():
     return {
         "tsm_transmute": get.transmute,
+        "tsm_transmute_many": get.transmute_many,
+        "tsm_transmute_incremental": get.transmute_incremental,
+        "tsm_validate": get.validate,
+        "tsm_stats": get.stats,
     }
@@ -4,3 +4,22 @@ import ckan.plugins.toolkit as tk
 @tk.auth_allow_anonymous_access
 def transmute(context, data_dict):
     return {"success": True}
+
+
+@tk.auth_allow_anonymous_access
+def transmute_many(context, data_dict):
+    return {"success": True}
+
+
+@tk.auth_allow_anonymous_access
+def transmute_incremental(context, data_dict):
+    return {"success": True}
+
+
+@tk.auth_allow_anonymous_access
+def validate(context, data_dict):
+    return {"success": True}
+
+
+def stats(context, data_dict):
+    return {"success": False}
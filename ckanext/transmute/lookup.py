@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import itertools
+import sqlite3
+import threading
+from typing import Any, Iterable
+from urllib.parse import quote
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.utils import LRUCache
+
+CONFIG_PREFIX = "ckanext.transmute.lookup."
+CONFIG_CACHE_SIZE = "ckanext.transmute.lookup_cache_size"
+CONFIG_MMAP_SIZE = "ckanext.transmute.lookup_mmap_size"
+
+# SQLite limits the number of variables in the single statement
+BATCH_SIZE = 500
+
+MISSING = object()
+
+_tables: dict[str, LookupTable] = {}
+
+
+class LookupTable:
+    """Read-only key-value table stored in SQLite database.
+
+    Database must contain the table `lookup` with `key` and `value` columns.
+    Every thread uses its own connection to the database. Recently used
+    values are cached in memory, including keys that are missing from the
+    table.
+
+    Args:
+        name: name of the table
+        path: path to SQLite database
+        cache_size: max number of values cached in memory
+        mmap_size: max number of bytes of the database mapped into memory
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: str,
+        cache_size: int = 10000,
+        mmap_size: int = 268435456,
+    ):
+        self.name = name
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache = LRUCache(cache_size)
+        self._local = threading.local()
+
+    def __repr__(self):
+        return f"<LookupTable name={self.name} path={self.path}>"
+
+    def connection(self) -> sqlite3.Connection:
+        """Return the connection owned by the current thread."""
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(f"file:{quote(self.path)}?mode=ro", uri=True)
+            except sqlite3.Error as e:
+                raise TransmutatorError(
+                    f"Lookup table {self.name} cannot be opened: {e}"
+                )
+            conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+            self._local.conn = conn
+
+        return conn
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = self.cache.get(key, MISSING)
+        if value is MISSING:
+            row = (
+                self.connection()
+                .execute("SELECT value FROM lookup WHERE key = ?", (str(key),))
+                .fetchone()
+            )
+            value = row[0] if row else None
+            self.cache.set(key, value)
+
+        return default if value is None else value
+
+    def get_many(self, keys: Iterable[Any]) -> dict[Any, Any]:
+        """Fetch values for multiple keys using minimal number of queries.
+
+        Returns:
+            mapping of keys that exist in the table to their values
+        """
+        result: dict[Any, Any] = {}
+        # different keys, e.g. `1` and `"1"`, may share the same name
+        missing: dict[str, list[Any]] = {}
+
+        for key in keys:
+            value = self.cache.get(key, MISSING)
+            if value is MISSING:
+                missing.setdefault(str(key), []).append(key)
+            elif value is not None:
+                result[key] = value
+
+        conn = self.connection()
+        names = iter(list(missing))
+        while True:
+            batch = list(itertools.islice(names, BATCH_SIZE))
+            if not batch:
+                break
+
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT key, value FROM lookup WHERE key IN ({placeholders})",
+                batch,
+            )
+            for name, value in rows:
+                for key in missing.pop(name):
+                    result[key] = value
+                    self.cache.set(key, value)
+
+        for group in missing.values():
+            for key in group:
+                self.cache.set(key, None)
+
+        return result
+
+
+def collect_tables():
+    """Register lookup tables declared in the config file."""
+    cache_size = tk.asint(tk.config.get(CONFIG_CACHE_SIZE, 10000))
+    mmap_size = tk.asint(tk.config.get(CONFIG_MMAP_SIZE, 268435456))
+    _tables.clear()
+
+    for key in tk.config:
+        if key.startswith(CONFIG_PREFIX):
+            name = key[len(CONFIG_PREFIX) :]
+            _tables[name] = LookupTable(name, tk.config[key], cache_size, mmap_size)
+
+
+def get_table(name: str) -> LookupTable:
+    """Return registered lookup table."""
+    try:
+        return _tables[name]
+    except KeyError:
+        raise TransmutatorError(f"Lookup table {name} does not exist")
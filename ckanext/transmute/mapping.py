@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+from typing import Any
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.utils import FileWatcher
+
+log = logging.getLogger(__name__)
+
+CONFIG_PREFIX = "ckanext.transmute.mapping."
+CONFIG_RELOAD_INTERVAL = "ckanext.transmute.mapping_reload_interval"
+
+_tables: dict[str, MappingTable] = {}
+
+
+class MappingTable(FileWatcher):
+    """Mapping loaded from CSV or JSON file.
+
+    File is loaded on first access and reloaded when its modification time
+    changes. Modification time is checked at most once per `reload_interval`
+    seconds.
+
+    Args:
+        name: name of the table
+        path: path to CSV or JSON file
+        reload_interval: min number of seconds between checks of the file
+    """
+
+    # content may change between calls, so results of mappers are not memoized
+    volatile = True
+
+    def __init__(self, name: str, path: str, reload_interval: float = 10):
+        super().__init__(path, reload_interval)
+        self.name = name
+        self._data: dict[Any, Any] = {}
+
+    def __repr__(self):
+        return f"<MappingTable name={self.name} path={self.path}>"
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    @property
+    def data(self) -> dict[Any, Any]:
+        if self.due():
+            self._refresh()
+
+        return self._data
+
+    def _refresh(self):
+        with self.lock:
+            if not self.due():
+                return
+
+            try:
+                mtime = self.poll()
+                if mtime is None:
+                    return
+
+                data = load_mapping(self.path)
+            except TransmutatorError as e:
+                if self.mtime is None:
+                    raise
+                log.error("Mapping table %s cannot be reloaded: %s", self.name, e.error)
+                return
+            except (OSError, ValueError) as e:
+                if self.mtime is None:
+                    raise TransmutatorError(
+                        f"Mapping table {self.name} cannot be loaded: {e}"
+                    )
+                log.error("Mapping table %s cannot be reloaded: %s", self.name, e)
+                return
+
+            self._data = data
+            self.mtime = mtime
+            log.debug("Mapping table %s loaded from %s", self.name, self.path)
+
+
+def load_mapping(path: str) -> dict[Any, Any]:
+    """Read mapping from the file.
+
+    JSON file must contain an object. CSV file must contain a header row and
+    use first two columns for keys and values.
+    """
+    with open(path, newline="") as src:
+        if path.endswith(".json"):
+            data = json.load(src)
+            if not isinstance(data, dict):
+                raise TransmutatorError(f"Mapping file {path} must contain an object")
+            return data
+
+        reader = csv.reader(src)
+        next(reader, None)
+        return {row[0]: row[1] for row in reader if len(row) >= 2}
+
+
+def collect_tables():
+    """Register mapping tables declared in the config file."""
+    interval = tk.asint(tk.config.get(CONFIG_RELOAD_INTERVAL, 10))
+    _tables.clear()
+
+    for key in tk.config:
+        if key.startswith(CONFIG_PREFIX):
+            name = key[len(CONFIG_PREFIX) :]
+            _tables[name] = MappingTable(name, tk.config[key], interval)
+
+
+def preload_tables():
+    """Load all registered mapping tables into memory."""
+    for table in _tables.values():
+        try:
+            table.data
+        except (OSError, ValueError, TransmutatorError) as e:
+            log.error("Mapping table %s cannot be loaded: %s", table.name, e)
+
+
+def get_table(name: str) -> MappingTable:
+    """Return registered mapping table."""
+    try:
+        return _tables[name]
+    except KeyError:
+        raise TransmutatorError(f"Mapping table {name} does not exist")
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+from typing import Any, Dict, Iterable, Iterator, Tuple, TypeVar
+
+from ckanext.transmute.logic.action import transmute_record
+from ckanext.transmute.schema import CompiledSchema
+from ckanext.transmute.types import TransmuteResult
+
+K = TypeVar("K")
+Item = Tuple[K, Dict[str, Any]]
+
+# number of chunks submitted to every worker at once. Input is consumed in
+# windows of this size to keep memory consumption constant.
+WINDOW_FACTOR = 4
+
+_worker_definition: CompiledSchema | None = None
+_worker_root: str = ""
+_worker_collect_errors: bool = False
+
+
+def transmute_parallel(
+    items: Iterable[Item[K]],
+    definition: CompiledSchema,
+    root: str,
+    workers: int,
+    chunksize: int = 100,
+    ordered: bool = True,
+    collect_errors: bool = False,
+) -> Iterator[tuple[K, TransmuteResult]]:
+    """Transmute records using multiple processes.
+
+    Workers are forked from the current process, so they inherit the registry
+    of transmutators and the compiled schema. Records are sent to workers in
+    chunks of `chunksize` records. Every record is accompanied by the key,
+    that is returned together with the result and helps to identify the record
+    when results are delivered unordered.
+
+    Args:
+        items: pairs of key and record
+        definition: execution plan of the schema
+        root: a root schema type
+        workers: number of worker processes
+        chunksize: number of records sent to a worker at once
+        ordered: deliver results in the order of input items
+        collect_errors: report all invalid fields of the record
+
+    Yields:
+        pairs of key and result of transmutation
+    """
+    ctx = multiprocessing.get_context("fork")
+    window = workers * chunksize * WINDOW_FACTOR
+    items = iter(items)
+
+    with ctx.Pool(workers, _init_worker, (definition, root, collect_errors)) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        while True:
+            batch = list(itertools.islice(items, window))
+            if not batch:
+                break
+
+            yield from imap(_transmute_item, batch, chunksize)
+
+
+def _init_worker(definition: CompiledSchema, root: str, collect_errors: bool):
+    global _worker_definition, _worker_root, _worker_collect_errors
+    _worker_definition = definition
+    _worker_root = root
+    _worker_collect_errors = collect_errors
+
+
+def _transmute_item(item: Item[K]) -> tuple[K, TransmuteResult]:
+    assert _worker_definition is not None
+    key, data = item
+    return key, transmute_record(
+        data, _worker_definition, _worker_root, _worker_collect_errors
+    )
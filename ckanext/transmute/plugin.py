@@ -1,30 +1,82 @@
 from __future__ import annotations
 
-import json
+import gc
+import logging
+import time
 from typing import Any
 
 import ckan.plugins as p
 import ckan.plugins.toolkit as tk
 
+from ckanext.transmute import lookup, mapping, stats
+from ckanext.transmute.cli import get_commands
 from ckanext.transmute.interfaces import ITransmute
 from ckanext.transmute.logic.action import get_actions
 from ckanext.transmute.logic.auth import get_auth_functions
-from ckanext.transmute.transmutators import get_transmutators
+from ckanext.transmute.schema import precompile_schemas
+from ckanext.transmute.transmutators import get_transmutators, isodate_memo
 
 from . import utils
 
+log = logging.getLogger(__name__)
+
 
 class TransmutePlugin(p.SingletonPlugin):
     p.implements(p.IConfigurer)
     p.implements(p.IActions)
     p.implements(p.IAuthFunctions)
+    p.implements(p.IClick)
     p.implements(ITransmute)
 
     # IConfigurer
     def update_config(self, config_):
         tk.add_template_directory(config_, "templates")
         tk.add_resource("assets", "transmute")
+        utils.parser_cache.resize(
+            tk.asint(config_.get("ckanext.transmute.schema_cache.size", 128))
+        )
+        utils.memo_cache.resize(
+            tk.asint(config_.get("ckanext.transmute.memo.size", 1024))
+        )
+        isodate_memo.resize(
+            tk.asint(config_.get("ckanext.transmute.isodate.memo_size", 128))
+        )
+        utils.collect_schema_files()
         utils.collect_schemas()
+        utils.collect_observers(
+            [stats.collector]
+            if tk.asbool(config_.get(stats.CONFIG_STATS, False))
+            else []
+        )
+        mapping.collect_tables()
+        lookup.collect_tables()
+
+        if tk.asbool(config_.get("ckanext.transmute.warmup", True)):
+            self._warmup(
+                tk.asbool(config_.get("ckanext.transmute.warmup.gc_freeze", False))
+            )
+
+    def _warmup(self, gc_freeze: bool):
+        """Prepare everything that is otherwise initialized by the first
+        transmutation.
+
+        When application server preloads the application, workers inherit
+        the registry, compiled schemas and mapping tables from the main
+        process instead of building them on the first request.
+        """
+        start = time.perf_counter()
+        utils.collect_transmutators()
+        precompile_schemas()
+        mapping.preload_tables()
+
+        if gc_freeze:
+            # move everything created so far into the permanent generation.
+            # Garbage collector does not touch these objects, so memory pages
+            # shared with forked workers are not copied.
+            gc.collect()
+            gc.freeze()
+
+        log.debug("Transmute warmup finished in %.3fs", time.perf_counter() - start)
 
     # IActions
     def get_actions(self):
@@ -36,16 +88,15 @@ class TransmutePlugin(p.SingletonPlugin):
         """Registers a list of extension specific auth function."""
         return get_auth_functions()
 
+    # IClick
+    def get_commands(self):
+        return get_commands()
+
     # ITransmute
     def get_transmutators(self):
         return get_transmutators()
 
     def get_transmutation_schemas(self) -> dict[str, Any]:
-        prefix = "ckanext.transmute.schema."
-        schemas: dict[str, Any] = {}
-        for key in tk.config:
-            if not key.startswith(prefix):
-                continue
-            with open(tk.config[key]) as src:
-                schemas[key[len(prefix) :]] = json.load(src)
-        return schemas
+        return {
+            name: source.load() for name, source in utils.get_schema_files().items()
+        }
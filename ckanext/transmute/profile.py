@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import json
+import logging
+import time
+from typing import Any, Callable, Iterator
+
+import ckan.plugins.toolkit as tk
+
+from ckanext.transmute.types import ProfileReport
+
+log = logging.getLogger(__name__)
+
+CONFIG_PROFILE = "ckanext.transmute.profile"
+
+SECTIONS = ("types", "fields", "transmutators")
+
+Sink = Callable[[ProfileReport], Any]
+
+profile_ctx: contextvars.ContextVar[Profiler | None] = contextvars.ContextVar(
+    "profile", default=None
+)
+
+
+class Profiler:
+    """Collects wall time and number of calls of transmutation steps.
+
+    Time of the type includes time of all its fields and time of the field
+    includes time of its transmutators. Nested types are included into the
+    time of the field that refers them.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # every entry is a pair of number of calls and total time
+        self.stats: dict[str, dict[str, list[Any]]] = {
+            section: {} for section in SECTIONS
+        }
+
+    def record(self, section: str, key: str, elapsed: float):
+        entry = self.stats[section].get(key)
+        if entry is None:
+            entry = self.stats[section][key] = [0, 0.0]
+
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def report(self) -> ProfileReport:
+        """Summary of collected measurements.
+
+        Items of every section are sorted by the total time, slowest first.
+        """
+        report: dict[str, Any] = {"total": time.perf_counter() - self.started}
+        for section, stats in self.stats.items():
+            items = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)
+            report[section] = {
+                key: {"calls": calls, "time": elapsed}
+                for key, (calls, elapsed) in items
+            }
+
+        return report  # type: ignore
+
+
+@contextlib.contextmanager
+def profiling(context: dict[str, Any]) -> Iterator[Profiler | None]:
+    """Profile transmutations performed inside the block.
+
+    Profiling is enabled by `tsm_profile` flag in the context or by
+    `ckanext.transmute.profile` config option. The flag in the context can be
+    a callable. In this case it receives the report when block is finished.
+
+    Report is stored in the context under `tsm_profile_report` key and is
+    written to `ckanext.transmute.profile` logger.
+    """
+    flag: bool | Sink = context.get(
+        "tsm_profile", tk.asbool(tk.config.get(CONFIG_PROFILE, False))
+    )
+    if not flag:
+        yield None
+        return
+
+    profiler = Profiler()
+    token = profile_ctx.set(profiler)
+    try:
+        yield profiler
+    finally:
+        profile_ctx.reset(token)
+        report = profiler.report()
+        context["tsm_profile_report"] = report
+        if callable(flag):
+            flag(report)
+        log.info("Transmutation profile: %s", json.dumps(report))
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import itertools
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+
+import ckan.plugins.toolkit as tk
+from ckan import model
+
+from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.utils import get_transmutation_cache
+
+ENTITY_ORGANIZATION = "organization"
+ENTITY_PACKAGE = "package"
+ENTITY_USER = "user"
+ENTITY_TAG = "tag"
+
+CONFIG_INCLUDE_PRIVATE = "ckanext.transmute.resolve.include_private"
+
+# number of keys sent to the database in the single query
+BATCH_SIZE = 1000
+
+_resolvers: dict[tuple[str, str | None], Resolver] = {}
+
+
+class Resolver:
+    """Resolves names or ids of CKAN entities into ids.
+
+    Keys are fetched from the database in bulk. During transmutation, results
+    are kept in the storage of the transmutation, including keys that do not
+    exist, so every key is queried at most once per transmutation.
+    Deleted, draft and private entities are not resolved.
+
+    Args:
+        entity: type of the entity: organization, package, user or tag
+        vocabulary: name of the vocabulary of tags. Free tags are resolved
+            when vocabulary is not provided.
+    """
+
+    def __init__(self, entity: str, vocabulary: str | None = None):
+        if entity not in (ENTITY_ORGANIZATION, ENTITY_PACKAGE, ENTITY_USER, ENTITY_TAG):
+            raise TransmutatorError(f"Entity {entity} cannot be resolved")
+
+        self.entity = entity
+        self.vocabulary = vocabulary
+        self.cache_key = ("resolve", entity, vocabulary)
+
+    def __repr__(self):
+        return f"<Resolver entity={self.entity} vocabulary={self.vocabulary}>"
+
+    def get_many(self, keys: Iterable[Any]) -> dict[str, str]:
+        """Resolve multiple keys using minimal number of queries.
+
+        Keys that are not strings are ignored.
+
+        Returns:
+            mapping of keys that exist in the database to ids
+        """
+        storage = get_transmutation_cache()
+        cache: dict[str, str | None] = (
+            {} if storage is None else storage.setdefault(self.cache_key, {})
+        )
+
+        result: dict[str, str] = {}
+        missing: set[str] = set()
+        for key in keys:
+            if not isinstance(key, str) or not key:
+                continue
+
+            if key not in cache:
+                missing.add(key)
+            elif cache[key] is not None:
+                result[key] = cache[key]  # type: ignore
+
+        names = iter(list(missing))
+        while True:
+            batch = list(itertools.islice(names, BATCH_SIZE))
+            if not batch:
+                break
+
+            found = self.query(batch)
+            for key in batch:
+                cache[key] = found.get(key)
+                if key in found:
+                    result[key] = found[key]
+
+        return result
+
+    def query(self, keys: list[str]) -> dict[str, str]:
+        """Fetch ids of entities identified by the keys from the database.
+
+        Returns:
+            mapping of names and ids of existing entities to ids
+        """
+        query = self.select(keys)
+        if query is None:
+            return {}
+
+        result: dict[str, str] = {}
+        for id_, name in query:
+            result[id_] = id_
+            result[name] = id_
+
+        return result
+
+    def select(self, keys: list[str]) -> Any:
+        """Build the query for ids and names of the entities identified by keys.
+
+        Only active entities visible to anonymous users are selected: private
+        datasets are skipped, and users are resolved only when
+        `ckan.auth.public_user_details` is enabled. Set
+        `ckanext.transmute.resolve.include_private` to resolve private
+        datasets and users as well.
+
+        Returns:
+            query or None if entities cannot be resolved at all
+        """
+        include_private = tk.asbool(tk.config.get(CONFIG_INCLUDE_PRIVATE, False))
+        if (
+            self.entity == ENTITY_USER
+            and not include_private
+            and not tk.asbool(tk.config.get("ckan.auth.public_user_details"))
+        ):
+            return None
+
+        if self.entity == ENTITY_TAG:
+            table = model.Tag
+            query = model.Session.query(table.id, table.name)
+            if self.vocabulary:
+                query = query.join(
+                    model.Vocabulary, table.vocabulary_id == model.Vocabulary.id
+                ).filter(model.Vocabulary.name == self.vocabulary)
+            else:
+                query = query.filter(table.vocabulary_id.is_(None))
+
+        else:
+            table = {
+                ENTITY_ORGANIZATION: model.Group,
+                ENTITY_PACKAGE: model.Package,
+                ENTITY_USER: model.User,
+            }[self.entity]
+            query = model.Session.query(table.id, table.name).filter(
+                table.state == model.State.ACTIVE
+            )
+            if self.entity == ENTITY_ORGANIZATION:
+                query = query.filter(table.is_organization.is_(True))
+            elif self.entity == ENTITY_PACKAGE and not include_private:
+                query = query.filter(table.private.is_(False))
+
+        return query.filter(sa.or_(table.id.in_(keys), table.name.in_(keys)))
+
+
+def get_resolver(entity: str, vocabulary: str | None = None) -> Resolver:
+    """Return resolver of the entity shared by all transmutators."""
+    key = (entity, vocabulary)
+    if key not in _resolvers:
+        _resolvers[key] = Resolver(entity, vocabulary)
+
+    return _resolvers[key]
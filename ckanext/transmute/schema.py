@@ -2,20 +2,48 @@ from __future__ import annotations
 
 import copy
 import dataclasses
-from typing import Any
+import functools
+import heapq
+import inspect
+import logging
+import types as pytypes
+import weakref
+from typing import Any, Callable, Iterable, Mapping, Tuple
 
 from ckan import types
 from ckan.logic.schema import validator_args
 
-from ckanext.transmute.exception import SchemaFieldError, SchemaParsingError
-from ckanext.transmute.utils import SENTINEL
+from ckanext.transmute.exception import (
+    SchemaFieldError,
+    SchemaParsingError,
+    TransmutatorError,
+    UnknownTransmutator,
+)
+from ckanext.transmute.types import SLOTS
+from ckanext.transmute.utils import (
+    SENTINEL,
+    SchemaFile,
+    fingerprint,
+    get_schema,
+    get_schema_file,
+    get_schema_names,
+    get_transmutator,
+    get_transmutator_info,
+    parser_cache,
+    set_schema,
+)
 
+log = logging.getLogger(__name__)
 
-@dataclasses.dataclass
+BoundValidator = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+SECTIONS = ("pre-fields", "fields", "post-fields")
+
+
+@dataclasses.dataclass(**SLOTS)
 class SchemaField:
     name: str
     type: str
-    definition: dict[str, Any]
     map: str | None = None
     validators: list[Any] = dataclasses.field(default_factory=list)
     multiple: bool = False
@@ -28,6 +56,21 @@ class SchemaField:
     update: bool = False
     validate_missing: bool = False
     weight: int = 0
+    # weak reference to the parser and the name of the type that contains
+    # the field. Strong reference would create a cycle between every type
+    # and its fields.
+    owner: tuple[weakref.ref[SchemaParser], str] | None = dataclasses.field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def definition(self) -> dict[str, Any]:
+        """Definition of the type that contains the field."""
+        parser = self.owner and self.owner[0]()
+        if parser is None:
+            return {}
+
+        return parser.types[self.owner[1]]  # type: ignore
 
     def __repr__(self):
         return (
@@ -67,6 +110,365 @@ class SchemaField:
         return field_name
 
 
+@dataclasses.dataclass(frozen=True, **SLOTS)
+class CompiledField:
+    """Field definition prepared for execution.
+
+    Transmutators are resolved into callables bound to their arguments and
+    names of the fields used by `default_from`/`replace_from` are computed in
+    advance.
+    """
+
+    name: str
+    type: str
+    map: str | None
+    validators: tuple[BoundValidator, ...]
+    multiple: bool
+    remove: bool
+    default: Any
+    default_from: tuple[str, ...] | str | None
+    value: Any
+    replace_from: tuple[str, ...] | str | None
+    inherit_mode: str | None
+    update: bool
+    validate_missing: bool
+    # all validators are pure, so the result of the whole chain can be memoized
+    pure: bool = False
+    # sibling fields read by `default_from` and `replace_from`
+    reads: tuple[str, ...] = ()
+    # fields of the root record referenced by arguments of transmutators
+    refs: tuple[str, ...] = ()
+    # batch implementations of validators, if all validators have them
+    batch_validators: tuple[BoundValidator, ...] | None = None
+    # vectorized implementations of validators, if all validators have them
+    vector_validators: tuple[BoundValidator, ...] | None = None
+    # some validators are coroutine functions and must be awaited
+    is_async: bool = False
+    # prefetch implementations of validators that have them
+    prefetch_validators: tuple[BoundValidator, ...] = ()
+    # unique identity of the field that is used in memoization keys
+    token: object = dataclasses.field(default_factory=object, compare=False, repr=False)
+
+    @property
+    def output(self) -> str:
+        """Name of the key that holds the value of the field after processing."""
+        return self.map or self.name
+
+    @property
+    def columnar(self) -> bool:
+        """Field can be processed for multiple records at once."""
+        return (
+            self.batch_validators is not None
+            and not self.multiple
+            and not self.update
+            and not self.reads
+            and not self.refs
+        )
+
+    @property
+    def vectorized(self) -> bool:
+        """Field can be processed by the columnar engine."""
+        return (
+            self.vector_validators is not None
+            and not self.multiple
+            and not self.update
+            and not self.reads
+            and not self.refs
+            and self.default is SENTINEL
+        )
+
+    @classmethod
+    def from_schema_field(cls, field: SchemaField) -> CompiledField:
+        validators = tuple(_bind_validator(v) for v in field.validators)
+        batch = tuple(
+            (get_transmutator_info(fn).batch, args) for fn, args in validators
+        )
+        vector = tuple(
+            (get_transmutator_info(fn).vector, args) for fn, args in validators
+        )
+        default_from = _freeze(field.get_default_from()) if field.default_from else None
+        replace_from = _freeze(field.get_replace_from()) if field.replace_from else None
+        return cls(
+            name=field.name,
+            type=field.type,
+            map=field.map,
+            validators=validators,
+            pure=bool(validators)
+            and all(
+                get_transmutator_info(fn).pure
+                and not any(getattr(arg, "volatile", False) for arg in args)
+                for fn, args in validators
+            ),
+            multiple=field.is_multiple(),
+            remove=bool(field.remove),
+            default=field.default,
+            default_from=default_from,
+            value=field.value,
+            replace_from=replace_from,
+            inherit_mode=field.inherit_mode,
+            update=bool(field.update),
+            validate_missing=bool(field.validate_missing),
+            reads=_names(default_from) + _names(replace_from),
+            refs=tuple(
+                name
+                for _fn, args in validators
+                for arg in args
+                for name in getattr(arg, "references", ())
+            ),
+            batch_validators=batch  # type: ignore
+            if all(fn for fn, _args in batch)
+            else None,
+            vector_validators=vector  # type: ignore
+            if all(fn for fn, _args in vector)
+            else None,
+            is_async=any(inspect.iscoroutinefunction(fn) for fn, _args in validators),
+            prefetch_validators=tuple(
+                (get_transmutator_info(fn).prefetch, args)  # type: ignore
+                for fn, args in validators
+                if get_transmutator_info(fn).prefetch
+            ),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledType:
+    """Fields of the type in the order of execution."""
+
+    pre_fields: tuple[CompiledField, ...]
+    fields: tuple[CompiledField, ...]
+    post_fields: tuple[CompiledField, ...]
+    drop_unknown_fields: bool = False
+
+    def __bool__(self):
+        return bool(self.pre_fields or self.fields or self.post_fields)
+
+    @functools.cached_property
+    def columnar(self) -> bool:
+        """Multiple records of the type can be processed column by column.
+
+        Every field must support batch processing and must not depend on
+        other fields.
+        """
+        return all(
+            field.columnar
+            for field in (*self.pre_fields, *self.fields, *self.post_fields)
+        )
+
+    @functools.cached_property
+    def vectorized(self) -> bool:
+        """Records of the type can be processed by the columnar engine.
+
+        The type must be flat and every transmutator must have a vectorized
+        implementation.
+        """
+        return all(
+            field.vectorized
+            for field in (*self.pre_fields, *self.fields, *self.post_fields)
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class CompiledSchema:
+    """Immutable execution plan of the schema."""
+
+    root_type: str
+    types: Mapping[str, CompiledType]
+
+    @functools.cached_property
+    def async_types(self) -> frozenset[str]:
+        """Types that contain async transmutators, directly or in nested types."""
+        return self._types_containing(lambda field: field.is_async)
+
+    @functools.cached_property
+    def prefetch_types(self) -> frozenset[str]:
+        """Types that contain transmutators with prefetch implementation."""
+        return self._types_containing(lambda field: bool(field.prefetch_validators))
+
+    def _types_containing(
+        self, predicate: Callable[[CompiledField], bool]
+    ) -> frozenset[str]:
+        """Types that contain matching fields, directly or in nested types.
+
+        Validators of `multiple` fields are never applied, so these fields are
+        checked only through their nested types.
+        """
+        fields = {
+            name: (*schema.pre_fields, *schema.fields, *schema.post_fields)
+            for name, schema in self.types.items()
+        }
+        result = {
+            name
+            for name, items in fields.items()
+            if any(not field.multiple and predicate(field) for field in items)
+        }
+
+        changed = True
+        while changed:
+            changed = False
+            for name, items in fields.items():
+                if name not in result and any(
+                    field.multiple and field.type in result for field in items
+                ):
+                    result.add(name)
+                    changed = True
+
+        return frozenset(result)
+
+
+def _bind_validator(validator: str | list[Any]) -> BoundValidator:
+    if isinstance(validator, list):
+        if len(validator) <= 1:
+            raise TransmutatorError("Arguments for validator weren't provided")
+        func = get_transmutator(validator[0])
+        args = tuple(validator[1:])
+    else:
+        func = get_transmutator(validator)
+        args = ()
+
+    compiler = get_transmutator_info(func).compiler
+    if compiler:
+        try:
+            args = compiler(*args)
+        except TypeError as e:
+            raise TransmutatorError(str(e))
+
+    return func, args
+
+
+def _freeze(names: list[str] | str) -> tuple[str, ...] | str:
+    return tuple(names) if isinstance(names, list) else names
+
+
+def _names(names: tuple[str, ...] | str | None) -> tuple[str, ...]:
+    if names is None:
+        return ()
+    return (names,) if isinstance(names, str) else names
+
+
+def _order_fields(
+    fields: list[tuple[int, CompiledField]], dependencies: list[set[str]]
+) -> tuple[CompiledField, ...]:
+    """Sort fields topologically by their dependencies.
+
+    Field runs after the fields that produce values it reads and before the
+    fields that remove or rename these values. Independent fields are sorted
+    by weight and then by the position in the schema.
+
+    Args:
+        fields: pairs of weight and field, in the order of declaration
+        dependencies: names of keys read by every field
+
+    Raises:
+        SchemaParsingError: fields depend on each other
+    """
+    writers: dict[str, list[int]] = {}
+    destroyers: dict[str, list[int]] = {}
+    for idx, (_weight, field) in enumerate(fields):
+        if not field.remove:
+            writers.setdefault(field.output, []).append(idx)
+        if field.remove or field.map:
+            destroyers.setdefault(field.name, []).append(idx)
+
+    edges: list[set[int]] = [set() for _ in fields]
+    for idx, keys in enumerate(dependencies):
+        for key in keys:
+            for producer in writers.get(key, ()):
+                if producer != idx:
+                    edges[producer].add(idx)
+            for destroyer in destroyers.get(key, ()):
+                if destroyer != idx:
+                    edges[idx].add(destroyer)
+
+    indegree = [0] * len(fields)
+    for targets in edges:
+        for target in targets:
+            indegree[target] += 1
+
+    ready = [(fields[idx][0], idx) for idx, count in enumerate(indegree) if not count]
+    heapq.heapify(ready)
+    order: list[CompiledField] = []
+    while ready:
+        _weight, idx = heapq.heappop(ready)
+        order.append(fields[idx][1])
+        for target in edges[idx]:
+            indegree[target] -= 1
+            if not indegree[target]:
+                heapq.heappush(ready, (fields[target][0], target))
+
+    if len(order) < len(fields):
+        names = sorted(
+            fields[idx][1].name for idx, count in enumerate(indegree) if count
+        )
+        raise SchemaParsingError(
+            f"Schema: circular dependency between fields {', '.join(names)}"
+        )
+
+    return tuple(order)
+
+
+def type_refs(
+    name: str,
+    fields_of: Callable[[str], Iterable[CompiledField]],
+    cache: dict[str, set[str]],
+) -> set[str]:
+    """Fields of the root record referenced by the type and its nested types.
+
+    Args:
+        name: name of the type
+        fields_of: returns fields of the type with the given name
+        cache: refs of already visited types
+    """
+    if name not in cache:
+        # guard against recursive types
+        cache[name] = set()
+        refs: set[str] = set()
+        for field in fields_of(name):
+            refs.update(field.refs)
+            if field.multiple:
+                refs.update(type_refs(field.type, fields_of, cache))
+        cache[name] = refs
+
+    return cache[name]
+
+
+def _eliminate_dead_fields(
+    name: str,
+    sections: dict[str, list[tuple[int, CompiledField]]],
+    root_refs: set[str],
+) -> dict[str, list[tuple[int, CompiledField]]]:
+    """Drop fields whose values are never read and are removed in post-fields.
+
+    Such fields do not affect the result of transmutation, unless they are
+    expected to fail validation. Because of this, elimination must be enabled
+    explicitly.
+    """
+    removed = {field.name for _weight, field in sections["post-fields"] if field.remove}
+    used = set(root_refs)
+    for fields in sections.values():
+        for _weight, field in fields:
+            used.update(field.reads)
+
+    def is_dead(field: CompiledField) -> bool:
+        return (
+            field.output in removed
+            and field.output not in used
+            and (not field.map or field.name in removed)
+        )
+
+    result = {}
+    for section, fields in sections.items():
+        if section == "post-fields":
+            result[section] = fields
+            continue
+
+        result[section] = [item for item in fields if not is_dead(item[1])]
+        for _weight, field in fields:
+            if is_dead(field):
+                log.debug("Dead field %s:%s eliminated", name, field.name)
+
+    return result
+
+
 class SchemaParser:
     def __init__(self, schema: dict[str, Any]):
         self.schema = copy.deepcopy(schema)
@@ -75,6 +477,7 @@ class SchemaParser:
         self.parse_fields("pre-fields")
         self.parse_fields("fields")
         self.parse_fields("post-fields")
+        self._compiled: CompiledSchema | None = None
 
     def get_root_type(self):
         root_type: str = self.schema.get("root", "")
@@ -115,23 +518,257 @@ class SchemaParser:
             SchemaField: SchemaField object
         """
         params: dict[str, Any] = dict({"type": _type}, **field_meta)
-        return SchemaField(name=field_name, definition=self.types[_type], **params)
+        return SchemaField(name=field_name, owner=(weakref.ref(self), _type), **params)
+
+    def compile(self) -> CompiledSchema:
+        """Build the execution plan of the schema.
+
+        Plan is built only once and reused by subsequent calls.
+
+        Returns:
+            CompiledSchema object
+        """
+        if self._compiled is None:
+            sections = {
+                name: {
+                    section: [
+                        (field.weight, CompiledField.from_schema_field(field))
+                        for field in type_meta[section].values()
+                    ]
+                    for section in SECTIONS
+                }
+                for name, type_meta in self.types.items()
+            }
+
+            # transmutators always refer fields of the root record
+            root_refs = {
+                ref
+                for fields in sections.values()
+                for section in fields.values()
+                for _weight, field in section
+                for ref in field.refs
+            }
+
+            def fields_of(name: str) -> list[CompiledField]:
+                return [
+                    field
+                    for section in sections.get(name, {}).values()
+                    for _weight, field in section
+                ]
+
+            nested_refs: dict[str, set[str]] = {}
+            for name in sections:
+                type_refs(name, fields_of, nested_refs)
+
+            self._compiled = CompiledSchema(
+                self.root_type,
+                pytypes.MappingProxyType(
+                    {
+                        name: self._compile_type(
+                            name,
+                            self.types[name],
+                            fields,
+                            root_refs if name == self.root_type else set(),
+                            nested_refs,
+                        )
+                        for name, fields in sections.items()
+                    }
+                ),
+            )
+
+        return self._compiled
+
+    def _compile_type(
+        self,
+        name: str,
+        type_meta: dict[str, Any],
+        sections: dict[str, list[tuple[int, CompiledField]]],
+        root_refs: set[str],
+        nested_refs: dict[str, set[str]],
+    ) -> CompiledType:
+        def dependencies(field: CompiledField) -> set[str]:
+            keys = set(field.reads)
+            if root_refs:
+                keys.update(field.refs)
+                if field.multiple:
+                    keys.update(nested_refs.get(field.type, ()))
+            return keys
+
+        if type_meta.get("eliminate_dead_fields"):
+            sections = _eliminate_dead_fields(name, sections, root_refs)
+
+        ordered = {
+            section: _order_fields(
+                fields, [dependencies(field) for _weight, field in fields]
+            )
+            for section, fields in sections.items()
+        }
+
+        return CompiledType(
+            pre_fields=ordered["pre-fields"],
+            fields=ordered["fields"],
+            post_fields=ordered["post-fields"],
+            drop_unknown_fields=bool(type_meta.get("drop_unknown_fields")),
+        )
+
+
+def get_parser(schema: dict[str, Any] | str) -> SchemaParser:
+    """Return parsed schema, reusing previously parsed instance when possible.
+
+    Named schemas are cached by name and version, while inline schemas are
+    cached by the fingerprint of their content. Inline schemas that cannot be
+    serialized into JSON are parsed on every call. Named schemas loaded from
+    files are reloaded when the file changes.
+
+    Args:
+        schema: definition of the schema or the name of the named schema
+
+    Returns:
+        SchemaParser object
+    """
+    if isinstance(schema, str):
+        source = get_schema_file(schema)
+        version = 0
+        if source is not None:
+            if source.due():
+                _reload_schema(source)
+            version = source.version
+
+        key = ("name", schema, version)
+        definition = get_schema(schema)
+        if definition is None:
+            return SchemaParser({})
+
+    else:
+        digest = fingerprint(schema)
+        if digest is None:
+            return SchemaParser(schema)
+
+        key = ("fingerprint", digest)
+        definition = schema
+
+    parser: SchemaParser | None = parser_cache.get(key)
+    if parser is None:
+        parser = SchemaParser(definition)
+        parser_cache.set(key, parser)
+
+    return parser
+
+
+def precompile_schemas():
+    """Parse and compile all named schemas and keep them in the cache.
+
+    Schemas that cannot be compiled are reported to the log. They raise an
+    error when used for transmutation.
+    """
+    for name in get_schema_names():
+        try:
+            get_parser(name).compile()
+        except (
+            SchemaFieldError,
+            SchemaParsingError,
+            TransmutatorError,
+            UnknownTransmutator,
+        ) as e:
+            log.error("Schema %s cannot be compiled: %s", name, e.error)
+
+
+def _reload_schema(source: SchemaFile):
+    """Reload and compile the named schema if its file was modified.
+
+    New version of the schema is compiled before it replaces the current
+    version, so the invalid schema never replaces the valid one. When
+    another thread is already reloading the schema, the function returns
+    immediately.
+    """
+    if not source.lock.acquire(blocking=False):
+        return
+
+    try:
+        if not source.due():
+            return
+
+        definition = source.check()
+        if definition is None:
+            return
+
+        try:
+            parser = SchemaParser(definition)
+            parser.compile()
+        except (
+            SchemaFieldError,
+            SchemaParsingError,
+            TransmutatorError,
+            UnknownTransmutator,
+        ) as e:
+            log.error("Schema %s cannot be reloaded: %s", source.name, e.error)
+            return
+
+        # readers compute the cache key from the version, so the definition
+        # must be updated first
+        set_schema(source.name, definition)
+        parser_cache.set(("name", source.name, source.version + 1), parser)
+        source.version += 1
+        log.info("Schema %s reloaded from %s", source.name, source.path)
+    finally:
+        source.lock.release()
 
 
 @validator_args
 def transmute_schema(
     not_missing: types.Validator,
     default: types.ValidatorFactory,
+    boolean_validator: types.Validator,
 ) -> types.Schema:
     return {
         "data": [not_missing],
         "schema": [not_missing],
         "root": [default("Dataset")],
+        "collect_errors": [default(False), boolean_validator],
     }
 
 
 @validator_args
-def validate_schema(not_missing: types.Validator) -> types.Schema:
+def transmute_many_schema(
+    not_missing: types.Validator,
+    default: types.ValidatorFactory,
+    boolean_validator: types.Validator,
+) -> types.Schema:
     return {
-        "data": [not_missing],
+        "schema": [not_missing],
+        "root": [default("Dataset")],
+        "collect_errors": [default(False), boolean_validator],
+    }
+
+
+@validator_args
+def transmute_incremental_schema(
+    not_missing: types.Validator,
+    ignore_missing: types.Validator,
+    default: types.ValidatorFactory,
+    dict_only: types.Validator,
+    list_of_strings: types.Validator,
+) -> types.Schema:
+    return {
+        "data": [not_missing, dict_only],
+        "previous": [not_missing, dict_only],
+        "changed": [ignore_missing, list_of_strings],
+        "previous_data": [ignore_missing, dict_only],
+        "schema": [not_missing],
+        "root": [default("Dataset")],
+    }
+
+
+@validator_args
+def validate_schema(
+    not_missing: types.Validator,
+    default: types.ValidatorFactory,
+    boolean_validator: types.Validator,
+    dict_only: types.Validator,
+) -> types.Schema:
+    return {
+        "data": [not_missing, dict_only],
+        "schema": [not_missing],
+        "root": [default("Dataset")],
+        "collect_errors": [default(False), boolean_validator],
     }
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any
+
+CONFIG_STATS = "ckanext.transmute.stats"
+
+# upper bounds of latency buckets, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Histogram:
+    """Distribution of latencies over fixed buckets."""
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+    def as_dict(self) -> dict[str, Any]:
+        """Cumulative counts of observations, keyed by upper bound."""
+        buckets: dict[str, int] = {}
+        total = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), self.counts):
+            total += count
+            buckets[str(bound)] = total
+
+        return {"count": total, "sum": self.sum, "buckets": buckets}
+
+
+class StatsCollector:
+    """Built-in observer that aggregates metrics of transmutations in memory.
+
+    Collected metrics are available via `tsm_stats` API action. Statistics
+    are kept per process and reset when process restarts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.since = time.time()
+            self.started = 0
+            self.failed = 0
+            self.duration = Histogram()
+            self.fields: dict[str, list[Any]] = {}
+            self.validators: dict[str, dict[str, Any]] = {}
+
+    def transmutation_started(self, root: str, data: dict[str, Any]):
+        with self._lock:
+            self.started += 1
+
+    def transmutation_finished(
+        self,
+        root: str,
+        data: dict[str, Any],
+        duration: float,
+        errors: dict[str, Any] | None,
+    ):
+        with self._lock:
+            self.duration.observe(duration)
+            if errors is not None:
+                self.failed += 1
+
+    def field_processed(self, type: str, field: str, duration: float, hit: bool):
+        key = f"{type}:{field}"
+        with self._lock:
+            entry = self.fields.get(key)
+            if entry is None:
+                # number of times field was processed, found in the record and
+                # the total time
+                entry = self.fields[key] = [0, 0, 0.0]
+
+            entry[0] += 1
+            entry[1] += hit
+            entry[2] += duration
+
+    def validator_invoked(self, type: str, field: str, validator: str, duration: float):
+        with self._lock:
+            self._validator(validator)["duration"].observe(duration)
+
+    def validation_failed(self, type: str, field: str, validator: str, error: str):
+        with self._lock:
+            self._validator(validator)["errors"] += 1
+
+    def stopped_on_error(self, type: str, field: str, validator: str):
+        with self._lock:
+            self._validator(validator)["stops"] += 1
+
+    def _validator(self, name: str) -> dict[str, Any]:
+        entry = self.validators.get(name)
+        if entry is None:
+            entry = self.validators[name] = {
+                "duration": Histogram(),
+                "errors": 0,
+                "stops": 0,
+            }
+        return entry
+
+    def snapshot(self) -> dict[str, Any]:
+        """Copy of collected metrics.
+
+        Hit rate of the field is the share of processed records that contained
+        the field. Fields that were never processed are not included.
+        """
+        with self._lock:
+            elapsed = time.time() - self.since
+            finished = self.duration.as_dict()["count"]
+            return {
+                "since": self.since,
+                "transmutations": {
+                    "started": self.started,
+                    "finished": finished,
+                    "failed": self.failed,
+                    "throughput": finished / elapsed if elapsed else 0.0,
+                    "error_rate": self.failed / finished if finished else 0.0,
+                    "duration": self.duration.as_dict(),
+                },
+                "fields": {
+                    key: {
+                        "processed": processed,
+                        "hits": hits,
+                        "hit_rate": hits / processed,
+                        "time": total,
+                    }
+                    for key, (processed, hits, total) in self.fields.items()
+                },
+                "validators": {
+                    name: {
+                        "duration": entry["duration"].as_dict(),
+                        "errors": entry["errors"],
+                        "stops": entry["stops"],
+                    }
+                    for name, entry in self.validators.items()
+                },
+            }
+
+
+collector = StatsCollector()
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import tracemalloc
+from typing import Any, Callable
+
+import pytest
+
+from ckanext.transmute import utils
+
+pytest.importorskip("pytest_benchmark")
+
+
+def flat_schema(size: int) -> dict[str, Any]:
+    """Schema with `size` string fields."""
+    fields = {
+        f"field_{i}": {
+            "validators": ["tsm_string_only", "tsm_to_lowercase"],
+            "map": f"mapped_{i}",
+        }
+        for i in range(size)
+    }
+    return {"root": "Dataset", "types": {"Dataset": {"fields": fields}}}
+
+
+def flat_document(size: int) -> dict[str, Any]:
+    return {f"field_{i}": f"VALUE {i}" for i in range(size)}
+
+
+def nested_schema() -> dict[str, Any]:
+    return {
+        "root": "Dataset",
+        "types": {
+            "Dataset": {
+                "fields": {
+                    "title": {"validators": ["tsm_string_only", "tsm_to_lowercase"]},
+                    "created": {"validators": ["tsm_isodate"]},
+                    "resources": {"type": "Resource", "multiple": True},
+                }
+            },
+            "Resource": {
+                "fields": {
+                    "name": {"validators": ["tsm_string_only"]},
+                    "format": {
+                        "validators": [
+                            "tsm_to_lowercase",
+                            ["tsm_mapper", {"csv": "CSV", "xls": "XLS"}],
+                        ]
+                    },
+                    "created": {"validators": ["tsm_isodate"]},
+                    "url": {"validators": [["tsm_concat", "https://x.org/", "$self"]]},
+                    "parts": {"type": "Part", "multiple": True},
+                }
+            },
+            "Part": {
+                "fields": {
+                    "name": {"validators": ["tsm_to_uppercase"]},
+                    "size": {"validators": ["tsm_to_string"]},
+                    "extra": {"remove": True},
+                }
+            },
+        },
+    }
+
+
+def nested_document(resources: int, parts: int = 3) -> dict[str, Any]:
+    return {
+        "title": "Benchmark Dataset",
+        "created": "2024-01-01T10:20:30",
+        "resources": [
+            {
+                "name": f"resource {i}",
+                "format": "CSV" if i % 2 else "XLS",
+                "created": f"2024-01-{i % 28 + 1:02}T10:20:30.123456",
+                "url": f"file-{i}.csv",
+                "parts": [
+                    {"name": f"part {j}", "size": j, "extra": "x"} for j in range(parts)
+                ],
+            }
+            for i in range(resources)
+        ],
+    }
+
+
+@pytest.fixture
+def no_memo(monkeypatch):
+    """Measure the engine itself, not the memoization."""
+    monkeypatch.setattr(utils.memo_cache, "maxsize", 0)
+
+
+@pytest.fixture
+def slow_lookup(monkeypatch):
+    """Register async transmutator that waits for a remote service."""
+
+    async def tsm_slow_lookup(field: Any, delay: float = 0.001):
+        await asyncio.sleep(delay)
+        return field
+
+    utils.get_all_transmutators()
+    monkeypatch.setitem(utils._transmutator_cache, "tsm_slow_lookup", tsm_slow_lookup)
+
+
+def lookup_schema() -> dict[str, Any]:
+    """Schema with a slow lookup for the dataset and every resource."""
+    return {
+        "root": "Dataset",
+        "types": {
+            "Dataset": {
+                "fields": {
+                    "doi": {"validators": ["tsm_slow_lookup"]},
+                    "resources": {"type": "Resource", "multiple": True},
+                }
+            },
+            "Resource": {"fields": {"url": {"validators": ["tsm_slow_lookup"]}}},
+        },
+    }
+
+
+def lookup_document(resources: int) -> dict[str, Any]:
+    return {
+        "doi": "10.1000/1",
+        "resources": [{"url": f"http://localhost/{i}"} for i in range(resources)],
+    }
+
+
+def table_schema() -> dict[str, Any]:
+    """Schema of the flat records, e.g. rows of DataStore resource."""
+    return {
+        "root": "Dataset",
+        "types": {
+            "Dataset": {
+                "fields": {
+                    "name": {"validators": ["tsm_string_only", "tsm_to_lowercase"]},
+                    "code": {
+                        "validators": ["tsm_to_uppercase", ["tsm_trim_string", 3]]
+                    },
+                    "format": {"validators": [["tsm_mapper", {"csv": "CSV"}, "other"]]},
+                    "created": {"validators": ["tsm_isodate"]},
+                    "size": {"validators": ["tsm_to_string"], "map": "bytes"},
+                }
+            },
+        },
+    }
+
+
+def table_records(size: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": f"Record {i}",
+            "code": f"code-{i}",
+            "format": "csv" if i % 2 else "xls",
+            "created": f"2024-01-{i % 28 + 1:02}T10:20:30",
+            "size": i,
+        }
+        for i in range(size)
+    ]
+
+
+def measure_memory(func: Callable[..., Any], *args: Any) -> dict[str, int]:
+    """Memory allocated by the call, measured by tracemalloc.
+
+    `retained` is the size of the objects that are still alive after the
+    call, `peak` is the max size of allocated objects during the call and
+    `collections` is the number of garbage collector runs.
+    """
+    collections = 0
+
+    def count(phase: str, info: dict[str, Any]):
+        nonlocal collections
+        if phase == "start":
+            collections += 1
+
+    gc.collect()
+    gc.callbacks.append(count)
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        gc.callbacks.remove(count)
+
+    del result
+    return {"retained": retained, "peak": peak, "collections": collections}
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import copy
+
+import pytest
+
+from ckanext.transmute import columnar
+from ckanext.transmute.logic.action import (
+    iter_transmute,
+    mutate_fields,
+    transmute_incremental,
+    validate_record,
+)
+from ckanext.transmute.schema import SchemaParser
+
+from .conftest import (
+    flat_document,
+    flat_schema,
+    lookup_document,
+    lookup_schema,
+    measure_memory,
+    nested_document,
+    nested_schema,
+    table_records,
+    table_schema,
+)
+
+
+def run_mutate(benchmark, definition, document, rounds=20):
+    benchmark.pedantic(
+        mutate_fields,
+        setup=lambda: ((copy.deepcopy(document), definition, "Dataset"), {}),
+        rounds=rounds,
+    )
+
+
+@pytest.mark.benchmark(group="parse")
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_parse_schema(benchmark, size):
+    schema = flat_schema(size)
+    benchmark(SchemaParser, schema)
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.benchmark(group="compile")
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_compile_schema(benchmark, size):
+    schema = flat_schema(size)
+    benchmark(lambda: SchemaParser(schema).compile())
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="mutate-flat")
+@pytest.mark.parametrize("size", [10, 100, 1000, 5000])
+def test_mutate_flat(benchmark, size):
+    definition = SchemaParser(flat_schema(size)).compile()
+    run_mutate(benchmark, definition, flat_document(size))
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.benchmark(group="mutate-flat-memo")
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_mutate_flat_memoized(benchmark, size):
+    definition = SchemaParser(flat_schema(size)).compile()
+    run_mutate(benchmark, definition, flat_document(size))
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="mutate-nested")
+@pytest.mark.parametrize("resources", [1, 10, 100, 1000])
+def test_mutate_nested(benchmark, resources):
+    definition = SchemaParser(nested_schema()).compile()
+    run_mutate(benchmark, definition, nested_document(resources))
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="mutate-nested")
+@pytest.mark.parametrize("resources", [1, 10, 100, 1000])
+def test_validate_nested(benchmark, resources):
+    definition = SchemaParser(nested_schema()).compile()
+    benchmark(validate_record, nested_document(resources), definition, "Dataset")
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="mutate-incremental")
+@pytest.mark.parametrize("resources", [10, 1000])
+def test_mutate_incremental(benchmark, resources):
+    definition = SchemaParser(nested_schema()).compile()
+    document = nested_document(resources)
+    previous = copy.deepcopy(document)
+    mutate_fields(previous, definition, "Dataset")
+    modified = dict(document, title="Changed title")
+
+    benchmark(
+        transmute_incremental, modified, previous, {"title"}, definition, "Dataset"
+    )
+
+
+@pytest.mark.usefixtures("with_plugins", "slow_lookup")
+@pytest.mark.benchmark(group="mutate-async")
+@pytest.mark.parametrize("resources", [10, 300])
+def test_mutate_async(benchmark, resources):
+    definition = SchemaParser(lookup_schema()).compile()
+    run_mutate(benchmark, definition, lookup_document(resources), rounds=5)
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.benchmark(group="memory")
+@pytest.mark.parametrize("size", [100, 1000])
+def test_compiled_schema_memory(benchmark, size):
+    schema = flat_schema(size)
+    benchmark.extra_info.update(measure_memory(lambda: SchemaParser(schema).compile()))
+    benchmark(lambda: SchemaParser(schema).compile())
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="memory")
+@pytest.mark.parametrize("resources", [100, 1000])
+def test_mutate_nested_memory(benchmark, resources):
+    definition = SchemaParser(nested_schema()).compile()
+    document = nested_document(resources)
+    benchmark.extra_info.update(
+        measure_memory(mutate_fields, copy.deepcopy(document), definition, "Dataset")
+    )
+    run_mutate(benchmark, definition, document)
+
+
+@pytest.mark.usefixtures("with_plugins", "no_memo")
+@pytest.mark.benchmark(group="table")
+@pytest.mark.parametrize("size", [100, 10000])
+def test_table_rows(benchmark, size):
+    definition = SchemaParser(table_schema()).compile()
+    benchmark.pedantic(
+        lambda records: list(iter_transmute(records, definition, "Dataset")),
+        setup=lambda: ((table_records(size),), {}),
+        rounds=5,
+    )
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.benchmark(group="table")
+@pytest.mark.parametrize("size", [100, 10000])
+def test_table_columns(benchmark, size):
+    pytest.importorskip("pyarrow")
+    schema = SchemaParser(table_schema()).compile().types["Dataset"]
+
+    def run(records):
+        columnar.to_records(records, columnar.transmute(records, schema))
+
+    benchmark.pedantic(run, setup=lambda: ((table_records(size),), {}), rounds=5)
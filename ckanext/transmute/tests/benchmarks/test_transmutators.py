@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from typing import Any
+
+import pytest
+from dateutil.parser import parse
+
+from ckanext.transmute import lookup, mapping
+from ckanext.transmute.schema import SchemaParser
+from ckanext.transmute.tests.helpers import build_schema
+from ckanext.transmute.transmutators import parse_isodate
+from ckanext.transmute.types import Field
+
+CASES = [
+    ("tsm_name_validator", [], "hello-world"),
+    ("tsm_to_lowercase", [], "Hello World"),
+    ("tsm_to_uppercase", [], "Hello World"),
+    ("tsm_string_only", [], "hello"),
+    ("tsm_isodate", [], "2024-01-01T10:20:30.123456"),
+    ("tsm_isodate", [], "Jan 1 2024 10:20"),
+    ("tsm_isodate", [], datetime(2024, 1, 1)),
+    ("tsm_to_string", [], 42),
+    ("tsm_stop_on_empty", [], "hello"),
+    ("tsm_get_nested", ["a", "b"], {"a": {"b": 1}}),
+    ("tsm_trim_string", [5], "hello world"),
+    ("tsm_concat", ["Hello ", "$self", "$other", "!"], "world"),
+    ("tsm_unique_only", [], list(range(100)) * 2),
+    ("tsm_mapper", [{"cc-by": "CC-BY-4.0"}], "cc-by"),
+    ("tsm_list_mapper", [{"cc-by": "CC-BY-4.0"}], ["cc-by", "other"] * 50),
+    ("tsm_map_value", ["me", "COOL USER", "user"], "me"),
+]
+
+# transmutators backed by tables registered by the `tables` fixture
+TABLE_CASES = [
+    ("tsm_lookup", ["orcid"], "id-1"),
+    ("tsm_lookup", ["orcid", "unknown"], [f"id-{i}" for i in range(50)] * 2),
+    ("tsm_mapper", ["licenses"], "cc-by"),
+    ("tsm_list_mapper", ["licenses"], ["cc-by", "other"] * 50),
+]
+
+
+@pytest.fixture
+def tables(tmp_path, monkeypatch):
+    """Register lookup table `orcid` and mapping table `licenses`."""
+    db = tmp_path / "orcid.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE lookup (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany(
+        "INSERT INTO lookup VALUES (?, ?)",
+        [(f"id-{i}", f"name-{i}") for i in range(1000)],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setitem(lookup._tables, "orcid", lookup.LookupTable("orcid", str(db)))
+
+    csv_file = tmp_path / "licenses.csv"
+    csv_file.write_text("key,value\ncc-by,CC-BY-4.0\nodc-odbl,ODbL-1.0\n")
+    monkeypatch.setitem(
+        mapping._tables, "licenses", mapping.MappingTable("licenses", str(csv_file))
+    )
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.benchmark(group="transmutators")
+@pytest.mark.parametrize(
+    ("name", "args", "value"),
+    CASES,
+    ids=[f"{name}-{i}" for i, (name, _args, _value) in enumerate(CASES)],
+)
+def test_transmutator(benchmark, name, args, value):
+    _benchmark_transmutator(benchmark, name, args, value)
+
+
+@pytest.mark.usefixtures("with_plugins", "tables")
+@pytest.mark.benchmark(group="table-transmutators")
+@pytest.mark.parametrize(
+    ("name", "args", "value"),
+    TABLE_CASES,
+    ids=[f"{name}-{i}" for i, (name, _args, _value) in enumerate(TABLE_CASES)],
+)
+def test_table_transmutator(benchmark, name, args, value):
+    _benchmark_transmutator(benchmark, name, args, value)
+
+
+def _benchmark_transmutator(benchmark: Any, name: str, args: list[Any], value: Any):
+    schema = build_schema({"field": {"validators": [[name, *args] if args else name]}})
+    (field,) = SchemaParser(schema).compile().types["Dataset"].fields
+    ((fn, bound_args),) = field.validators
+    data = {"field": value, "other": "other"}
+
+    def call():
+        return fn(Field("field", value, "Dataset", data), *bound_args)
+
+    benchmark(call)
+
+
+@pytest.mark.benchmark(group="isodate-tiers")
+@pytest.mark.parametrize(
+    "parser", [parse_isodate, parse], ids=["fromisoformat", "dateutil"]
+)
+def test_isodate_tiers(benchmark, parser):
+    benchmark(parser, "2024-01-01T10:20:30.123456")
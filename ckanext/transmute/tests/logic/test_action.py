@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+from datetime import datetime
 from typing import Any
 
 import pytest
 
 import ckan.lib.helpers as h
+import ckan.lib.navl.dictization_functions as df
 from ckan.logic import ValidationError
 from ckan.tests.helpers import call_action
 
+from ckanext.transmute import utils
 from ckanext.transmute.exception import SchemaParsingError
+from ckanext.transmute.logic import action
+from ckanext.transmute.schema import SchemaParser
 from ckanext.transmute.tests.helpers import build_schema
 from ckanext.transmute.types import MODE_FIRST_FILLED
+from ckanext.transmute.utils import LRUCache
 
 
 @pytest.mark.usefixtures("with_plugins")
@@ -718,3 +726,933 @@ class TestTransmuteAction:
         )
 
         assert result["field_3"] == data["field_2"]
+
+    def test_transmute_cached_schema_not_shared(self):
+        """Mutable defaults of the cached schema are not shared with data."""
+        tsm_schema = build_schema({"tags": {"default": ["one"]}})
+
+        first = call_action("tsm_transmute", data={}, schema=tsm_schema)
+        first["tags"].append("two")
+
+        second = call_action("tsm_transmute", data={}, schema=tsm_schema)
+        assert second["tags"] == ["one"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestTransmuteManyAction:
+    def test_results_in_order(self):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_to_uppercase"]}})
+
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"title": "a"}, {"title": "b"}],
+            schema=tsm_schema,
+        )
+
+        assert result == [
+            {"success": True, "result": {"title": "A"}, "errors": {}},
+            {"success": True, "result": {"title": "B"}, "errors": {}},
+        ]
+
+    def test_failure_does_not_abort_batch(self):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_string_only"]}})
+
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"title": 1}, {"title": "b"}],
+            schema=tsm_schema,
+        )
+
+        assert not result[0]["success"]
+        assert result[0]["errors"] == {"Dataset:title": ["Must be a string value"]}
+        assert result[1]["success"]
+        assert result[1]["result"] == {"title": "b"}
+
+    def test_crash_does_not_abort_batch(self, monkeypatch):
+        def tsm_crash(field):
+            if field.value == "boom":
+                raise RuntimeError("cannot process")
+            return field
+
+        utils.get_all_transmutators()
+        monkeypatch.setitem(utils._transmutator_cache, "tsm_crash", tsm_crash)
+        tsm_schema = build_schema({"title": {"validators": ["tsm_crash"]}})
+
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"title": "a"}, {"title": "boom"}, {"title": "c"}],
+            schema=tsm_schema,
+        )
+
+        assert [r["success"] for r in result] == [True, False, True]
+        assert result[1]["errors"] == {"message": ["RuntimeError: cannot process"]}
+        assert result[2]["result"] == {"title": "c"}
+
+    def test_data_must_be_list(self):
+        with pytest.raises(ValidationError):
+            call_action(
+                "tsm_transmute_many",
+                data={"title": "a"},
+                schema=build_schema({}),
+            )
+
+    def test_schema_required(self):
+        with pytest.raises(ValidationError):
+            call_action("tsm_transmute_many", data=[{}])
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestMemoization:
+    @pytest.fixture
+    def memo(self, monkeypatch):
+        cache = LRUCache(10)
+        monkeypatch.setattr(action, "memo_cache", cache)
+        return cache
+
+    def test_pure_chain_memoized(self, memo):
+        tsm_schema = build_schema(
+            {"license": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}}
+        )
+
+        for _ in range(3):
+            result = call_action(
+                "tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema
+            )
+            assert result == {"license": "CC-BY"}
+
+        assert memo.stats()["hits"] == 2
+
+    def test_inline_mapping_memoized(self, memo):
+        tsm_schema = build_schema(
+            {"license": {"validators": [["tsm_mapper", {"cc-by": "CC-BY"}]]}}
+        )
+
+        for _ in range(2):
+            result = call_action(
+                "tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema
+            )
+            assert result == {"license": "CC-BY"}
+
+        assert memo.stats()["hits"] == 1
+
+    def test_invalid_value_not_memoized(self, memo):
+        tsm_schema = build_schema({"license": {"validators": ["tsm_string_only"]}})
+
+        for _ in range(2):
+            with pytest.raises(ValidationError):
+                call_action("tsm_transmute", data={"license": 1}, schema=tsm_schema)
+
+        assert len(memo) == 0
+
+    def test_impure_chain_not_memoized(self, memo):
+        tsm_schema = build_schema({"title": {"validators": [["tsm_concat", "$self"]]}})
+
+        call_action("tsm_transmute", data={"title": "a"}, schema=tsm_schema)
+
+        assert memo.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 10}
+
+    def test_unhashable_value(self, memo):
+        tsm_schema = build_schema({"tags": {"validators": ["tsm_unique_only"]}})
+
+        result = call_action("tsm_transmute", data={"tags": [1, 1]}, schema=tsm_schema)
+
+        assert result == {"tags": [1]}
+        assert len(memo) == 0
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestProfiling:
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "title": {
+                            "validators": ["tsm_string_only", "tsm_to_uppercase"]
+                        },
+                        "resources": {"type": "Resource", "multiple": True},
+                    }
+                },
+                "Resource": {
+                    "fields": {"format": {"validators": ["tsm_to_lowercase"]}}
+                },
+            },
+        }
+
+    def test_disabled_by_default(self, tsm_schema):
+        context = {}
+        call_action("tsm_transmute", context, data={"title": "a"}, schema=tsm_schema)
+        assert "tsm_profile_report" not in context
+
+    def test_report(self, tsm_schema, monkeypatch):
+        monkeypatch.setattr(action, "memo_cache", LRUCache(0))
+        context: dict[str, Any] = {"tsm_profile": True}
+        call_action(
+            "tsm_transmute",
+            context,
+            data={"title": "a", "resources": [{"format": "CSV"}, {"format": "XLS"}]},
+            schema=tsm_schema,
+        )
+
+        report = context["tsm_profile_report"]
+        assert report["total"] > 0
+        assert report["types"]["Dataset"]["calls"] == 1
+        assert report["types"]["Resource"]["calls"] == 2
+        assert report["fields"]["Dataset:title"]["calls"] == 1
+        assert report["fields"]["Resource:format"]["calls"] == 2
+        assert report["transmutators"]["tsm_to_lowercase"]["calls"] == 2
+        assert report["transmutators"]["tsm_string_only"]["calls"] == 1
+
+    def test_failed_transmutation_reported(self, tsm_schema):
+        context: dict[str, Any] = {"tsm_profile": True}
+        with pytest.raises(ValidationError):
+            call_action("tsm_transmute", context, data={"title": 1}, schema=tsm_schema)
+
+        report = context["tsm_profile_report"]
+        assert report["transmutators"]["tsm_string_only"]["calls"] == 1
+        assert "tsm_to_uppercase" not in report["transmutators"]
+
+    def test_callable_sink(self, tsm_schema):
+        reports = []
+        call_action(
+            "tsm_transmute_many",
+            {"tsm_profile": reports.append},
+            data=[{"title": "a"}, {"title": "b"}],
+            schema=tsm_schema,
+        )
+
+        (report,) = reports
+        assert report["fields"]["Dataset:title"]["calls"] == 2
+
+    @pytest.mark.ckan_config("ckanext.transmute.profile", "true")
+    def test_enabled_by_config(self, tsm_schema, caplog):
+        context = {}
+        with caplog.at_level("INFO", logger="ckanext.transmute.profile"):
+            call_action(
+                "tsm_transmute", context, data={"title": "a"}, schema=tsm_schema
+            )
+
+        assert "tsm_profile_report" in context
+        assert "Transmutation profile" in caplog.text
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestCollectErrors:
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "title": {"validators": ["tsm_string_only"]},
+                        "notes": {"validators": ["tsm_string_only"]},
+                        "resources": {"type": "Resource", "multiple": True},
+                    }
+                },
+                "Resource": {"fields": {"format": {"validators": ["tsm_string_only"]}}},
+            },
+        }
+
+    @pytest.fixture
+    def data(self):
+        return {
+            "title": 1,
+            "notes": 2,
+            "resources": [{"format": "csv"}, {"format": 3}, {"format": 4}],
+        }
+
+    def test_first_error_by_default(self, tsm_schema, data):
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert e.value.error_dict == {"Dataset:title": ["Must be a string value"]}
+
+    def test_all_errors(self, tsm_schema, data):
+        with pytest.raises(ValidationError) as e:
+            call_action(
+                "tsm_transmute", data=data, schema=tsm_schema, collect_errors=True
+            )
+
+        assert e.value.error_dict == {
+            "Dataset.title": ["Must be a string value"],
+            "Dataset.notes": ["Must be a string value"],
+            "Dataset.resources[1].format": ["Must be a string value"],
+            "Dataset.resources[2].format": ["Must be a string value"],
+        }
+
+    def test_valid_data(self, tsm_schema):
+        result = call_action(
+            "tsm_transmute",
+            data={"title": "a", "resources": [{"format": "csv"}]},
+            schema=tsm_schema,
+            collect_errors=True,
+        )
+        assert result == {"title": "a", "resources": [{"format": "csv"}]}
+
+    @pytest.mark.ckan_config("ckanext.transmute.max_errors", "3")
+    def test_max_errors(self, tsm_schema, data):
+        with pytest.raises(ValidationError) as e:
+            call_action(
+                "tsm_transmute", data=data, schema=tsm_schema, collect_errors=True
+            )
+
+        assert e.value.error_dict == {
+            "Dataset.title": ["Must be a string value"],
+            "Dataset.notes": ["Must be a string value"],
+            "Dataset.resources[1].format": ["Must be a string value"],
+            "message": ["Validation stopped after 3 errors"],
+        }
+
+    def test_transmute_many(self, tsm_schema, data):
+        result = call_action(
+            "tsm_transmute_many",
+            data=[data, {"title": "a"}],
+            schema=tsm_schema,
+            collect_errors=True,
+        )
+
+        assert len(result[0]["errors"]) == 4
+        assert result[1]["success"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestColumnar:
+    @pytest.fixture
+    def columns(self, monkeypatch):
+        calls = []
+        process = action._process_column
+
+        def spy(field, items, known):
+            calls.append((field.name, len(items)))
+            return process(field, items, known)
+
+        monkeypatch.setattr(action, "_process_column", spy)
+        return calls
+
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "resources": {"type": "Resource", "multiple": True},
+                    }
+                },
+                "Resource": {
+                    "fields": {
+                        "format": {
+                            "validators": [
+                                "tsm_to_lowercase",
+                                ["tsm_mapper", {"xls": "excel"}],
+                            ],
+                        },
+                        "created": {"validators": ["tsm_isodate"]},
+                        "size": {"validators": ["tsm_to_string"], "map": "bytes"},
+                        "state": {"default": "active"},
+                    }
+                },
+            },
+        }
+
+    def test_nested_items(self, tsm_schema, columns):
+        result = call_action(
+            "tsm_transmute",
+            data={
+                "resources": [
+                    {"format": "CSV", "created": "2024-01-01", "size": 1},
+                    {"format": "XLS"},
+                ]
+            },
+            schema=tsm_schema,
+        )
+
+        assert result == {
+            "resources": [
+                {
+                    "format": "csv",
+                    "created": datetime(2024, 1, 1),
+                    "bytes": "1",
+                    "state": "active",
+                },
+                {"format": "excel", "state": "active"},
+            ]
+        }
+        assert ("format", 2) in columns
+
+    def test_invalid_item_reported_as_usual(self, tsm_schema, columns):
+        data = {
+            "resources": [
+                {"format": "CSV", "created": "2024-01-01"},
+                {"format": "XLS", "created": "not a date"},
+            ]
+        }
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert e.value.error_dict == {"Resource:created": ["Date format incorrect"]}
+        assert columns
+
+    def test_dependent_fields_processed_by_rows(self, tsm_schema, columns):
+        tsm_schema["types"]["Resource"]["fields"]["name"] = {
+            "validators": [["tsm_concat", "$self", "!"]]
+        }
+        call_action(
+            "tsm_transmute",
+            data={"resources": [{"name": "a"}, {"name": "b"}]},
+            schema=tsm_schema,
+        )
+        assert not columns
+
+    def test_transmute_many(self, columns):
+        tsm_schema = build_schema(
+            {"title": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}}
+        )
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"title": "a"}, {"title": "b"}],
+            schema=tsm_schema,
+        )
+
+        assert [r["result"] for r in result] == [{"title": "A"}, {"title": "B"}]
+        assert columns == [("title", 2)]
+
+    def test_transmute_many_fallback(self, columns):
+        tsm_schema = build_schema(
+            {"title": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}}
+        )
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"title": "a"}, {"title": 1}],
+            schema=tsm_schema,
+        )
+
+        assert result == [
+            {"success": True, "result": {"title": "A"}, "errors": {}},
+            {
+                "success": False,
+                "result": None,
+                "errors": {"Dataset:title": ["Must be a string value"]},
+            },
+        ]
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestFieldReuse:
+    @pytest.fixture
+    def fields(self, monkeypatch):
+        seen = []
+
+        def tsm_record(field):
+            seen.append((id(field), field.field_name, field.value))
+            return field
+
+        utils.get_all_transmutators()
+        monkeypatch.setitem(utils._transmutator_cache, "tsm_record", tsm_record)
+        return seen
+
+    def test_field_reused_by_following_fields(self, fields):
+        tsm_schema = build_schema(
+            {
+                "title": {"validators": ["tsm_record"]},
+                "name": {"validators": ["tsm_record"]},
+            }
+        )
+
+        call_action(
+            "tsm_transmute", data={"title": "a", "name": "b"}, schema=tsm_schema
+        )
+
+        assert [(name, value) for _id, name, value in fields] == [
+            ("title", "a"),
+            ("name", "b"),
+        ]
+        assert fields[0][0] == fields[1][0]
+
+    def test_released_field_does_not_keep_data(self, fields):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_record"]}})
+        call_action("tsm_transmute", data={"title": "a"}, schema=tsm_schema)
+
+        assert action._field_pool
+        assert all(
+            field.value is None and field.data is None for field in action._field_pool
+        )
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestIncremental:
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        seen = []
+
+        def tsm_record(field):
+            seen.append(field.field_name)
+            return field
+
+        utils.get_all_transmutators()
+        monkeypatch.setitem(utils._transmutator_cache, "tsm_record", tsm_record)
+        return seen
+
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "title": {"validators": ["tsm_record", "tsm_to_uppercase"]},
+                        "name": {
+                            "default_from": "title",
+                            "validators": ["tsm_record", "tsm_to_lowercase"],
+                        },
+                        "notes": {
+                            "validators": [
+                                "tsm_record",
+                                ["tsm_concat", "$title", ": ", "$self"],
+                            ]
+                        },
+                        "id": {"validators": ["tsm_record"], "map": "identifier"},
+                        "resources": {"type": "Resource", "multiple": True},
+                    },
+                    "post-fields": {"identifier": {"remove": True}},
+                },
+                "Resource": {
+                    "fields": {
+                        "format": {"validators": ["tsm_record", "tsm_to_lowercase"]},
+                    }
+                },
+            },
+        }
+
+    @pytest.fixture
+    def data(self):
+        return {
+            "title": "hello",
+            "notes": "world",
+            "id": "123",
+            "resources": [{"format": "CSV"}, {"format": "XLS"}],
+        }
+
+    def transmute(self, data, tsm_schema):
+        return call_action("tsm_transmute", data=copy.deepcopy(data), schema=tsm_schema)
+
+    @pytest.mark.parametrize(
+        ("key", "value", "expected"),
+        [
+            ("title", "bye", ["title", "name", "notes"]),
+            ("notes", "moon", ["notes"]),
+            ("id", "456", ["id"]),
+            ("resources", [{"format": "PDF"}], ["format"]),
+            ("extra", 1, []),
+        ],
+    )
+    def test_only_affected_fields_processed(
+        self, tsm_schema, data, calls, key, value, expected
+    ):
+        previous = self.transmute(data, tsm_schema)
+        modified = dict(data, **{key: value})
+        full = self.transmute(modified, tsm_schema)
+        calls.clear()
+
+        result = call_action(
+            "tsm_transmute_incremental",
+            data=modified,
+            previous=previous,
+            changed=[key],
+            schema=tsm_schema,
+        )
+
+        assert result == full
+        assert calls == expected
+
+    def test_references_from_nested_types(self, tsm_schema, data, calls):
+        tsm_schema["types"]["Resource"]["fields"]["name"] = {
+            "validators": [["tsm_concat", "$title", " resource"]],
+            "validate_missing": True,
+        }
+        previous = self.transmute(data, tsm_schema)
+        modified = dict(data, title="bye")
+        calls.clear()
+
+        result = call_action(
+            "tsm_transmute_incremental",
+            data=modified,
+            previous=previous,
+            changed=["title"],
+            schema=tsm_schema,
+        )
+
+        assert calls.count("format") == 2
+        assert result == self.transmute(modified, tsm_schema)
+        assert result["resources"][0]["name"] == "BYE resource"
+
+    @pytest.mark.parametrize(
+        ("key", "expected"), [("title", ["title", "title"]), ("notes", [])]
+    )
+    def test_overwritten_fields(self, calls, key, expected):
+        tsm_schema = {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "pre-fields": {
+                        "title": {"validators": ["tsm_record", "tsm_to_lowercase"]}
+                    },
+                    "fields": {
+                        "title": {
+                            "validators": ["tsm_record", ["tsm_concat", "$self", "!"]]
+                        },
+                    },
+                }
+            },
+        }
+        data = {"title": "Hello", "notes": "world"}
+        previous = self.transmute(data, tsm_schema)
+        modified = dict(data, **{key: "Bye"})
+        full = self.transmute(modified, tsm_schema)
+        calls.clear()
+
+        result = call_action(
+            "tsm_transmute_incremental",
+            data=modified,
+            previous=previous,
+            changed=[key],
+            schema=tsm_schema,
+        )
+
+        assert result == full
+        assert calls == expected
+
+    def test_changes_detected_from_previous_data(self, tsm_schema, data, calls):
+        previous = self.transmute(data, tsm_schema)
+        modified = dict(data, notes="moon")
+        calls.clear()
+
+        result = call_action(
+            "tsm_transmute_incremental",
+            data=modified,
+            previous=previous,
+            previous_data=data,
+            schema=tsm_schema,
+        )
+
+        assert calls == ["notes"]
+        assert result == self.transmute(modified, tsm_schema)
+
+    def test_data_is_not_modified(self, tsm_schema, data, calls):
+        previous = self.transmute(data, tsm_schema)
+        modified = dict(data, resources=[{"format": "PDF"}])
+
+        call_action(
+            "tsm_transmute_incremental",
+            data=modified,
+            previous=previous,
+            changed=["resources"],
+            schema=tsm_schema,
+        )
+
+        assert modified["resources"] == [{"format": "PDF"}]
+
+    def test_changes_are_required(self, tsm_schema, data, calls):
+        with pytest.raises(ValidationError):
+            call_action(
+                "tsm_transmute_incremental",
+                data=data,
+                previous=self.transmute(data, tsm_schema),
+                schema=tsm_schema,
+            )
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestValidate:
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "title": {
+                            "validators": ["tsm_string_only", "tsm_to_lowercase"],
+                            "map": "name",
+                        },
+                        "notes": {
+                            "default_from": "name",
+                            "validators": [["tsm_concat", "$self", "!"]],
+                        },
+                        "created": {"validators": ["tsm_isodate"]},
+                        "state": {"value": "active"},
+                        "resources": {"type": "Resource", "multiple": True},
+                    },
+                    "post-fields": {"title": {"remove": True}},
+                },
+                "Resource": {
+                    "fields": {"format": {"validators": ["tsm_string_only"]}},
+                },
+            },
+        }
+
+    def test_valid(self, tsm_schema):
+        data = {
+            "title": "Hello",
+            "created": "2024-01-01",
+            "resources": [{"format": "CSV"}],
+        }
+        original = copy.deepcopy(data)
+
+        result = call_action("tsm_validate", data=data, schema=tsm_schema)
+
+        assert result == {"success": True, "errors": {}}
+        assert data == original
+
+    def test_invalid(self, tsm_schema):
+        data = {"title": 1, "created": "not a date"}
+
+        result = call_action("tsm_validate", data=data, schema=tsm_schema)
+
+        assert result == {
+            "success": False,
+            "errors": {"Dataset:title": ["Must be a string value"]},
+        }
+        assert data == {"title": 1, "created": "not a date"}
+
+    def test_collect_errors(self, tsm_schema):
+        data = {
+            "title": "Hello",
+            "created": "not a date",
+            "resources": [{"format": "CSV"}, {"format": 1}],
+        }
+
+        result = call_action(
+            "tsm_validate", data=data, schema=tsm_schema, collect_errors=True
+        )
+
+        assert result == {
+            "success": False,
+            "errors": {
+                "Dataset.created": ["Date format incorrect"],
+                "Dataset.resources[1].format": ["Must be a string value"],
+            },
+        }
+
+    def test_same_errors_as_transmutation(self, tsm_schema):
+        data = {"title": "Hello", "resources": [{"format": 1}]}
+
+        result = call_action("tsm_validate", data=data, schema=tsm_schema)
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert result["errors"] == e.value.error_dict
+
+    def test_static_values_and_removals_applied(self):
+        tsm_schema = build_schema(
+            {
+                "type": {"value": "dataset"},
+                "kind": {
+                    "default_from": "type",
+                    "validators": [["tsm_map_value", "dataset", 1], "tsm_string_only"],
+                },
+                "secret": {"remove": True},
+                "hint": {"default_from": "secret", "validators": ["tsm_string_only"]},
+                "title": {"map": "name"},
+                "name": {"validators": ["tsm_string_only"]},
+            }
+        )
+        data = {"secret": 1, "title": 2}
+
+        result = call_action(
+            "tsm_validate", data=data, schema=tsm_schema, collect_errors=True
+        )
+        assert data == {"secret": 1, "title": 2}
+
+        with pytest.raises(ValidationError) as e:
+            call_action(
+                "tsm_transmute", data=data, schema=tsm_schema, collect_errors=True
+            )
+
+        assert result["errors"] == e.value.error_dict
+        assert set(result["errors"]) == {
+            "Dataset.kind",
+            "Dataset.hint",
+            "Dataset.name",
+        }
+
+    def test_updated_value_not_modified(self):
+        tsm_schema = build_schema({"extras": {"value": {"b": 2}, "update": True}})
+        data = {"extras": {"a": 1}}
+
+        result = call_action("tsm_validate", data=data, schema=tsm_schema)
+
+        assert result == {"success": True, "errors": {}}
+        assert data == {"extras": {"a": 1}}
+
+    def test_values_modified_in_place(self, monkeypatch):
+        def tsm_append(field):
+            field.value.append("new")
+            return field
+
+        utils.get_all_transmutators()
+        monkeypatch.setitem(utils._transmutator_cache, "tsm_append", tsm_append)
+        tsm_schema = build_schema(
+            {
+                "tags": {"validators": ["tsm_append"]},
+                "resources": {"type": "Resource", "multiple": True},
+            }
+        )
+        tsm_schema["types"]["Resource"] = {
+            "fields": {"tags": {"validators": ["tsm_append"]}}
+        }
+        data = {"tags": ["a"], "resources": [{"tags": ["b"]}]}
+
+        result = call_action("tsm_validate", data=data, schema=tsm_schema)
+
+        assert result == {"success": True, "errors": {}}
+        assert data == {"tags": ["a"], "resources": [{"tags": ["b"]}]}
+
+    def test_data_must_be_a_dict(self, tsm_schema):
+        with pytest.raises(ValidationError):
+            call_action("tsm_validate", data=[], schema=tsm_schema)
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestAsync:
+    @pytest.fixture
+    def active(self, monkeypatch):
+        state = {"current": 0, "max": 0, "calls": []}
+
+        async def tsm_slow_upper(field, delay=0.01):
+            state["current"] += 1
+            state["max"] = max(state["max"], state["current"])
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                state["current"] -= 1
+
+            state["calls"].append(field.value)
+            if field.value == "invalid":
+                raise df.Invalid("Invalid value")
+
+            field.value = field.value.upper()
+            return field
+
+        utils.get_all_transmutators()
+        monkeypatch.setitem(utils._transmutator_cache, "tsm_slow_upper", tsm_slow_upper)
+        return state
+
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "title": {"validators": ["tsm_slow_upper"]},
+                        "summary": {
+                            "validators": [["tsm_concat", "$title", ": ", "$self"]]
+                        },
+                        "notes": {"validators": [["tsm_slow_upper", 0.02]]},
+                        "resources": {"type": "Resource", "multiple": True},
+                    },
+                },
+                "Resource": {
+                    "fields": {
+                        "format": {"validators": ["tsm_slow_upper"]},
+                        "name": {
+                            "validators": [["tsm_concat", "$title", "-", "$self"]]
+                        },
+                    }
+                },
+            },
+        }
+
+    @pytest.fixture
+    def data(self):
+        return {
+            "title": "hello",
+            "notes": "world",
+            "summary": "sum",
+            "resources": [{"format": "csv", "name": str(i)} for i in range(5)],
+        }
+
+    def test_async_types(self, tsm_schema, active):
+        definition = SchemaParser(tsm_schema).compile()
+
+        assert definition.async_types == {"Dataset", "Resource"}
+
+    def test_transmute(self, tsm_schema, data, active):
+        result = call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert result == {
+            "title": "HELLO",
+            "notes": "WORLD",
+            "summary": "HELLO: sum",
+            "resources": [{"format": "CSV", "name": f"HELLO-{i}"} for i in range(5)],
+        }
+
+    def test_fields_and_items_are_concurrent(self, tsm_schema, data, active):
+        call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert active["max"] == 6
+
+    @pytest.mark.ckan_config(action.CONFIG_CONCURRENCY, 2)
+    def test_concurrency_limit(self, tsm_schema, data, active):
+        call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert active["max"] == 2
+
+    def test_first_invalid_field_reported(self, tsm_schema, data, active):
+        # format of the resource fails first, but notes are declared earlier
+        data["notes"] = "invalid"
+        data["resources"][0]["format"] = "invalid"
+
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert e.value.error_dict == {"Dataset:notes": ["Invalid value"]}
+
+    def test_invalid_item(self, tsm_schema, data, active):
+        data["resources"][3]["format"] = "invalid"
+
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert e.value.error_dict == {"Resource:format": ["Invalid value"]}
+
+    def test_collect_errors(self, tsm_schema, data, active):
+        data["notes"] = "invalid"
+        data["resources"][1]["format"] = "invalid"
+
+        with pytest.raises(ValidationError) as e:
+            call_action(
+                "tsm_transmute", data=data, schema=tsm_schema, collect_errors=True
+            )
+
+        assert e.value.error_dict == {
+            "Dataset.notes": ["Invalid value"],
+            "Dataset.resources[1].format": ["Invalid value"],
+        }
+
+    def test_same_result_as_sync_engine(self, tsm_schema, data, active):
+        definition = SchemaParser(tsm_schema).compile()
+        expected = copy.deepcopy(data)
+        action.data_ctx.set(expected)
+        for field in definition.types["Dataset"].fields:
+            action._process_field(field, expected, definition)
+
+        action.data_ctx.set(data)
+        asyncio.run(action.amutate_fields(data, definition, "Dataset"))
+
+        assert data == expected
+
+    def test_running_event_loop(self, tsm_schema, data, active):
+        definition = SchemaParser(tsm_schema).compile()
+
+        async def transmute():
+            return action.transmute_record(data, definition, "Dataset")
+
+        result = asyncio.run(transmute())
+
+        assert result["success"], result["errors"]
+        assert result["result"]["title"] == "HELLO"
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from ckan.cli.cli import ckan
+
+from ckanext.transmute.tests.helpers import build_schema
+
+
+@pytest.fixture
+def schema_file(tmp_path):
+    path = tmp_path / "schema.json"
+    path.write_text(
+        json.dumps(
+            build_schema(
+                {
+                    "title": {"validators": ["tsm_string_only"], "map": "name"},
+                    "created": {"validators": ["tsm_isodate"]},
+                }
+            )
+        )
+    )
+    return str(path)
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestRun:
+    def test_records_transmuted(self, cli, schema_file, tmp_path):
+        source = "\n".join(
+            [
+                json.dumps({"title": "a", "created": "2022-01-01"}),
+                "",
+                json.dumps({"title": "b"}),
+            ]
+        )
+        output = tmp_path / "output.jsonl"
+        result = cli.invoke(
+            ckan,
+            ["transmute", "run", "--schema", schema_file, "--output", str(output)],
+            input=source,
+        )
+
+        assert result.exit_code == 0, result.output
+        assert [json.loads(line) for line in output.read_text().splitlines()] == [
+            {"name": "a", "created": "2022-01-01T00:00:00"},
+            {"name": "b"},
+        ]
+
+    def test_failures_reported(self, cli, schema_file, tmp_path):
+        source = tmp_path / "source.jsonl"
+        lines = [json.dumps({"title": 1}), "not json", json.dumps({"title": "c"})]
+        source.write_text("\n".join(lines))
+        output = tmp_path / "output.jsonl"
+
+        result = cli.invoke(
+            ckan,
+            [
+                "transmute",
+                "run",
+                str(source),
+                "--schema",
+                schema_file,
+                "--output",
+                str(output),
+            ],
+        )
+
+        assert result.exit_code == 1
+        assert output.read_text().splitlines() == [json.dumps({"name": "c"})]
+        errors = [
+            json.loads(line)
+            for line in result.output.splitlines()
+            if line.startswith('{"line"')
+        ]
+        assert [e["line"] for e in errors] == [1, 2]
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_crash_reported(self, cli, tmp_path, workers):
+        schema_file = tmp_path / "schema.json"
+        schema_file.write_text(
+            json.dumps(build_schema({"title": {"validators": ["tsm_to_uppercase"]}}))
+        )
+        source = "\n".join(json.dumps({"title": t}) for t in ["a", 1, "c"])
+        output = tmp_path / "output.jsonl"
+
+        result = cli.invoke(
+            ckan,
+            [
+                "transmute",
+                "run",
+                "--schema",
+                str(schema_file),
+                "--output",
+                str(output),
+                "--workers",
+                workers,
+            ],
+            input=source,
+        )
+
+        assert result.exit_code == 1
+        assert [json.loads(line) for line in output.read_text().splitlines()] == [
+            {"title": "A"},
+            {"title": "C"},
+        ]
+        errors = [
+            json.loads(line)
+            for line in result.output.splitlines()
+            if line.startswith('{"line"')
+        ]
+        assert [e["line"] for e in errors] == [2]
+        assert errors[0]["errors"]["message"][0].startswith("AttributeError")
+
+    def test_multiple_workers(self, cli, schema_file, tmp_path):
+        source = "\n".join(json.dumps({"title": str(i)}) for i in range(20))
+        output = tmp_path / "output.jsonl"
+
+        result = cli.invoke(
+            ckan,
+            [
+                "transmute",
+                "run",
+                "--schema",
+                schema_file,
+                "--output",
+                str(output),
+                "--workers",
+                "2",
+                "--chunk-size",
+                "3",
+            ],
+            input=source,
+        )
+
+        assert result.exit_code == 0, result.output
+        assert [json.loads(line) for line in output.read_text().splitlines()] == [
+            {"name": str(i)} for i in range(20)
+        ]
+
+    def test_collect_errors(self, cli, schema_file, tmp_path):
+        source = json.dumps({"title": 1, "created": "not a date"})
+        output = tmp_path / "output.jsonl"
+
+        result = cli.invoke(
+            ckan,
+            [
+                "transmute",
+                "run",
+                "--schema",
+                schema_file,
+                "--output",
+                str(output),
+                "--collect-errors",
+            ],
+            input=source,
+        )
+
+        assert result.exit_code == 1
+        (error,) = [
+            json.loads(line)
+            for line in result.output.splitlines()
+            if line.startswith('{"line"')
+        ]
+        assert set(error["errors"]) == {"Dataset.title", "Dataset.created"}
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import copy
+from datetime import datetime
+from typing import Any
+
+import pytest
+
+import ckan.lib.navl.dictization_functions as df
+from ckan.logic import ValidationError
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import columnar
+from ckanext.transmute.logic import action
+from ckanext.transmute.schema import SchemaParser
+from ckanext.transmute.tests.helpers import build_schema
+
+pa = pytest.importorskip("pyarrow")
+
+
+def transmute_rows(records: list[dict[str, Any]], schema: dict[str, Any]):
+    records = copy.deepcopy(records)
+    definition = SchemaParser(schema).compile()
+    for result in action.iter_transmute(records, definition, "Dataset"):
+        assert result["success"], result["errors"]
+    return records
+
+
+def transmute_columns(records: list[dict[str, Any]], schema: dict[str, Any]):
+    records = copy.deepcopy(records)
+    definition = SchemaParser(schema).compile()
+    columns = columnar.transmute(records, definition.types["Dataset"])
+    columnar.to_records(records, columns)
+    return records
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.parametrize(
+    ("fields", "records"),
+    [
+        (
+            {"name": {"validators": ["tsm_to_lowercase"]}},
+            [{"name": "HeLLo"}, {"name": "ÀÉÎ"}, {"other": 1}],
+        ),
+        (
+            {"name": {"validators": ["tsm_to_uppercase", ["tsm_trim_string", 3]]}},
+            [{"name": "hello"}, {"name": "straße"}],
+        ),
+        (
+            {"size": {"validators": ["tsm_to_string"], "map": "bytes"}},
+            [{"size": 1}, {"size": None}, {"bytes": "old"}],
+        ),
+        (
+            {"flag": {"validators": ["tsm_to_string"]}},
+            [{"flag": True}, {"flag": False}, {"flag": None}],
+        ),
+        (
+            {"created": {"validators": ["tsm_isodate"]}},
+            [{"created": "2024-01-01"}, {"created": "2024-01-01T10:20:30.123"}],
+        ),
+        (
+            {
+                "format": {
+                    "validators": [["tsm_mapper", {"csv": "CSV", "xls": "XLS"}]]
+                },
+                "license": {"validators": [["tsm_mapper", {"cc": "CC-BY"}, "other"]]},
+            },
+            [
+                {"format": "csv", "license": "cc"},
+                {"format": "pdf", "license": "mit"},
+                {"format": None, "license": None},
+            ],
+        ),
+        (
+            {"name": {"validate_missing": True}, "state": {"value": "active"}},
+            [{"name": "a"}, {}],
+        ),
+    ],
+)
+def test_same_result_as_rows(fields, records):
+    schema = build_schema(fields)
+
+    assert transmute_columns(records, schema) == transmute_rows(records, schema)
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_remove_and_drop_unknown_fields():
+    schema = {
+        "root": "Dataset",
+        "types": {
+            "Dataset": {
+                "drop_unknown_fields": True,
+                "fields": {
+                    "title": {"validators": ["tsm_string_only"], "map": "name"},
+                    "id": {},
+                },
+                "post-fields": {"id": {"remove": True}},
+            }
+        },
+    }
+    records = [{"title": "a", "id": 1, "extra": 1}, {"id": 2, "name": "b"}]
+
+    result = transmute_columns(records, schema)
+
+    assert result == transmute_rows(records, schema)
+    assert result == [{"name": "a"}, {}]
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.parametrize(
+    ("fields", "records"),
+    [
+        ({"created": {"validators": ["tsm_isodate"]}}, [{"created": "2024-02-30"}]),
+        ({"created": {"validators": ["tsm_isodate"]}}, [{"created": "2024-01-01Z"}]),
+        ({"name": {"validators": ["tsm_to_lowercase"]}}, [{"name": None}]),
+        ({"name": {"validators": ["tsm_string_only"]}}, [{"name": 1}]),
+        ({"size": {}}, [{"size": 1}, {"size": 1.5}]),
+        ({"tags": {"validators": ["tsm_unique_only"]}}, [{"tags": ["a"]}]),
+        ({"name": {"default": "x"}}, [{"name": ""}]),
+    ],
+)
+def test_unsupported(fields, records):
+    definition = SchemaParser(build_schema(fields)).compile()
+    original = copy.deepcopy(records)
+
+    with pytest.raises((columnar.ColumnarError, df.Invalid, pa.ArrowInvalid)):
+        columnar.transmute(records, definition.types["Dataset"])
+
+    assert records == original
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestTransmuteMany:
+    @pytest.fixture
+    def tsm_schema(self):
+        return build_schema(
+            {
+                "format": {"validators": ["tsm_to_lowercase"]},
+                "created": {"validators": ["tsm_isodate"]},
+            }
+        )
+
+    @pytest.mark.ckan_config(columnar.CONFIG_MIN_RECORDS, 2)
+    def test_columnar_engine(self, tsm_schema, monkeypatch):
+        calls = []
+        transmute = columnar.transmute
+
+        def spy(records, schema):
+            calls.append(len(records))
+            return transmute(records, schema)
+
+        monkeypatch.setattr(columnar, "transmute", spy)
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"format": "CSV", "created": "2024-01-01"}, {"format": "XLS"}],
+            schema=tsm_schema,
+        )
+
+        assert [r["result"] for r in result] == [
+            {"format": "csv", "created": datetime(2024, 1, 1)},
+            {"format": "xls"},
+        ]
+        assert calls == [2]
+
+    @pytest.mark.ckan_config(columnar.CONFIG_MIN_RECORDS, 2)
+    def test_invalid_records_processed_by_rows(self, tsm_schema):
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"format": "CSV"}, {"created": "not a date"}],
+            schema=tsm_schema,
+        )
+
+        assert result[0] == {"success": True, "result": {"format": "csv"}, "errors": {}}
+        assert result[1]["errors"] == {"Dataset:created": ["Date format incorrect"]}
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestTransmuteTable:
+    def test_table(self):
+        definition = SchemaParser(
+            build_schema({"size": {"validators": ["tsm_to_string"], "map": "bytes"}})
+        ).compile()
+        records = [{"size": 1, "name": "a"}, {"name": "b"}]
+
+        table = action.transmute_table(records, definition, "Dataset")
+
+        assert table.to_pylist() == [
+            {"name": "a", "bytes": "1"},
+            {"name": "b", "bytes": None},
+        ]
+        assert records == [{"size": 1, "name": "a"}, {"name": "b"}]
+
+    def test_fallback_to_rows(self):
+        definition = SchemaParser(
+            build_schema({"tags": {"validators": ["tsm_unique_only"]}})
+        ).compile()
+
+        table = action.transmute_table([{"tags": ["a", "a"]}], definition, "Dataset")
+
+        assert table.to_pylist() == [{"tags": ["a"]}]
+
+    def test_errors(self):
+        definition = SchemaParser(
+            build_schema({"name": {"validators": ["tsm_string_only"]}})
+        ).compile()
+
+        with pytest.raises(ValidationError) as e:
+            action.transmute_table([{"name": "a"}, {"name": 1}], definition, "Dataset")
+
+        assert e.value.error_dict == {"1": {"Dataset:name": ["Must be a string value"]}}
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from ckanext.transmute import harvest, utils
+from ckanext.transmute.exception import SchemaFieldError
+from ckanext.transmute.schema import get_parser
+from ckanext.transmute.tests.helpers import build_schema
+
+
+class Harvester(harvest.TransmuteHarvesterMixin):
+    transmute_schema = "harvest-schema"
+
+    def __init__(self):
+        self.imported: list[dict[str, Any]] = []
+        self.deleted: list[Any] = []
+        self.errors: list[dict[str, Any]] = []
+
+    def import_transmuted(self, harvest_object, data):
+        self.imported.append(data)
+        return True
+
+    def import_deleted(self, harvest_object):
+        self.deleted.append(harvest_object)
+        return "deleted"
+
+    def save_transmute_errors(self, harvest_object, errors):
+        self.errors.append(errors)
+
+
+def make_object(content: Any, source_id: str = "source", config: Any = None):
+    source = SimpleNamespace(config=json.dumps(config) if config else None)
+    if not isinstance(content, str) and content is not None:
+        content = json.dumps(content)
+
+    return SimpleNamespace(
+        id="object-id",
+        content=content,
+        harvest_source_id=source_id,
+        source=source,
+        package_id="package-id",
+        report_status=None,
+    )
+
+
+@pytest.fixture
+def harvester(monkeypatch):
+    monkeypatch.setitem(
+        utils._schema_cache,
+        "harvest-schema",
+        build_schema(
+            {"title": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}}
+        ),
+    )
+    monkeypatch.setitem(
+        utils._schema_cache,
+        "other-schema",
+        build_schema({"title": {"validators": ["tsm_to_lowercase"]}}),
+    )
+    return Harvester()
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestTransmuteHarvesterMixin:
+    def test_import_stage(self, harvester):
+        assert harvester.import_stage(make_object({"title": "hello"}))
+        assert harvester.imported == [{"title": "HELLO"}]
+
+    def test_import_stage_invalid(self, harvester):
+        assert harvester.import_stage(make_object({"title": 1})) is False
+        assert harvester.imported == []
+        assert harvester.errors == [{"Dataset:title": ["Must be a string value"]}]
+
+    def test_transmute_objects(self, harvester):
+        objects = [
+            make_object({"title": "a"}),
+            make_object({"title": "B"}, "other", {"tsm_schema": "other-schema"}),
+            make_object("not json"),
+            make_object([1, 2]),
+            make_object({"title": 1}),
+        ]
+
+        results = harvester.transmute_objects(objects)
+
+        assert [r["result"] for r in results] == [
+            {"title": "A"},
+            {"title": "b"},
+            None,
+            None,
+            None,
+        ]
+        assert results[2]["errors"]["message"][0].startswith("Content cannot be loaded")
+        assert results[4]["errors"] == {"Dataset:title": ["Must be a string value"]}
+
+    def test_one_plan_per_source(self, harvester, monkeypatch):
+        calls = []
+
+        def spy(records, definition, root, collect_errors=False):
+            calls.append((len(records), definition, root))
+            return [{"success": True, "result": r, "errors": {}} for r in records]
+
+        monkeypatch.setattr(harvest, "transmute_many", spy)
+        harvester.transmute_objects([make_object({"title": "a"}) for _ in range(3)])
+
+        assert calls == [(3, get_parser("harvest-schema").compile(), "Dataset")]
+
+    def test_schema_not_configured(self, harvester):
+        harvester.transmute_schema = None
+
+        results = harvester.transmute_objects([make_object({"title": 1})])
+
+        assert results == [{"success": True, "result": {"title": 1}, "errors": {}}]
+
+    def test_missing_schema(self, harvester):
+        obj = make_object({"title": "a"}, config={"tsm_schema": "not-real"})
+
+        assert harvester.transmute_objects([obj])[0]["errors"] == {
+            "message": ["Transmutation schema not-real does not exist"]
+        }
+
+    def test_root_from_config(self, harvester, monkeypatch):
+        schema = build_schema({})
+        schema["types"]["Resource"] = {"fields": {"format": {"default": "csv"}}}
+        monkeypatch.setitem(utils._schema_cache, "harvest-schema", schema)
+
+        obj = make_object({}, config={"tsm_root": "Resource"})
+
+        assert harvester.transmute_objects([obj])[0]["result"] == {"format": "csv"}
+
+    def test_import_objects(self, harvester):
+        objects = [make_object({"title": "a"}), make_object({"title": 1})]
+
+        assert harvester.import_objects(objects) == [True, False]
+        assert harvester.imported == [{"title": "A"}]
+        assert harvester.errors == [{"Dataset:title": ["Must be a string value"]}]
+
+    def test_deleted_objects_not_transmuted(self, harvester):
+        deleted = make_object({"title": 1})
+        deleted.report_status = "deleted"
+        objects = [make_object(None), deleted, make_object({"title": "a"})]
+
+        assert harvester.import_objects(objects) == ["deleted", "deleted", True]
+        assert harvester.deleted == objects[:2]
+        assert harvester.imported == [{"title": "A"}]
+        assert harvester.errors == []
+
+    def test_unknown_transmutator(self, harvester, monkeypatch):
+        field = {"validators": ["tsm_not_real"]}
+        monkeypatch.setitem(
+            utils._schema_cache, "harvest-schema", build_schema({"title": field})
+        )
+
+        result = harvester.transmute_objects([make_object({"title": "a"})])[0]
+
+        assert result["errors"] == {
+            "message": ["Transmutator tsm_not_real does not exist"]
+        }
+
+    def test_schema_field_error(self, harvester, monkeypatch):
+        def plan(harvest_object):
+            raise SchemaFieldError("Field: `default_from` field name is not defined")
+
+        monkeypatch.setattr(harvester, "get_transmute_plan", plan)
+
+        result = harvester.transmute_objects([make_object({"title": "a"})])[0]
+
+        assert result["errors"] == {
+            "message": ["Field: `default_from` field name is not defined"]
+        }
+
+
+class BaseHarvester(harvest.TransmuteHarvesterMixin):
+    """Harvester with helpers of HarvesterBase from ckanext-harvest."""
+
+    def __init__(self):
+        self.calls: list[tuple[Any, ...]] = []
+
+    def _get_user_name(self):
+        return "harvest"
+
+    def _create_or_update_package(self, data, harvest_object, form):
+        self.calls.append((data, harvest_object, form))
+        return "unchanged"
+
+    def _save_object_error(self, message, obj, stage="Fetch", line=None):
+        self.calls.append((message, obj, stage))
+
+
+class TestHarvesterBaseDefaults:
+    def test_package_created_or_updated(self):
+        harvester = BaseHarvester()
+        obj = make_object({})
+
+        assert harvester.import_transmuted(obj, {"name": "a"}) == "unchanged"
+        assert harvester.calls == [({"name": "a"}, obj, "package_show")]
+
+    def test_not_implemented(self):
+        with pytest.raises(NotImplementedError):
+            harvest.TransmuteHarvesterMixin().import_transmuted(make_object({}), {})
+
+    def test_package_deleted(self, monkeypatch):
+        calls = []
+
+        def get_action(name):
+            return lambda context, data_dict: calls.append((name, context, data_dict))
+
+        monkeypatch.setattr(harvest.tk, "get_action", get_action)
+
+        assert BaseHarvester().import_deleted(make_object(None)) is True
+        assert calls == [("package_delete", {"user": "harvest"}, {"id": "package-id"})]
+
+    def test_errors_saved(self):
+        harvester = BaseHarvester()
+        obj = make_object({})
+
+        harvester.save_transmute_errors(obj, {"Dataset:title": ["a", "b"]})
+
+        assert harvester.calls == [("Dataset:title: a; b", obj, "Import")]
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import lookup
+from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.tests.helpers import build_schema
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = tmp_path / "orcid.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE lookup (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany(
+        "INSERT INTO lookup VALUES (?, ?)",
+        [(f"id-{i}", f"name-{i}") for i in range(1200)],
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+@pytest.fixture
+def table(db_file):
+    return lookup.LookupTable("orcid", db_file)
+
+
+@pytest.fixture
+def queries(table):
+    statements = []
+    table.connection().set_trace_callback(statements.append)
+    return statements
+
+
+class TestLookupTable:
+    def test_get(self, table, queries):
+        assert table.get("id-1") == "name-1"
+        assert table.get("id-1") == "name-1"
+        assert len(queries) == 1
+
+    def test_missing_key_cached(self, table, queries):
+        assert table.get("not-real") is None
+        assert table.get("not-real", "default") == "default"
+        assert len(queries) == 1
+
+    def test_get_many(self, table, queries):
+        keys = [f"id-{i}" for i in range(1100)] + ["not-real"]
+
+        result = table.get_many(keys)
+
+        assert len(result) == 1100
+        assert result["id-1099"] == "name-1099"
+        assert len(queries) == 3
+
+        table.get_many(keys)
+        assert len(queries) == 3
+
+    def test_keys_with_same_name(self, db_file):
+        conn = sqlite3.connect(db_file)
+        conn.execute("INSERT INTO lookup VALUES ('1', 'one')")
+        conn.commit()
+        conn.close()
+        table = lookup.LookupTable("orcid", db_file)
+
+        result = table.get_many([1, "1", 2, "2"])
+
+        assert result == {1: "one", "1": "one"}
+        assert table.cache.get(1) == "one"
+        assert table.cache.get(2, "missing") is None
+
+    def test_read_only(self, table):
+        with pytest.raises(sqlite3.OperationalError):
+            table.connection().execute("DELETE FROM lookup")
+
+    def test_missing_database(self, tmp_path):
+        table = lookup.LookupTable("orcid", str(tmp_path / "missing.db"))
+
+        with pytest.raises(TransmutatorError):
+            table.get("id-1")
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestLookupTransmutator:
+    @pytest.fixture(autouse=True)
+    def orcid(self, with_plugins, table, monkeypatch):
+        monkeypatch.setitem(lookup._tables, "orcid", table)
+
+    def test_single_value(self):
+        tsm_schema = build_schema(
+            {
+                "author": {"validators": [["tsm_lookup", "orcid"]]},
+                "editor": {"validators": [["tsm_lookup", "orcid", "unknown"]]},
+            }
+        )
+
+        result = call_action(
+            "tsm_transmute",
+            data={"author": "id-1", "editor": "not-real"},
+            schema=tsm_schema,
+        )
+
+        assert result == {"author": "name-1", "editor": "unknown"}
+
+    def test_list_value(self, queries):
+        tsm_schema = build_schema(
+            {"authors": {"validators": [["tsm_lookup", "orcid"]]}}
+        )
+
+        result = call_action(
+            "tsm_transmute",
+            data={"authors": ["id-1", "not-real", "id-2"]},
+            schema=tsm_schema,
+        )
+
+        assert result == {"authors": ["name-1", "not-real", "name-2"]}
+        assert len(queries) == 1
+
+    def test_unknown_table(self):
+        tsm_schema = build_schema({"author": {"validators": [["tsm_lookup", "other"]]}})
+
+        with pytest.raises(TransmutatorError):
+            call_action("tsm_transmute", data={"author": "id-1"}, schema=tsm_schema)
+
+    def test_batch_of_records(self, queries):
+        tsm_schema = build_schema(
+            {"author": {"validators": [["tsm_lookup", "orcid", "unknown"]]}}
+        )
+
+        result = call_action(
+            "tsm_transmute_many",
+            data=[{"author": "id-1"}, {"author": ["id-2", "id-3"]}, {"author": "x"}],
+            schema=tsm_schema,
+        )
+
+        assert [r["result"] for r in result] == [
+            {"author": "name-1"},
+            {"author": ["name-2", "name-3"]},
+            {"author": "unknown"},
+        ]
+        assert len(queries) == 1
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import mapping
+from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.logic import action
+from ckanext.transmute.tests.helpers import build_schema
+from ckanext.transmute.utils import LRUCache
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "licenses.csv"
+    path.write_text("key,value\ncc-by,CC-BY-4.0\nodc-odbl,ODbL-1.0\n")
+    return path
+
+
+class TestMappingTable:
+    def test_csv(self, csv_file):
+        table = mapping.MappingTable("licenses", str(csv_file))
+
+        assert table.get("cc-by") == "CC-BY-4.0"
+        assert table.get("key") is None
+        assert len(table) == 2
+
+    def test_json(self, tmp_path):
+        path = tmp_path / "licenses.json"
+        path.write_text(json.dumps({"cc-by": "CC-BY-4.0"}))
+        table = mapping.MappingTable("licenses", str(path))
+
+        assert "cc-by" in table
+
+    def test_reload_on_change(self, csv_file):
+        table = mapping.MappingTable("licenses", str(csv_file), reload_interval=0)
+        assert table.get("cc-by") == "CC-BY-4.0"
+
+        csv_file.write_text("key,value\ncc-by,CC-BY\n")
+        stat = csv_file.stat()
+        os.utime(csv_file, (stat.st_atime, stat.st_mtime + 10))
+
+        assert table.get("cc-by") == "CC-BY"
+
+    def test_reload_throttled(self, csv_file):
+        table = mapping.MappingTable("licenses", str(csv_file), reload_interval=3600)
+        assert table.get("cc-by") == "CC-BY-4.0"
+
+        csv_file.write_text("key,value\ncc-by,CC-BY\n")
+        stat = csv_file.stat()
+        os.utime(csv_file, (stat.st_atime, stat.st_mtime + 10))
+
+        assert table.get("cc-by") == "CC-BY-4.0"
+
+    def test_missing_file(self, tmp_path):
+        table = mapping.MappingTable("licenses", str(tmp_path / "missing.csv"))
+
+        with pytest.raises(TransmutatorError):
+            table.get("cc-by")
+
+    @pytest.mark.parametrize("content", ['{"cc-by": ', '["cc-by"]'])
+    def test_invalid_file(self, tmp_path, content):
+        path = tmp_path / "licenses.json"
+        path.write_text(content)
+        table = mapping.MappingTable("licenses", str(path))
+
+        with pytest.raises(TransmutatorError):
+            table.get("cc-by")
+
+    @pytest.mark.parametrize("content", ['{"cc-by": ', '["cc-by"]'])
+    def test_invalid_file_on_reload(self, tmp_path, content):
+        path = tmp_path / "licenses.json"
+        path.write_text(json.dumps({"cc-by": "CC-BY-4.0"}))
+        table = mapping.MappingTable("licenses", str(path), reload_interval=0)
+        assert table.get("cc-by") == "CC-BY-4.0"
+
+        path.write_text(content)
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+        assert table.get("cc-by") == "CC-BY-4.0"
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestMapperWithTable:
+    @pytest.fixture(autouse=True)
+    def licenses(self, with_plugins, csv_file, monkeypatch):
+        monkeypatch.setitem(
+            mapping._tables, "licenses", mapping.MappingTable("licenses", str(csv_file))
+        )
+
+    def test_mapper(self):
+        tsm_schema = build_schema(
+            {"license": {"validators": [["tsm_mapper", "licenses"]]}}
+        )
+
+        result = call_action(
+            "tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema
+        )
+
+        assert result == {"license": "CC-BY-4.0"}
+
+    def test_list_mapper(self):
+        tsm_schema = build_schema(
+            {"licenses": {"validators": [["tsm_list_mapper", "licenses", True]]}}
+        )
+
+        result = call_action(
+            "tsm_transmute",
+            data={"licenses": ["cc-by", "other", "odc-odbl"]},
+            schema=tsm_schema,
+        )
+
+        assert result == {"licenses": ["CC-BY-4.0", "ODbL-1.0"]}
+
+    def test_file_changed_between_calls(self, csv_file, monkeypatch):
+        monkeypatch.setitem(
+            mapping._tables,
+            "licenses",
+            mapping.MappingTable("licenses", str(csv_file), reload_interval=0),
+        )
+        memo = LRUCache(10)
+        monkeypatch.setattr(action, "memo_cache", memo)
+        tsm_schema = build_schema(
+            {"license": {"validators": [["tsm_mapper", "licenses"]]}}
+        )
+
+        first = call_action(
+            "tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema
+        )
+
+        csv_file.write_text("key,value\ncc-by,CC-BY\n")
+        stat = csv_file.stat()
+        os.utime(csv_file, (stat.st_atime, stat.st_mtime + 10))
+
+        second = call_action(
+            "tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema
+        )
+
+        assert first == {"license": "CC-BY-4.0"}
+        assert second == {"license": "CC-BY"}
+        assert len(memo) == 0
+
+    def test_unknown_table(self):
+        tsm_schema = build_schema(
+            {"license": {"validators": [["tsm_mapper", "other"]]}}
+        )
+
+        with pytest.raises(TransmutatorError):
+            call_action("tsm_transmute", data={"license": "cc-by"}, schema=tsm_schema)
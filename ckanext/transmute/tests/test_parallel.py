@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+
+from ckanext.transmute.parallel import transmute_parallel
+from ckanext.transmute.schema import SchemaParser
+from ckanext.transmute.tests.helpers import build_schema
+
+
+@pytest.fixture
+def definition():
+    return SchemaParser(
+        build_schema({"title": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}})
+    ).compile()
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestTransmuteParallel:
+    def test_ordered(self, definition):
+        items = [(i, {"title": f"title-{i}"}) for i in range(50)]
+
+        results = list(
+            transmute_parallel(items, definition, "Dataset", workers=2, chunksize=3)
+        )
+
+        assert [key for key, _ in results] == list(range(50))
+        assert results[7][1]["result"] == {"title": "TITLE-7"}
+
+    def test_unordered(self, definition):
+        items = [(i, {"title": f"title-{i}"}) for i in range(50)]
+
+        results = dict(
+            transmute_parallel(
+                items, definition, "Dataset", workers=3, chunksize=2, ordered=False
+            )
+        )
+
+        assert sorted(results) == list(range(50))
+        assert results[42]["result"] == {"title": "TITLE-42"}
+
+    def test_failures_isolated(self, definition):
+        items = [("bad", {"title": 1}), ("good", {"title": "a"})]
+
+        results = dict(transmute_parallel(items, definition, "Dataset", workers=2))
+
+        assert not results["bad"]["success"]
+        assert results["good"]["result"] == {"title": "A"}
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import pytest
+
+from ckan.logic import ValidationError
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import resolve, utils
+from ckanext.transmute.exception import TransmutatorError
+
+ENTITIES = {
+    ("organization", None): {"org-a": "id-org-a", "org-b": "id-org-b"},
+    ("package", None): {"pkg-a": "id-pkg-a"},
+    ("user", None): {"alice": "id-alice"},
+    ("tag", None): {"csv": "id-csv", "xml": "id-xml"},
+    ("tag", "genre"): {"jazz": "id-jazz"},
+}
+
+
+@pytest.fixture
+def queries(monkeypatch):
+    """Replace database with ENTITIES and record every query."""
+    calls = []
+
+    def query(self, keys):
+        calls.append((self.entity, sorted(keys)))
+        names = ENTITIES[(self.entity, self.vocabulary)]
+        ids = {id_: id_ for id_ in names.values()}
+        return {key: {**names, **ids}[key] for key in keys if key in {**names, **ids}}
+
+    monkeypatch.setattr(resolve.Resolver, "query", query)
+    return calls
+
+
+@pytest.fixture
+def transmutation_cache():
+    token = utils.cache_ctx.set({})
+    yield
+    utils.cache_ctx.reset(token)
+
+
+class TestResolver:
+    def test_unknown_entity(self):
+        with pytest.raises(TransmutatorError):
+            resolve.Resolver("group")
+
+    def test_get_many(self, queries):
+        resolver = resolve.Resolver("organization")
+
+        result = resolver.get_many(["org-a", "id-org-b", "org-c", 1, None, ""])
+
+        assert result == {"org-a": "id-org-a", "id-org-b": "id-org-b"}
+        assert queries == [("organization", ["id-org-b", "org-a", "org-c"])]
+
+    @pytest.mark.usefixtures("transmutation_cache")
+    def test_cached_during_transmutation(self, queries):
+        resolver = resolve.Resolver("organization")
+
+        resolver.get_many(["org-a", "org-c"])
+        result = resolver.get_many(["org-a", "org-b", "org-c"])
+
+        assert result == {"org-a": "id-org-a", "org-b": "id-org-b"}
+        assert queries == [
+            ("organization", ["org-a", "org-c"]),
+            ("organization", ["org-b"]),
+        ]
+
+    def test_not_cached_outside_of_transmutation(self, queries):
+        resolver = resolve.Resolver("organization")
+
+        resolver.get_many(["org-a"])
+        resolver.get_many(["org-a"])
+
+        assert len(queries) == 2
+
+    @pytest.mark.usefixtures("transmutation_cache")
+    def test_vocabularies_are_cached_separately(self, queries):
+        assert resolve.Resolver("tag").get_many(["jazz"]) == {}
+        assert resolve.Resolver("tag", "genre").get_many(["jazz"]) == {
+            "jazz": "id-jazz"
+        }
+
+    def test_batches(self, queries, monkeypatch):
+        monkeypatch.setattr(resolve, "BATCH_SIZE", 2)
+
+        resolve.Resolver("user").get_many(["alice", "bob", "carol"])
+
+        assert len(queries) == 2
+
+
+def sql(resolver: resolve.Resolver) -> str:
+    query = resolver.select(["key"])
+    return "" if query is None else str(query.statement).replace("\n", " ")
+
+
+class TestVisibility:
+    def test_package(self):
+        statement = sql(resolve.Resolver("package"))
+
+        assert "package.state = " in statement
+        assert "package.private IS false" in statement
+
+    @pytest.mark.ckan_config(resolve.CONFIG_INCLUDE_PRIVATE, "true")
+    def test_private_package_included(self):
+        assert "private" not in sql(resolve.Resolver("package"))
+
+    @pytest.mark.ckan_config("ckan.auth.public_user_details", "false")
+    def test_user_details_not_public(self):
+        assert resolve.Resolver("user").select(["alice"]) is None
+        assert resolve.Resolver("user").query(["alice"]) == {}
+
+    @pytest.mark.ckan_config("ckan.auth.public_user_details", "true")
+    def test_user_details_public(self):
+        assert '"user".state = ' in sql(resolve.Resolver("user"))
+
+    @pytest.mark.ckan_config("ckan.auth.public_user_details", "false")
+    @pytest.mark.ckan_config(resolve.CONFIG_INCLUDE_PRIVATE, "true")
+    def test_private_user_included(self):
+        assert resolve.Resolver("user").select(["alice"]) is not None
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestResolveTransmutators:
+    @pytest.fixture
+    def tsm_schema(self):
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {
+                        "owner_org": {"validators": ["tsm_resolve_org"]},
+                        "creator_user_id": {"validators": ["tsm_resolve_user"]},
+                        "tags": {"validators": ["tsm_resolve_tag"]},
+                        "resources": {"type": "Resource", "multiple": True},
+                    }
+                },
+                "Resource": {
+                    "fields": {
+                        "package_id": {"validators": ["tsm_resolve_package"]},
+                        "genre": {"validators": [["tsm_resolve_tag", "genre"]]},
+                        "format": {
+                            "validators": ["tsm_to_lowercase", "tsm_resolve_tag"]
+                        },
+                    }
+                },
+            },
+        }
+
+    def test_one_query_per_entity(self, tsm_schema, queries):
+        data = {
+            "owner_org": "org-a",
+            "creator_user_id": "alice",
+            "tags": ["csv", "id-xml"],
+            "resources": [
+                {"package_id": "pkg-a", "genre": "jazz", "format": "csv"},
+                {"package_id": "id-pkg-a", "genre": "jazz", "format": "xml"},
+            ],
+        }
+
+        result = call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert result == {
+            "owner_org": "id-org-a",
+            "creator_user_id": "id-alice",
+            "tags": ["id-csv", "id-xml"],
+            "resources": [
+                {"package_id": "id-pkg-a", "genre": "id-jazz", "format": "id-csv"},
+                {"package_id": "id-pkg-a", "genre": "id-jazz", "format": "id-xml"},
+            ],
+        }
+        assert sorted(queries) == [
+            ("organization", ["org-a"]),
+            ("package", ["id-pkg-a", "pkg-a"]),
+            ("tag", ["csv", "id-xml", "xml"]),
+            ("tag", ["jazz"]),
+            ("user", ["alice"]),
+        ]
+
+    def test_values_changed_before_resolver(self, tsm_schema, queries):
+        data = {"resources": [{"format": "CSV"}]}
+
+        result = call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert result == {"resources": [{"format": "id-csv"}]}
+        assert queries == [("tag", ["CSV"]), ("tag", ["csv"])]
+
+    def test_batch(self, tsm_schema, queries):
+        data = [{"owner_org": "org-a"}, {"owner_org": "org-b"}, {"owner_org": "org-a"}]
+
+        result = call_action("tsm_transmute_many", data=data, schema=tsm_schema)
+
+        assert [r["result"]["owner_org"] for r in result] == [
+            "id-org-a",
+            "id-org-b",
+            "id-org-a",
+        ]
+        assert queries == [("organization", ["org-a", "org-b"])]
+
+    def test_missing(self, tsm_schema, queries):
+        with pytest.raises(ValidationError) as e:
+            call_action("tsm_transmute", data={"owner_org": "org-c"}, schema=tsm_schema)
+
+        assert e.value.error_dict == {
+            "Dataset:owner_org": ["Organization does not exist: org-c"]
+        }
+
+    def test_default(self, queries):
+        schema = {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "fields": {"owner_org": {"validators": [["tsm_resolve_org", None]]}}
+                }
+            },
+        }
+
+        result = call_action(
+            "tsm_transmute", data={"owner_org": "org-c"}, schema=schema
+        )
+
+        assert result == {"owner_org": None}
+
+    def test_empty_values_kept(self, tsm_schema, queries):
+        data = {"owner_org": "", "tags": []}
+
+        result = call_action("tsm_transmute", data=data, schema=tsm_schema)
+
+        assert result == data
+        assert queries == []
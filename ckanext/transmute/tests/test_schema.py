@@ -0,0 +1,419 @@
+from __future__ import annotations
+
+import dataclasses
+import gc
+import json
+import os
+import weakref
+from typing import Any
+
+import pytest
+
+import ckan.plugins as p
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import utils
+from ckanext.transmute.exception import SchemaParsingError, UnknownTransmutator
+from ckanext.transmute.logic.action import mutate_fields
+from ckanext.transmute.schema import SchemaParser, get_parser, precompile_schemas
+from ckanext.transmute.tests.helpers import build_schema
+from ckanext.transmute.transmutators import tsm_to_lowercase
+
+
+class TestLRUCache:
+    def test_eviction(self):
+        cache = utils.LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_stats(self):
+        cache = utils.LRUCache(2)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+    def test_disabled(self):
+        cache = utils.LRUCache(0)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+
+def test_fingerprint_depends_on_key_order():
+    assert utils.fingerprint({"a": 1, "b": [1, 2]}) == utils.fingerprint(
+        {"a": 1, "b": [1, 2]}
+    )
+    assert utils.fingerprint({"a": 1, "b": [1, 2]}) != utils.fingerprint(
+        {"b": [1, 2], "a": 1}
+    )
+    assert utils.fingerprint({"a": 1}) != utils.fingerprint({"a": 2})
+
+
+def test_fingerprint_of_not_serializable_schema():
+    assert utils.fingerprint({"a": object()}) is None
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestGetParser:
+    def test_inline_schema_cached(self):
+        schema = build_schema({"title": {"default": "hello"}})
+        assert get_parser(schema) is get_parser(dict(schema))
+
+    def test_changed_schema_parsed_again(self):
+        first = get_parser(build_schema({"title": {"default": "hello"}}))
+        second = get_parser(build_schema({"title": {"default": "world"}}))
+        assert first is not second
+
+    def test_reordered_fields_parsed_again(self):
+        first = get_parser(build_schema({"a": {}, "b": {}}))
+        second = get_parser(build_schema({"b": {}, "a": {}}))
+        assert first is not second
+
+    def test_not_serializable_schema_not_cached(self):
+        schema = build_schema({"title": {"default": object()}})
+        size = len(utils.parser_cache)
+
+        assert get_parser(schema) is not get_parser(schema)
+        assert len(utils.parser_cache) == size
+
+    def test_named_schema_cached(self, monkeypatch):
+        monkeypatch.setitem(
+            utils._schema_cache, "test-schema", build_schema({"title": {}})
+        )
+        assert get_parser("test-schema") is get_parser("test-schema")
+
+    def test_unknown_named_schema(self):
+        with pytest.raises(SchemaParsingError):
+            get_parser("not-a-real-schema")
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestSchemaReload:
+    @pytest.fixture
+    def schema_file(self, tmp_path, monkeypatch):
+        path = tmp_path / "schema.json"
+        path.write_text(json.dumps(build_schema({"title": {"default": "first"}})))
+
+        source = utils.SchemaFile("reloaded", str(path), 0)
+        monkeypatch.setitem(utils._schema_files, "reloaded", source)
+        monkeypatch.setitem(utils._schema_cache, "reloaded", source.load())
+        return source
+
+    def write(self, source: utils.SchemaFile, schema: dict[str, Any], mtime: int):
+        with open(source.path, "w") as dest:
+            json.dump(schema, dest)
+        os.utime(source.path, (mtime, mtime))
+
+    def test_reloaded_when_modified(self, schema_file):
+        first = get_parser("reloaded")
+        assert get_parser("reloaded") is first
+
+        self.write(schema_file, build_schema({"title": {"default": "second"}}), 1)
+        second = get_parser("reloaded")
+
+        assert second is not first
+        assert second.compile().types["Dataset"].fields[0].default == "second"
+        assert get_parser("reloaded") is second
+        assert utils.get_schema("reloaded") == build_schema(
+            {"title": {"default": "second"}}
+        )
+
+    def test_same_content_not_recompiled(self, schema_file):
+        first = get_parser("reloaded")
+        os.utime(schema_file.path, (1, 1))
+
+        assert get_parser("reloaded") is first
+        assert schema_file.version == 0
+
+    def test_invalid_schema_ignored(self, schema_file):
+        first = get_parser("reloaded")
+        self.write(schema_file, {"types": {}}, 1)
+        assert get_parser("reloaded") is first
+
+        schema_file.path = schema_file.path + ".missing"
+        assert get_parser("reloaded") is first
+
+    def test_throttled(self, schema_file):
+        schema_file.reload_interval = 3600
+        first = get_parser("reloaded")
+
+        self.write(schema_file, build_schema({"title": {"default": "second"}}), 1)
+        assert get_parser("reloaded") is first
+
+    def test_busy_lock_skips_reload(self, schema_file):
+        first = get_parser("reloaded")
+        self.write(schema_file, build_schema({"title": {"default": "second"}}), 1)
+
+        with schema_file.lock:
+            assert get_parser("reloaded") is first
+
+        assert get_parser("reloaded") is not first
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestWarmup:
+    def test_named_schemas_compiled(self, monkeypatch):
+        monkeypatch.setitem(
+            utils._schema_cache, "warm", build_schema({"title": {"default": "x"}})
+        )
+        monkeypatch.setitem(
+            utils._schema_cache,
+            "broken",
+            build_schema({"title": {"validators": ["not_a_transmutator"]}}),
+        )
+        precompile_schemas()
+
+        parser = utils.parser_cache.get(("name", "warm", 0))
+        assert parser is not None
+        assert parser._compiled is not None
+
+    def test_plugin_warmup(self, monkeypatch):
+        frozen = []
+        monkeypatch.setattr("gc.freeze", lambda: frozen.append(True))
+        monkeypatch.setattr(utils, "_transmutator_cache", {})
+
+        p.get_plugin("transmute")._warmup(True)
+
+        assert "tsm_concat" in utils._transmutator_cache
+        assert frozen == [True]
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestCompile:
+    def test_fields_ordered_by_weight(self):
+        parser = SchemaParser(
+            build_schema({"a": {"weight": 10}, "b": {}, "c": {"weight": -1}})
+        )
+        plan = parser.compile()
+
+        assert [f.name for f in plan.types["Dataset"].fields] == ["c", "b", "a"]
+
+    def test_field_definition(self):
+        parser = SchemaParser(build_schema({"a": {}}))
+        field = parser.types["Dataset"]["fields"]["a"]
+
+        assert field.definition is parser.types["Dataset"]
+
+        # fields do not keep the parser alive
+        ref = weakref.ref(parser)
+        del parser
+        gc.collect()
+        assert ref() is None
+        assert field.definition == {}
+
+    def test_validators_bound(self):
+        parser = SchemaParser(
+            build_schema(
+                {"a": {"validators": ["tsm_to_lowercase", ["tsm_trim_string", 3]]}}
+            )
+        )
+        (field,) = parser.compile().types["Dataset"].fields
+
+        assert field.validators[0] == (tsm_to_lowercase, ())
+        assert field.validators[1][1] == (3,)
+
+    def test_sources_resolved(self):
+        parser = SchemaParser(
+            build_schema({"a": {"default_from": ["b", "c"], "replace_from": "d"}})
+        )
+        (field,) = parser.compile().types["Dataset"].fields
+
+        assert field.default_from == ("b", "c")
+        assert field.replace_from == "d"
+
+    def test_plan_is_immutable(self):
+        plan = SchemaParser(build_schema({"a": {}})).compile()
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            plan.types["Dataset"].fields[0].name = "b"  # type: ignore
+
+        with pytest.raises(TypeError):
+            plan.types["Dataset"] = plan.types["Dataset"]  # type: ignore
+
+    def test_compiled_once(self):
+        parser = SchemaParser(build_schema({"a": {}}))
+        assert parser.compile() is parser.compile()
+
+    def test_unknown_transmutator(self):
+        parser = SchemaParser(build_schema({"a": {"validators": ["not_real"]}}))
+        with pytest.raises(UnknownTransmutator):
+            parser.compile()
+
+    def test_mutate_fields_with_parser(self):
+        parser = SchemaParser(
+            build_schema({"a": {"validators": ["tsm_to_lowercase"], "map": "b"}})
+        )
+        data = {"a": "HELLO"}
+        mutate_fields(data, parser, "Dataset")
+
+        assert data == {"b": "hello"}
+
+    def test_pure_chain(self):
+        parser = SchemaParser(
+            build_schema(
+                {
+                    "pure": {"validators": ["tsm_string_only", "tsm_to_lowercase"]},
+                    "impure": {"validators": ["tsm_to_lowercase", ["tsm_concat", "!"]]},
+                    "empty": {},
+                }
+            )
+        )
+        fields = {f.name: f for f in parser.compile().types["Dataset"].fields}
+
+        assert fields["pure"].pure
+        assert not fields["impure"].pure
+        assert not fields["empty"].pure
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestDependencyOrder:
+    def order(self, fields: dict[str, Any], section: str = "fields") -> list[str]:
+        plan = SchemaParser(build_schema(fields)).compile()
+        return [f.name for f in getattr(plan.types["Dataset"], section)]
+
+    def test_sources_processed_first(self):
+        fields = {
+            "copy": {"default_from": "title"},
+            "other": {"weight": -1},
+            "title": {"default": "x", "weight": 10},
+        }
+        assert self.order(fields) == ["other", "title", "copy"]
+
+    def test_concat_references(self):
+        fields = {
+            "message": {"validators": [["tsm_concat", "$greeting", " ", "$name"]]},
+            "name": {"default": "world"},
+            "greeting": {"default": "Hello"},
+        }
+        assert self.order(fields) == ["name", "greeting", "message"]
+
+    def test_renamed_source_read_before_rename(self):
+        fields = {
+            "title": {"map": "name"},
+            "copy": {"default_from": "title"},
+            "other": {"default_from": "name"},
+        }
+        assert self.order(fields) == ["copy", "title", "other"]
+
+    def test_removed_source_read_before_removal(self):
+        fields = {"title": {"remove": True}, "copy": {"replace_from": "title"}}
+        assert self.order(fields) == ["copy", "title"]
+
+    def test_nested_type_references(self):
+        schema = build_schema(
+            {
+                "resources": {"type": "Resource", "multiple": True},
+                "title": {"validators": ["tsm_to_uppercase"]},
+            }
+        )
+        schema["types"]["Resource"] = {
+            "fields": {
+                "name": {
+                    "validate_missing": True,
+                    "validators": [["tsm_concat", "$title"]],
+                }
+            }
+        }
+        plan = SchemaParser(schema).compile()
+        assert [f.name for f in plan.types["Dataset"].fields] == ["title", "resources"]
+
+        data = {"title": "hello", "resources": [{}]}
+        result = call_action("tsm_transmute", data=data, schema=schema)
+        assert result["resources"] == [{"name": "HELLO"}]
+
+    def test_cycle(self):
+        fields = {"a": {"default_from": "b"}, "b": {"default_from": "a"}}
+        with pytest.raises(SchemaParsingError, match="circular dependency.*a, b"):
+            SchemaParser(build_schema(fields)).compile()
+
+    def test_result_not_changed(self):
+        schema = build_schema(
+            {
+                "message": {
+                    "validate_missing": True,
+                    "validators": [["tsm_concat", "$greeting", ", ", "$name", "!"]],
+                },
+                "name": {"default": "transmute"},
+                "greeting": {"default": "Hi"},
+            }
+        )
+        result = call_action("tsm_transmute", data={}, schema=schema)
+        assert result["message"] == "Hi, transmute!"
+
+    def test_nested_references_point_to_root(self):
+        schema = {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {"fields": {"items": {"type": "Item", "multiple": True}}},
+                "Item": {
+                    "fields": {
+                        "a": {"validators": [["tsm_concat", "$b"]]},
+                        "b": {"validators": [["tsm_concat", "$a"]]},
+                    }
+                },
+            },
+        }
+        plan = SchemaParser(schema).compile()
+        assert [f.name for f in plan.types["Item"].fields] == ["a", "b"]
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestDeadFieldElimination:
+    def schema(self, eliminate: bool) -> dict[str, Any]:
+        return {
+            "root": "Dataset",
+            "types": {
+                "Dataset": {
+                    "eliminate_dead_fields": eliminate,
+                    "fields": {
+                        "dead": {"validators": ["tsm_to_uppercase"]},
+                        "source": {"validators": ["tsm_to_uppercase"]},
+                        "copy": {"default_from": "source"},
+                        "kept": {"validators": ["tsm_to_uppercase"]},
+                    },
+                    "post-fields": {
+                        "dead": {"remove": True},
+                        "source": {"remove": True},
+                    },
+                }
+            },
+        }
+
+    def test_disabled_by_default(self):
+        plan = SchemaParser(self.schema(False)).compile()
+        assert len(plan.types["Dataset"].fields) == 4
+
+    def test_unused_removed_fields_eliminated(self):
+        plan = SchemaParser(self.schema(True)).compile()
+        assert [f.name for f in plan.types["Dataset"].fields] == [
+            "source",
+            "copy",
+            "kept",
+        ]
+
+    def test_result_not_changed(self):
+        data = {"dead": "a", "source": "b", "kept": "c"}
+        expected = dict(data)
+        mutate_fields(expected, SchemaParser(self.schema(False)), "Dataset")
+        mutate_fields(data, SchemaParser(self.schema(True)), "Dataset")
+
+        assert data == expected == {"copy": "B", "kept": "C"}
+
+
+def test_transmutator_info():
+    @utils.transmutator(pure=True)
+    def pure(field):
+        return field
+
+    def plain(field):
+        return field
+
+    assert utils.get_transmutator_info(pure).pure
+    assert not utils.get_transmutator_info(plain).pure
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+import ckan.plugins.toolkit as tk
+from ckan.logic import ValidationError
+from ckan.tests.helpers import call_action
+
+from ckanext.transmute import stats, utils
+from ckanext.transmute.tests.helpers import build_schema
+
+
+class Recorder:
+    def __init__(self):
+        self.events: list[tuple[Any, ...]] = []
+
+    def __getattr__(self, name: str):
+        return lambda *args: self.events.append((name, *args))
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    recorder = Recorder()
+    monkeypatch.setattr(utils, "_observers", (recorder,))
+    return recorder
+
+
+@pytest.fixture
+def collector(monkeypatch):
+    collector = stats.StatsCollector()
+    monkeypatch.setattr(stats, "collector", collector)
+    monkeypatch.setattr(utils, "_observers", (collector,))
+    return collector
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestObserver:
+    def test_events(self, recorder, monkeypatch):
+        monkeypatch.setattr(utils.memo_cache, "maxsize", 0)
+        tsm_schema = build_schema(
+            {
+                "title": {"validators": ["tsm_to_uppercase"]},
+                "notes": {
+                    "validate_missing": True,
+                    "validators": ["tsm_stop_on_empty", "tsm_to_uppercase"],
+                },
+            }
+        )
+        call_action("tsm_transmute", data={"title": "a"}, schema=tsm_schema)
+
+        names = [event[0] for event in recorder.events]
+        assert names == [
+            "transmutation_started",
+            "validator_invoked",
+            "field_processed",
+            "validator_invoked",
+            "stopped_on_error",
+            "field_processed",
+            "transmutation_finished",
+        ]
+        assert recorder.events[2][1:3] == ("Dataset", "title")
+        assert recorder.events[2][4] is True
+        assert recorder.events[5][4] is False
+        assert recorder.events[-1][4] is None
+
+    def test_memo_hits_reported(self, recorder, monkeypatch):
+        monkeypatch.setattr(utils.memo_cache, "maxsize", 10)
+        tsm_schema = build_schema(
+            {"title": {"validators": ["tsm_string_only", "tsm_to_uppercase"]}}
+        )
+        for _ in range(3):
+            call_action("tsm_transmute", data={"title": "a"}, schema=tsm_schema)
+
+        invoked = [
+            event for event in recorder.events if event[0] == "validator_invoked"
+        ]
+        assert [event[3] for event in invoked] == [
+            "tsm_string_only",
+            "tsm_to_uppercase",
+        ] * 3
+        assert [event[4] for event in invoked[2:]] == [0.0] * 4
+
+    def test_validation_error(self, recorder):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_string_only"]}})
+        with pytest.raises(ValidationError):
+            call_action("tsm_transmute", data={"title": 1}, schema=tsm_schema)
+
+        failed = [event for event in recorder.events if event[0] == "validation_failed"]
+        assert failed == [
+            (
+                "validation_failed",
+                "Dataset",
+                "title",
+                "tsm_string_only",
+                "Must be a string value",
+            )
+        ]
+        assert recorder.events[-1][4] == {"Dataset:title": ["Must be a string value"]}
+
+    def test_transmute_many(self, recorder):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_string_only"]}})
+        call_action(
+            "tsm_transmute_many", data=[{"title": "a"}, {"title": 1}], schema=tsm_schema
+        )
+
+        finished = [e for e in recorder.events if e[0] == "transmutation_finished"]
+        assert [errors is None for *_, errors in finished] == [True, False]
+
+    def test_unexpected_error(self, recorder):
+        tsm_schema = build_schema({"title": {"validators": ["tsm_to_uppercase"]}})
+        result = call_action(
+            "tsm_transmute_many", data=[{"title": "a"}, {"title": 1}], schema=tsm_schema
+        )
+
+        finished = [e for e in recorder.events if e[0] == "transmutation_finished"]
+        assert [errors for *_, errors in finished] == [None, result[1]["errors"]]
+
+
+class TestHistogram:
+    def test_buckets(self):
+        histogram = stats.Histogram()
+        for value in [0.00005, 0.0001, 0.003, 10]:
+            histogram.observe(value)
+
+        result = histogram.as_dict()
+        assert result["count"] == 4
+        assert result["buckets"]["0.0001"] == 2
+        assert result["buckets"]["0.005"] == 3
+        assert result["buckets"]["5.0"] == 3
+        assert result["buckets"]["+Inf"] == 4
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestStatsCollector:
+    def test_snapshot(self, collector):
+        tsm_schema = build_schema(
+            {
+                "title": {"validators": ["tsm_string_only"]},
+                "notes": {"validators": ["tsm_string_only"]},
+            }
+        )
+        call_action(
+            "tsm_transmute_many",
+            data=[{"title": "a"}, {"title": 1}, {"title": "b", "notes": "c"}],
+            schema=tsm_schema,
+        )
+
+        result = collector.snapshot()
+        transmutations = result["transmutations"]
+        assert transmutations["started"] == 3
+        assert transmutations["finished"] == 3
+        assert transmutations["failed"] == 1
+        assert transmutations["error_rate"] == pytest.approx(1 / 3)
+        assert transmutations["duration"]["count"] == 3
+
+        assert result["fields"]["Dataset:title"]["processed"] == 3
+        assert result["fields"]["Dataset:notes"]["processed"] == 2
+        assert result["fields"]["Dataset:notes"]["hit_rate"] == 0.5
+        assert result["validators"]["tsm_string_only"]["errors"] == 1
+
+    def test_reset(self, collector):
+        collector.transmutation_started("Dataset", {})
+        collector.reset()
+        assert collector.snapshot()["transmutations"]["started"] == 0
+
+
+@pytest.mark.usefixtures("with_plugins")
+class TestStatsAction:
+    def test_disabled(self):
+        with pytest.raises(tk.ObjectNotFound):
+            call_action("tsm_stats")
+
+    @pytest.mark.ckan_config(stats.CONFIG_STATS, "true")
+    def test_enabled(self):
+        call_action("tsm_transmute", data={}, schema=build_schema({}))
+        result = call_action("tsm_stats")
+        assert result["transmutations"]["finished"] >= 1
+
+    @pytest.mark.ckan_config(stats.CONFIG_STATS, "true")
+    def test_sysadmin_only(self):
+        with pytest.raises(tk.NotAuthorized):
+            call_action("tsm_stats", {"user": "", "ignore_auth": False})
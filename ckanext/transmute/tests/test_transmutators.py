@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+import timeit
+from datetime import datetime
 from typing import Any
 
 import pytest
+from dateutil.parser import ParserError, parse
 
 from ckan.logic import ValidationError
 from ckan.tests.helpers import call_action
 
+from ckanext.transmute import transmutators, utils
 from ckanext.transmute.exception import TransmutatorError
+from ckanext.transmute.schema import SchemaParser
 from ckanext.transmute.tests.helpers import build_schema
+from ckanext.transmute.transmutators import ConcatTemplate, parse_isodate, tsm_concat
+from ckanext.transmute.types import Field
 
 
 @pytest.mark.usefixtures("with_plugins")
@@ -540,3 +547,152 @@ class TestListMapperTransmutator:
             )
 
         assert e.value.error == "Arguments for validator weren't provided"
+
+
+class TestIsodateTransmutator:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "2022-01-01",
+            "2022-01-01T10:20",
+            "2022-01-01 10:20:30",
+            "2022-01-01T10:20:30.123",
+            "2022-01-01T10:20:30.123456",
+            "2022-01-01T10:20:30Z",
+            "2022-01-01T10:20:30+00:00",
+            "2022-01-01T10:20:30+02:00",
+            "2022-01-01T10:20:30.123456-05:30",
+            "2022-01-01T10:20:30.1",
+            "01/02/2022",
+            "Jan 2 2022 10:20",
+        ],
+    )
+    def test_same_as_dateutil(self, value):
+        expected = parse(value)
+        result = parse_isodate(value)
+
+        assert result == expected
+        assert result.utcoffset() == expected.utcoffset()
+
+    def test_invalid_iso_date(self):
+        with pytest.raises(ParserError):
+            parse_isodate("2022-02-30")
+
+    def test_non_iso_date_memoized(self, monkeypatch):
+        monkeypatch.setattr(transmutators, "isodate_memo", utils.LRUCache())
+
+        first = parse_isodate("Jan 2 2022")
+        assert parse_isodate("Jan 2 2022") is first
+        assert transmutators.isodate_memo.stats()["hits"] == 1
+
+        parse_isodate("2022-01-02")
+        assert len(transmutators.isodate_memo) == 1
+
+    @pytest.mark.parametrize("value", ["10:30", "Jan 2", "2 Jan 10:30", "2022"])
+    def test_partial_date_not_memoized(self, value, monkeypatch):
+        calls = []
+
+        def spy(value, **kwargs):
+            calls.append(kwargs)
+            return parse(value, **kwargs)
+
+        monkeypatch.setattr(transmutators, "isodate_memo", utils.LRUCache())
+        monkeypatch.setattr(transmutators, "parse", spy)
+
+        assert parse_isodate(value) == parse(value)
+        assert parse_isodate(value) == parse(value)
+
+        # the second call parses the value relative to the current date
+        assert calls[-1] == {}
+        assert transmutators.isodate_memo.stats()["hits"] == 1
+
+    def test_isodate_not_memoized_by_chain(self):
+        assert not utils.get_transmutator_info(transmutators.tsm_isodate).pure
+
+    def test_tiers_performance(self, record_property):
+        """Fast path is noticeably faster than dateutil.
+
+        Timings are recorded as test properties and appear in the JUnit XML
+        report.
+        """
+        value = "2022-01-01T10:20:30.123456"
+        number = 2000
+
+        fast = min(timeit.repeat(lambda: parse_isodate(value), number=number))
+        fallback = min(timeit.repeat(lambda: parse(value), number=number))
+        memo = utils.LRUCache()
+        memo.set(value, parse(value))
+        memoized = min(timeit.repeat(lambda: memo.get(value), number=number))
+
+        record_property("isodate_fromisoformat_us", fast / number * 1e6)
+        record_property("isodate_dateutil_us", fallback / number * 1e6)
+        record_property("isodate_memo_us", memoized / number * 1e6)
+
+        assert fast < fallback
+
+
+class TestConcatTemplate:
+    def test_segments(self):
+        template = ConcatTemplate(("Hello", " ", 1, "$self", "$ name", "!"))
+
+        assert template.segments == (
+            (ConcatTemplate.LITERAL, "Hello 1"),
+            (ConcatTemplate.SELF, None),
+            (ConcatTemplate.REF, "name"),
+            (ConcatTemplate.LITERAL, "!"),
+        )
+
+    def test_render(self):
+        template = ConcatTemplate(("$self", "-", "$name", "$missing", 42))
+        field = Field("title", "hello", "Dataset", {"name": "world"})
+
+        assert template.render(field) == "hello-world42"
+
+    def test_direct_call(self):
+        field = Field("title", "hello", "Dataset", {})
+
+        assert tsm_concat(field, "$self", "!").value == "hello!"
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_concat_compiled_once():
+    parser = SchemaParser(
+        build_schema({"title": {"validators": [["tsm_concat", "$self", "!"]]}})
+    )
+    (field,) = parser.compile().types["Dataset"].fields
+    (_fn, args), *_ = field.validators
+
+    assert len(args) == 1
+    assert isinstance(args[0], ConcatTemplate)
+
+
+@pytest.mark.usefixtures("with_plugins")
+@pytest.mark.parametrize(
+    ("name", "args", "values"),
+    [
+        ("tsm_to_lowercase", [], ["HeLLo", "WORLD"]),
+        ("tsm_to_uppercase", [], ["HeLLo", "world"]),
+        ("tsm_string_only", [], ["a", "b"]),
+        ("tsm_to_string", [], [1, None, [1]]),
+        ("tsm_isodate", [], ["2024-01-01", "Jan 1 2024", datetime(2024, 1, 1)]),
+        ("tsm_mapper", [{"a": "A"}], ["a", "b"]),
+        ("tsm_mapper", [{"a": "A"}, "default"], ["a", "b"]),
+    ],
+)
+def test_batch_matches_transmutator(name, args, values):
+    schema = build_schema({"field": {"validators": [[name, *args] if args else name]}})
+    (field,) = SchemaParser(schema).compile().types["Dataset"].fields
+    ((fn, bound_args),) = field.validators
+    ((batch, _args),) = field.batch_validators
+
+    expected = [
+        fn(Field("field", value, "Dataset", {}), *bound_args).value for value in values
+    ]
+    assert batch(list(values), *bound_args) == expected
+
+
+@pytest.mark.usefixtures("with_plugins")
+def test_batch_missing_for_context_dependent_transmutators():
+    schema = build_schema({"field": {"validators": [["tsm_concat", "$self", "!"]]}})
+    (field,) = SchemaParser(schema).compile().types["Dataset"].fields
+    assert field.batch_validators is None
@@ -1,17 +1,41 @@
 from __future__ import annotations
 
+import re
 from datetime import datetime
 from typing import Any, Callable
 
+from dateutil import tz
 from dateutil.parser import ParserError, parse
 
 import ckan.lib.navl.dictization_functions as df
 import ckan.plugins.toolkit as tk
 
+from ckanext.transmute import lookup, resolve
+from ckanext.transmute.columnar import ColumnarError, pa, pc
+from ckanext.transmute.mapping import MappingTable, get_table
 from ckanext.transmute.types import Field
+from ckanext.transmute.utils import LRUCache, transmutator
 
 SENTINEL = object()
 
+# strict ISO-8601 strings that can be handled by `datetime.fromisoformat` on
+# every supported version of python.
+ISODATE_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.(?:\d{6}|\d{3}))?)?"
+    r"(?P<tz>Z|[+-]\d{2}:\d{2})?)?"
+)
+# subset of ISODATE_RE without timezones, in RE2 syntax
+NAIVE_ISODATE_RE = (
+    r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.(?:\d{6}|\d{3}))?)?)?$"
+)
+isodate_memo = LRUCache()
+# dateutil takes missing parts of the date from the current date. Strings that
+# produce different results with these defaults are not memoized, because
+# their result changes over time. Both are leap years and months with 31 days,
+# so any partial date that is valid today is valid for them as well.
+PARTIAL_DATE_DEFAULTS = (datetime(2000, 1, 1), datetime(2004, 3, 3))
+
 
 def get_transmutators():
     return {
@@ -29,9 +53,15 @@ def get_transmutators():
         "tsm_mapper": tsm_mapper,
         "tsm_list_mapper": tsm_list_mapper,
         "tsm_map_value": tsm_map_value,
+        "tsm_lookup": tsm_lookup,
+        "tsm_resolve_org": tsm_resolve_org,
+        "tsm_resolve_package": tsm_resolve_package,
+        "tsm_resolve_user": tsm_resolve_user,
+        "tsm_resolve_tag": tsm_resolve_tag,
     }
 
 
+@transmutator(pure=True)
 def tsm_name_validator(field: Field) -> Field:
     """Wrapper over CKAN default `name_validator` validator.
 
@@ -57,6 +87,15 @@ def tsm_name_validator(field: Field) -> Field:
     return field
 
 
+def _batch_lowercase(values: list[Any]) -> list[Any]:
+    return [value.lower() for value in values]
+
+
+def _vector_lowercase(values: Any) -> Any:
+    return _vector_text(values, pc.ascii_lower, str.lower)
+
+
+@transmutator(pure=True, batch=_batch_lowercase, vector=_vector_lowercase)
 def tsm_to_lowercase(field: Field) -> Field:
     """Casts string value to lowercase.
 
@@ -76,6 +115,15 @@ def tsm_to_lowercase(field: Field) -> Field:
     return field
 
 
+def _batch_uppercase(values: list[Any]) -> list[Any]:
+    return [value.upper() for value in values]
+
+
+def _vector_uppercase(values: Any) -> Any:
+    return _vector_text(values, pc.ascii_upper, str.upper)
+
+
+@transmutator(pure=True, batch=_batch_uppercase, vector=_vector_uppercase)
 def tsm_to_uppercase(field: Field) -> Field:
     """Casts string value to uppercase.
 
@@ -95,6 +143,19 @@ def tsm_to_uppercase(field: Field) -> Field:
     return field
 
 
+def _batch_string_only(values: list[Any]) -> list[Any]:
+    if not all(isinstance(value, str) for value in values):
+        raise df.Invalid(tk._("Must be a string value"))
+    return values
+
+
+def _vector_string_only(values: Any) -> Any:
+    if not pa.types.is_string(values.type) or values.null_count:
+        raise df.Invalid(tk._("Must be a string value"))
+    return values
+
+
+@transmutator(pure=True, batch=_batch_string_only, vector=_vector_string_only)
 def tsm_string_only(field: Field) -> Field:
     """Validates if `field.value` is string.
 
@@ -118,6 +179,28 @@ def tsm_string_only(field: Field) -> Field:
     return field
 
 
+def _batch_isodate(values: list[Any]) -> list[Any]:
+    try:
+        return [
+            value if isinstance(value, datetime) else parse_isodate(value)
+            for value in values
+        ]
+    except ParserError:
+        raise df.Invalid(tk._("Date format incorrect"))
+
+
+def _vector_isodate(values: Any) -> Any:
+    if pa.types.is_timestamp(values.type) and values.type.tz is None:
+        return values
+
+    _require_strings(values)
+    if not pc.all(pc.match_substring_regex(values, NAIVE_ISODATE_RE)).as_py():
+        raise ColumnarError("Only ISO-8601 dates without timezone are vectorized")
+
+    return pc.cast(values, pa.timestamp("us"))
+
+
+@transmutator(batch=_batch_isodate, vector=_vector_isodate)
 def tsm_isodate(field: Field) -> Field:
     """Validates datetime string
     Mutates an iso-like string to datetime object.
@@ -141,13 +224,104 @@ def tsm_isodate(field: Field) -> Field:
         return field
 
     try:
-        field.value = parse(field.value)
+        field.value = parse_isodate(field.value)
     except ParserError:
         raise df.Invalid(tk._("Date format incorrect"))
 
     return field
 
 
+def _require_strings(values: Any):
+    if not pa.types.is_string(values.type) or values.null_count:
+        raise ColumnarError("Only strings are vectorized")
+
+
+def _vector_text(
+    values: Any, kernel: Callable[[Any], Any], func: Callable[[str], str]
+) -> Any:
+    """Apply ASCII kernel to strings, using python for non-ASCII values."""
+    _require_strings(values)
+    if pc.all(pc.string_is_ascii(values)).as_py():
+        return kernel(values)
+
+    return pa.array([func(value) for value in values.to_pylist()], pa.string())
+
+
+def parse_isodate(value: Any) -> datetime:
+    """Parse date string.
+
+    Strict ISO-8601 strings are parsed by `datetime.fromisoformat`. Everything
+    else is parsed by `dateutil`. The result is memoized only when the string
+    specifies the full date: partial strings, like `10:30` or `Jan 2`, depend
+    on the current date.
+
+    Args:
+        value: string with date
+
+    Raises:
+        ParserError: if date format is incorrect
+
+    Returns:
+        datetime object
+    """
+    if not isinstance(value, str):
+        return parse(value)
+
+    match = ISODATE_RE.fullmatch(value)
+    if match:
+        try:
+            return _fromisoformat(value, match.group("tz"))
+        except ValueError:
+            # invalid values, like 30th of February, are reported by dateutil
+            pass
+
+    result = isodate_memo.get(value)
+    if result is SENTINEL:
+        return parse(value)
+
+    if result is None:
+        first, second = PARTIAL_DATE_DEFAULTS
+        result = parse(value, default=first)
+        if result != parse(value, default=second):
+            isodate_memo.set(value, SENTINEL)
+            return parse(value)
+
+        isodate_memo.set(value, result)
+
+    return result
+
+
+def _fromisoformat(value: str, offset: str | None) -> datetime:
+    if offset == "Z":
+        return datetime.fromisoformat(value[:-1]).replace(tzinfo=tz.UTC)
+
+    result = datetime.fromisoformat(value)
+    delta = result.utcoffset()
+    if delta is None:
+        return result
+
+    # keep timezones compatible with the ones produced by dateutil
+    seconds = int(delta.total_seconds())
+    return result.replace(tzinfo=tz.tzoffset(None, seconds) if seconds else tz.UTC)
+
+
+def _batch_to_string(values: list[Any]) -> list[Any]:
+    return [str(value) for value in values]
+
+
+def _vector_to_string(values: Any) -> Any:
+    kind = values.type
+    if pa.types.is_boolean(kind):
+        values = pc.if_else(values, "True", "False")
+    elif pa.types.is_integer(kind) or pa.types.is_null(kind):
+        values = pc.cast(values, pa.string())
+    elif not pa.types.is_string(kind):
+        raise ColumnarError(f"Values of type {kind} are not vectorized")
+
+    return pc.fill_null(values, "None")
+
+
+@transmutator(pure=True, batch=_batch_to_string, vector=_vector_to_string)
 def tsm_to_string(field: Field) -> Field:
     """Casts `field.value` to str.
 
@@ -171,6 +345,7 @@ def tsm_to_string(field: Field) -> Field:
     return field
 
 
+@transmutator(pure=True)
 def tsm_stop_on_empty(field: Field) -> Field:
     """Stop transmutation if field is empty.
 
@@ -205,6 +380,7 @@ def tsm_stop_on_empty(field: Field) -> Field:
     return field
 
 
+@transmutator(pure=True)
 def tsm_get_nested(field: Field, *path: str) -> Field:
     """Fetches a nested value from a field.
 
@@ -238,6 +414,15 @@ def tsm_get_nested(field: Field, *path: str) -> Field:
     return field
 
 
+def _vector_trim_string(values: Any, max_length: int) -> Any:
+    if not isinstance(max_length, int):
+        raise df.Invalid(tk._("max_length must be integer"))
+
+    _require_strings(values)
+    return pc.utf8_slice_codeunits(values, 0, int(max_length))
+
+
+@transmutator(pure=True, vector=_vector_trim_string)
 def tsm_trim_string(field: Field, max_length: int) -> Field:
     """Trim string lenght.
 
@@ -266,6 +451,64 @@ def tsm_trim_string(field: Field, max_length: int) -> Field:
     return field
 
 
+class ConcatTemplate:
+    """Arguments of `tsm_concat` split into literal and reference segments.
+
+    Names of the referenced fields are exposed as `references`, so that
+    schema compiler can order fields by their dependencies.
+    """
+
+    LITERAL = 0
+    SELF = 1
+    REF = 2
+
+    __slots__ = ("segments", "references")
+
+    def __init__(self, strings: tuple[Any, ...]):
+        segments: list[tuple[int, Any]] = []
+
+        for s in strings:
+            if s == "$self":
+                segments.append((self.SELF, None))
+
+            elif isinstance(s, str) and s.startswith("$"):
+                segments.append((self.REF, s.lstrip("$").strip()))
+
+            elif segments and segments[-1][0] == self.LITERAL:
+                segments[-1] = (self.LITERAL, segments[-1][1] + str(s))
+
+            else:
+                segments.append((self.LITERAL, str(s)))
+
+        self.segments = tuple(segments)
+        self.references = tuple(
+            value for kind, value in self.segments if kind == self.REF
+        )
+
+    def render(self, field: Field) -> str:
+        chunks: list[str] = []
+
+        for kind, value in self.segments:
+            if kind == self.LITERAL:
+                chunks.append(value)
+
+            elif kind == self.SELF:
+                chunks.append(str(field.value))
+
+            elif value in field.data:
+                chunks.append(str(field.data[value]))
+
+        return "".join(chunks)
+
+
+def _compile_concat(*strings: Any) -> tuple[Any, ...]:
+    if not strings:
+        return strings
+
+    return (ConcatTemplate(strings),)
+
+
+@transmutator(compiler=_compile_concat)
 def tsm_concat(field: Field, *strings: Any) -> Field:
     """Concatenate strings to build a new one.
 
@@ -288,27 +531,17 @@ def tsm_concat(field: Field, *strings: Any) -> Field:
     if not strings:
         raise df.Invalid(tk._("No arguments for concat"))
 
-    value_chunks = []
-
-    for s in strings:
-        if s == "$self":
-            value_chunks.append(field.value)
-
-        elif isinstance(s, str) and s.startswith("$"):
-            ref_field_name: str = s.lstrip("$").strip()
+    if len(strings) == 1 and isinstance(strings[0], ConcatTemplate):
+        template = strings[0]
+    else:
+        template = ConcatTemplate(strings)
 
-            if ref_field_name not in field.data:
-                continue
-
-            value_chunks.append(field.data[ref_field_name])
-        else:
-            value_chunks.append(s)
-
-    field.value = "".join(str(s) for s in value_chunks)
+    field.value = template.render(field)
 
     return field
 
 
+@transmutator(pure=True)
 def tsm_unique_only(field: Field) -> Field:
     """Preserve only unique values from list.
 
@@ -332,6 +565,42 @@ def tsm_unique_only(field: Field) -> Field:
     return field
 
 
+def _compile_mapping(mapping: Any, *args: Any) -> tuple[Any, ...]:
+    if isinstance(mapping, str):
+        mapping = get_table(mapping)
+
+    return (mapping, *args)
+
+
+def _batch_mapper(
+    values: list[Any], mapping: dict[Any, Any], default: Any | None = None
+) -> list[Any]:
+    return [mapping.get(value, default or value) for value in values]
+
+
+def _vector_mapper(
+    values: Any, mapping: dict[Any, Any], default: Any | None = None
+) -> Any:
+    data = mapping.data if isinstance(mapping, MappingTable) else mapping
+    if (
+        not pa.types.is_string(values.type)
+        or not all(isinstance(key, str) for key in data)
+        or not all(isinstance(value, str) for value in data.values())
+        or not (default is None or isinstance(default, str))
+    ):
+        raise ColumnarError("Only mappings between strings are vectorized")
+
+    index = pc.index_in(values, value_set=pa.array(list(data), pa.string()))
+    result = pc.take(pa.array(list(data.values()), pa.string()), index)
+    if default:
+        return pc.fill_null(result, default)
+
+    return pc.coalesce(result, values)
+
+
+@transmutator(
+    pure=True, compiler=_compile_mapping, batch=_batch_mapper, vector=_vector_mapper
+)
 def tsm_mapper(
     field: Field, mapping: dict[Any, Any], default: Any | None = None
 ) -> Field:
@@ -349,9 +618,19 @@ def tsm_mapper(
         ]}
         ```
 
+        Replace values using the mapping table `licenses` declared in the
+        config file via `ckanext.transmute.mapping.licenses` option.
+
+        ```json
+        {"validators": [
+            ["tsm_mapper", "licenses"]
+        ]}
+        ```
+
     Args:
         field (Field): Field object
-        mapping (dict[Any, Any]): A dictionary representing the mapping of values.
+        mapping (dict[Any, Any]): A dictionary representing the mapping of values
+            or the name of the mapping table.
         default (Any): The default value to be used when the key is not found.
             If the default value is not provided, the current value will be used as it.
 
@@ -366,6 +645,7 @@ def tsm_mapper(
     return field
 
 
+@transmutator(pure=True, compiler=_compile_mapping)
 def tsm_list_mapper(
     field: Field,
     mapping: dict[Any, Any],
@@ -384,7 +664,8 @@ def tsm_list_mapper(
 
     Args:
         field (Field): Field object
-        mapping (dict[Any, Any]): A dictionary representing the mapping of values.
+        mapping (dict[Any, Any]): A dictionary representing the mapping of values
+            or the name of the mapping table.
         remove (bool, optional): If set to True, removes values from the list if
             they don't have a corresponding mapping. Defaults to False.
     """
@@ -406,6 +687,7 @@ def tsm_list_mapper(
     return field
 
 
+@transmutator(pure=True)
 def tsm_map_value(
     field: Field,
     test_value: Any,
@@ -437,3 +719,268 @@ def tsm_map_value(
         field.value = if_different
 
     return field
+
+
+def _compile_lookup(table: Any, *args: Any) -> tuple[Any, ...]:
+    return (lookup.get_table(table), *args)
+
+
+def _flatten_keys(values: list[Any]) -> list[Any]:
+    """Collect values and items of list values into a single list of keys."""
+    keys: list[Any] = []
+    for value in values:
+        if isinstance(value, list):
+            keys.extend(value)
+        else:
+            keys.append(value)
+    return keys
+
+
+def _replace_keys(values: list[Any], replace: Callable[[Any], Any]) -> list[Any]:
+    """Replace values and items of list values, keeping the structure."""
+    return [
+        [replace(item) for item in value] if isinstance(value, list) else replace(value)
+        for value in values
+    ]
+
+
+def _batch_lookup(
+    values: list[Any], table: lookup.LookupTable, default: Any = SENTINEL
+) -> list[Any]:
+    found = table.get_many(_flatten_keys(values))
+
+    def replace(value: Any) -> Any:
+        result = found.get(value)
+        if result is None:
+            return value if default is SENTINEL else default
+        return result
+
+    return _replace_keys(values, replace)
+
+
+@transmutator(compiler=_compile_lookup, batch=_batch_lookup)
+def tsm_lookup(
+    field: Field, table: lookup.LookupTable, default: Any = SENTINEL
+) -> Field:
+    """Replace a value with the value from the lookup table.
+
+    Lookup tables are SQLite databases declared in the config file via
+    `ckanext.transmute.lookup.<NAME>` option. When value is a list, every
+    item is replaced and all items are fetched from the database at once.
+    Values of the same field from multiple records are fetched at once as
+    well.
+
+    Example:
+        Replace ORCID with the name of the person using `orcid` table.
+
+        ```json
+        {"validators": [
+            ["tsm_lookup", "orcid"]
+        ]}
+        ```
+
+    Args:
+        field: Field object
+        table: name of the lookup table
+        default: value used when key is missing from the table. If it's not
+            provided, the current value is kept.
+
+    Returns:
+        Field: the same Field with new value
+    """
+    if isinstance(field.value, list):
+        found = table.get_many(field.value)
+        field.value = [
+            found.get(item, item if default is SENTINEL else default)
+            for item in field.value
+        ]
+
+    else:
+        field.value = table.get(
+            field.value, field.value if default is SENTINEL else default
+        )
+
+    return field
+
+
+def _compile_resolver(entity: str) -> Callable[..., tuple[Any, ...]]:
+    def compiler(default: Any = SENTINEL) -> tuple[Any, ...]:
+        return (resolve.get_resolver(entity), default)
+
+    return compiler
+
+
+def _compile_tag_resolver(
+    vocabulary: str | None = None, default: Any = SENTINEL
+) -> tuple[Any, ...]:
+    return (resolve.get_resolver(resolve.ENTITY_TAG, vocabulary), default)
+
+
+def _prefetch_resolve(
+    values: list[Any], resolver: resolve.Resolver, default: Any = SENTINEL
+):
+    resolver.get_many(_flatten_keys(values))
+
+
+def _batch_resolve(
+    values: list[Any], resolver: resolve.Resolver, default: Any = SENTINEL
+) -> list[Any]:
+    found = resolver.get_many(_flatten_keys(values))
+
+    def replace(key: Any) -> Any:
+        if key is None or key == "":
+            return key
+
+        if isinstance(key, str) and key in found:
+            return found[key]
+
+        if default is not SENTINEL:
+            return default
+
+        raise df.Invalid(
+            tk._("{} does not exist: {}").format(resolver.entity.capitalize(), key)
+        )
+
+    return _replace_keys(values, replace)
+
+
+@transmutator(
+    compiler=_compile_resolver(resolve.ENTITY_ORGANIZATION),
+    batch=_batch_resolve,
+    prefetch=_prefetch_resolve,
+)
+def tsm_resolve_org(
+    field: Field, resolver: resolve.Resolver, default: Any = SENTINEL
+) -> Field:
+    """Replace name or id of the organization with its id.
+
+    Organizations referred by all records of the document or batch are
+    fetched from the database by a single query before transmutation starts.
+    Results are cached until transmutation is finished. When value is a
+    list, every item is replaced. Empty values are kept.
+
+    Example:
+        ```json
+        {"validators": ["tsm_resolve_org"]}
+        ```
+
+    Args:
+        field: Field object
+        resolver: added automatically, it's not set in the schema
+        default: value used when organization does not exist. If it's not
+            provided, validation error is raised.
+
+    Raises:
+        Invalid: organization does not exist
+
+    Returns:
+        Field: the same Field with new value
+    """
+    field.value = _batch_resolve([field.value], resolver, default)[0]
+    return field
+
+
+@transmutator(
+    compiler=_compile_resolver(resolve.ENTITY_PACKAGE),
+    batch=_batch_resolve,
+    prefetch=_prefetch_resolve,
+)
+def tsm_resolve_package(
+    field: Field, resolver: resolve.Resolver, default: Any = SENTINEL
+) -> Field:
+    """Replace name or id of the dataset with its id.
+
+    Works as `tsm_resolve_org`, but resolves datasets of any type. Private
+    datasets are resolved only when `ckanext.transmute.resolve.include_private`
+    is enabled.
+
+    Example:
+        ```json
+        {"validators": [["tsm_resolve_package", null]]}
+        ```
+
+    Args:
+        field: Field object
+        resolver: added automatically, it's not set in the schema
+        default: value used when dataset does not exist. If it's not
+            provided, validation error is raised.
+
+    Raises:
+        Invalid: dataset does not exist
+
+    Returns:
+        Field: the same Field with new value
+    """
+    field.value = _batch_resolve([field.value], resolver, default)[0]
+    return field
+
+
+@transmutator(
+    compiler=_compile_resolver(resolve.ENTITY_USER),
+    batch=_batch_resolve,
+    prefetch=_prefetch_resolve,
+)
+def tsm_resolve_user(
+    field: Field, resolver: resolve.Resolver, default: Any = SENTINEL
+) -> Field:
+    """Replace name or id of the user with its id.
+
+    Works as `tsm_resolve_org`. Users are resolved only when
+    `ckan.auth.public_user_details` or
+    `ckanext.transmute.resolve.include_private` is enabled.
+
+    Example:
+        ```json
+        {"validators": ["tsm_resolve_user"]}
+        ```
+
+    Args:
+        field: Field object
+        resolver: added automatically, it's not set in the schema
+        default: value used when user does not exist. If it's not provided,
+            validation error is raised.
+
+    Raises:
+        Invalid: user does not exist
+
+    Returns:
+        Field: the same Field with new value
+    """
+    field.value = _batch_resolve([field.value], resolver, default)[0]
+    return field
+
+
+@transmutator(
+    compiler=_compile_tag_resolver,
+    batch=_batch_resolve,
+    prefetch=_prefetch_resolve,
+)
+def tsm_resolve_tag(
+    field: Field, resolver: resolve.Resolver, default: Any = SENTINEL
+) -> Field:
+    """Replace name or id of the tag with its id.
+
+    Works as `tsm_resolve_org`. Free tags are resolved, unless the name of
+    the vocabulary is provided.
+
+    Example:
+        Resolve tags from `genre` vocabulary and replace unknown tags with null.
+
+        ```json
+        {"validators": [["tsm_resolve_tag", "genre", null]]}
+        ```
+
+    Args:
+        field: Field object
+        resolver: name of the vocabulary
+        default: value used when tag does not exist. If it's not provided,
+            validation error is raised.
+
+    Raises:
+        Invalid: tag does not exist
+
+    Returns:
+        Field: the same Field with new value
+    """
+    field.value = _batch_resolve([field.value], resolver, default)[0]
+    return field
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
 import dataclasses
-from typing import Any
+import sys
+from typing import Any, Callable
 
 from typing_extensions import TypedDict
 
+# `slots` argument of dataclasses is available since python 3.10
+SLOTS: dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class TransmuteData(TypedDict):
     data: dict[str, Any]
@@ -12,13 +16,83 @@ class TransmuteData(TypedDict):
     root: str
 
 
-@dataclasses.dataclass
+class TransmuteResult(TypedDict):
+    success: bool
+    result: dict[str, Any] | None
+    errors: dict[str, Any]
+
+
+class ValidationResult(TypedDict):
+    success: bool
+    errors: dict[str, Any]
+
+
+class ProfileEntry(TypedDict):
+    calls: int
+    time: float
+
+
+class ProfileReport(TypedDict):
+    total: float
+    types: dict[str, ProfileEntry]
+    fields: dict[str, ProfileEntry]
+    transmutators: dict[str, ProfileEntry]
+
+
+@dataclasses.dataclass(**SLOTS)
 class Field:
+    """Value of the field passed through the chain of transmutators.
+
+    The same object is passed to every transmutator of the chain and is
+    reused by the following fields when the chain is finished, so
+    transmutators must not keep references to it.
+    """
+
     field_name: str
     value: Any
     type: str
     data: dict[str, Any]
 
 
+@dataclasses.dataclass(frozen=True)
+class TransmutatorInfo:
+    """Metadata of the transmutator.
+
+    Attributes:
+        pure: result depends only on the value of the field and arguments of
+            the transmutator. Results of pure transmutators can be memoized.
+        compiler: function that receives static arguments of the transmutator
+            from the schema and returns arguments used at runtime. It's
+            called once, when schema is compiled. If any of the returned
+            arguments has `references` attribute with names of the fields
+            from the data, the field is processed after these fields. If any
+            of the returned arguments has truthy `volatile` attribute, its
+            content may change between calls and results of the pure
+            transmutator are not memoized.
+        batch: function that receives the list of values and arguments of
+            the transmutator and returns the list of transformed values. It's
+            used instead of the transmutator when the same field of multiple
+            records is processed at once. If batch function raises an
+            exception, records are processed one by one by the transmutator.
+        vector: function that receives the Arrow array with values and
+            arguments of the transmutator and returns the array of the same
+            length. It's used by the columnar engine for flat records. If
+            vector function raises an exception, records are processed one
+            by one.
+        prefetch: function that receives the list of values of the field
+            from the whole document or batch and arguments of the
+            transmutator. It's called before transmutation starts and can
+            load data for all values at once into the storage returned by
+            `ckanext.transmute.utils.get_transmutation_cache`. Errors of
+            prefetch function are ignored.
+    """
+
+    pure: bool = False
+    compiler: Callable[..., tuple[Any, ...]] | None = None
+    batch: Callable[..., list[Any]] | None = None
+    vector: Callable[..., Any] | None = None
+    prefetch: Callable[..., None] | None = None
+
+
 MODE_COMBINE = "combine"
 MODE_FIRST_FILLED = "first-filled"
@@ -1,31 +1,338 @@
 from __future__ import annotations
 
+import contextvars
+import hashlib
+import json
 import logging
-from typing import Any, Callable
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, TypeVar
 
 import ckan.plugins as p
+import ckan.plugins.toolkit as tk
 
 from ckanext.transmute.exception import UnknownTransmutator
-from ckanext.transmute.interfaces import ITransmute
-from ckanext.transmute.types import MODE_COMBINE, MODE_FIRST_FILLED
+from ckanext.transmute.interfaces import ITransmute, ITransmuteObserver
+from ckanext.transmute.types import (
+    MODE_COMBINE,
+    MODE_FIRST_FILLED,
+    TransmutatorInfo,
+)
+
+CONFIG_SCHEMA_PREFIX = "ckanext.transmute.schema."
+CONFIG_SCHEMA_RELOAD_INTERVAL = "ckanext.transmute.schema_reload_interval"
+
+TFunc = TypeVar("TFunc", bound=Callable[..., Any])
 
 SENTINEL = object()
+DEFAULT_INFO = TransmutatorInfo()
 _transmutator_cache = {}
 _schema_cache = {}
+_observers: tuple[Any, ...] = ()
+_schema_files: dict[str, SchemaFile] = {}
+
+# storage shared by transmutators during a single transmutation
+cache_ctx: contextvars.ContextVar[dict[Any, Any] | None] = contextvars.ContextVar(
+    "cache", default=None
+)
 
 log = logging.getLogger(__name__)
 
 
+class LRUCache:
+    """Thread-safe mapping that keeps only the most recently used items.
+
+    Args:
+        maxsize: max number of stored items. Cache is disabled when it's 0.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize: int):
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+def fingerprint(schema: dict[str, Any]) -> str | None:
+    """Compute hash of the schema content.
+
+    Keys are not sorted, because order of fields affects the result of
+    transmutation, e.g. order of errors or the winner of `map` fields.
+
+    Returns:
+        hash of the schema or None if schema cannot be serialized into JSON
+    """
+    try:
+        serialized = json.dumps(schema)
+    except (TypeError, ValueError):
+        return None
+
+    return hashlib.sha1(serialized.encode()).hexdigest()
+
+
+class FileWatcher:
+    """File that is reloaded when its modification time changes.
+
+    Modification time of the file is checked at most once per
+    `reload_interval` seconds. Checks and reloads are performed while `lock`
+    is acquired.
+
+    Args:
+        path: path to the file
+        reload_interval: min number of seconds between checks of the file
+    """
+
+    def __init__(self, path: str, reload_interval: float = 10):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        # modification time of the loaded version of the file
+        self.mtime: float | None = None
+        self.checked_at = float("-inf")
+
+    def due(self) -> bool:
+        """Check whether it's time to look at the file again."""
+        return time.monotonic() - self.checked_at >= self.reload_interval
+
+    def poll(self) -> float | None:
+        """Return modification time of the file if it differs from `mtime`.
+
+        Must be called while `lock` is acquired.
+
+        Raises:
+            OSError: file cannot be accessed
+        """
+        self.checked_at = time.monotonic()
+        mtime = os.path.getmtime(self.path)
+        return None if mtime == self.mtime else mtime
+
+
+class SchemaFile(FileWatcher):
+    """JSON file with definition of the named schema.
+
+    Only one thread at a time is allowed to reload the file, other threads
+    keep using the current version of the schema meanwhile.
+
+    Args:
+        name: name of the schema
+        path: path to JSON file
+        reload_interval: min number of seconds between checks of the file
+    """
+
+    def __init__(self, name: str, path: str, reload_interval: float = 10):
+        super().__init__(path, reload_interval)
+        self.name = name
+        self.version = 0
+        self._fingerprint: str | None = None
+        # schema is loaded on startup, so the first check is postponed
+        self.checked_at = time.monotonic()
+
+    def __repr__(self):
+        return f"<SchemaFile name={self.name} path={self.path}>"
+
+    def load(self) -> dict[str, Any]:
+        """Read the schema from the file."""
+        self.mtime = os.path.getmtime(self.path)
+        with open(self.path) as src:
+            schema = json.load(src)
+        self._fingerprint = fingerprint(schema)
+        return schema
+
+    def check(self) -> dict[str, Any] | None:
+        """Return content of the file if it was modified since the last load.
+
+        Must be called while `lock` is acquired.
+        """
+        try:
+            if self.poll() is None:
+                return None
+
+            previous = self._fingerprint
+            schema = self.load()
+        except (OSError, ValueError) as e:
+            log.error("Schema %s cannot be reloaded: %s", self.name, e)
+            return None
+
+        if self._fingerprint == previous:
+            return None
+
+        return schema
+
+
+parser_cache = LRUCache()
+memo_cache = LRUCache(1024)
+
+
+def transmutator(
+    pure: bool = False,
+    compiler: Callable[..., tuple[Any, ...]] | None = None,
+    batch: Callable[..., list[Any]] | None = None,
+    vector: Callable[..., Any] | None = None,
+    prefetch: Callable[..., None] | None = None,
+) -> Callable[[TFunc], TFunc]:
+    """Attach metadata to the transmutator.
+
+    Example:
+        ```python
+        @transmutator(pure=True)
+        def tsm_title_case(field: Field) -> Field:
+            field.value = field.value.title()
+            return field
+
+        def compile_pattern(pattern: str):
+            return (re.compile(pattern),)
+
+        @transmutator(compiler=compile_pattern)
+        def tsm_match(field: Field, pattern: re.Pattern[str]) -> Field:
+            if not pattern.match(field.value):
+                raise df.Invalid("Value does not match pattern")
+            return field
+
+        def strip_batch(values: list[Any]) -> list[Any]:
+            return [value.strip() for value in values]
+
+        @transmutator(pure=True, batch=strip_batch)
+        def tsm_strip(field: Field) -> Field:
+            field.value = field.value.strip()
+            return field
+        ```
+
+    Args:
+        pure: the result depends only on the field value and arguments
+        compiler: preprocessor of the static arguments from the schema
+        batch: implementation that transforms values of multiple records
+        vector: implementation that transforms Arrow array of values
+        prefetch: loader of data for all values of the document or batch
+
+    Returns:
+        decorator that registers metadata
+    """
+    info = TransmutatorInfo(
+        pure=pure, compiler=compiler, batch=batch, vector=vector, prefetch=prefetch
+    )
+
+    def decorator(func: TFunc) -> TFunc:
+        setattr(func, "_tsm_info", info)  # noqa: B010
+        return func
+
+    return decorator
+
+
+def get_transmutator_info(func: Callable[..., Any]) -> TransmutatorInfo:
+    """Return metadata of the transmutator."""
+    return getattr(func, "_tsm_info", DEFAULT_INFO)
+
+
+def get_transmutation_cache() -> dict[Any, Any] | None:
+    """Return storage shared by transmutators of the current transmutation.
+
+    Storage is created when transmutation starts and discarded when it's
+    finished. Outside of transmutation, None is returned.
+    """
+    return cache_ctx.get()
+
+
 def get_schema(name: str) -> dict[str, Any] | None:
     """Return named schema."""
     return _schema_cache.get(name)
 
 
+def get_schema_names() -> list[str]:
+    """Return names of all named schemas."""
+    return list(_schema_cache)
+
+
+def get_schema_file(name: str) -> SchemaFile | None:
+    """Return the file of the named schema, if schema was loaded from file."""
+    return _schema_files.get(name)
+
+
+def get_schema_files() -> dict[str, SchemaFile]:
+    """Return files with named schemas declared in the config file."""
+    return _schema_files
+
+
+def set_schema(name: str, schema: dict[str, Any]):
+    """Replace definition of the named schema."""
+    _schema_cache[name] = schema
+
+
+def collect_schema_files():
+    """Register files with named schemas declared in the config file."""
+    interval = tk.asint(tk.config.get(CONFIG_SCHEMA_RELOAD_INTERVAL, 10))
+    _schema_files.clear()
+
+    for key in tk.config:
+        if key.startswith(CONFIG_SCHEMA_PREFIX):
+            name = key[len(CONFIG_SCHEMA_PREFIX) :]
+            _schema_files[name] = SchemaFile(name, tk.config[key], interval)
+
+
 def collect_schemas():
     """Collect named schemas from ITransmute plugins."""
     for plugin in reversed(list(p.PluginImplementations(ITransmute))):
         _schema_cache.update(plugin.get_transmutation_schemas())
 
+    parser_cache.clear()
+
+
+def collect_observers(builtin: Iterable[Any] = ()):
+    """Collect ITransmuteObserver plugins and built-in observers."""
+    global _observers
+    _observers = (*p.PluginImplementations(ITransmuteObserver), *builtin)
+
+
+def get_observers() -> tuple[Any, ...]:
+    """Return observers notified about the progress of transmutation."""
+    return _observers
+
 
 def get_transmutator(transmutator: str) -> Callable[..., Any]:
     get_all_transmutators()
@@ -36,6 +343,12 @@ def get_transmutator(transmutator: str) -> Callable[..., Any]:
         raise UnknownTransmutator(f"Transmutator {transmutator} does not exist")
 
 
+def collect_transmutators():
+    """Collect transmutators from ITransmute plugins, replacing known ones."""
+    _transmutator_cache.clear()
+    get_all_transmutators()
+
+
 def get_all_transmutators() -> list[str]:
     if not _transmutator_cache:
         for plugin in reversed(list(p.PluginImplementations(ITransmute))):